@@ -3,6 +3,7 @@ const path = require("path");
 const { PythonShell } = require("python-shell");
 const fs = require("fs");
 const os = require("os");
+const net = require("net");
 
 let loginWindow;
 let homeWindow;
@@ -12,6 +13,8 @@ let incidentsWindow;
 let registerWindow;
 
 let pyShell;
+let frameServer;
+let viewedCameraIndex = 0;
 let currentUserRole = null;
 let currentIsOffline = false;
 
@@ -102,6 +105,7 @@ function createCameraWindow() {
     cameraWindow.webContents.send("init-camera", {
       role: currentUserRole,
       settings: currentSettings,
+      cameraIndex: viewedCameraIndex,
     });
   });
 
@@ -110,6 +114,7 @@ function createCameraWindow() {
       pyShell.kill();
       pyShell = null;
     }
+    stopFrameServer();
     cameraWindow = null;
     if (homeWindow) homeWindow.show();
   });
@@ -165,6 +170,7 @@ function handleLogout() {
     pyShell.kill();
     pyShell = null;
   }
+  stopFrameServer();
   if (cameraWindow) cameraWindow.close();
   if (dashboardWindow) dashboardWindow.close();
   if (incidentsWindow) incidentsWindow.close();
@@ -180,7 +186,62 @@ function handleLogout() {
 // PYTHON & IPC
 // ---------------------------------------------------------
 
+// Frames arrive as [uint16 LE camera index][uint32 LE length][JPEG bytes] on a local
+// socket; only the newest complete frame per camera in each chunk is forwarded.
+const FRAME_HEADER_SIZE = 6;
+
+function createFrameServer() {
+  return net.createServer((socket) => {
+    let pending = Buffer.alloc(0);
+    socket.setNoDelay(true);
+
+    socket.on("data", (chunk) => {
+      pending = pending.length ? Buffer.concat([pending, chunk]) : chunk;
+      const latestFrames = new Map();
+
+      while (pending.length >= FRAME_HEADER_SIZE) {
+        const cameraIndex = pending.readUInt16LE(0);
+        const size = pending.readUInt32LE(2);
+        if (pending.length < FRAME_HEADER_SIZE + size) break;
+        latestFrames.set(
+          cameraIndex,
+          pending.subarray(FRAME_HEADER_SIZE, FRAME_HEADER_SIZE + size)
+        );
+        pending = pending.subarray(FRAME_HEADER_SIZE + size);
+      }
+
+      if (cameraWindow) {
+        for (const [cameraIndex, frame] of latestFrames) {
+          cameraWindow.webContents.send("python-frame", cameraIndex, frame);
+        }
+      }
+    });
+    socket.on("error", (err) => console.error("Frame socket error", err));
+  });
+}
+
+function stopFrameServer() {
+  if (frameServer) {
+    frameServer.close();
+    frameServer = null;
+  }
+}
+
 function startPythonRecognition() {
+  if (pyShell || frameServer) return;
+
+  frameServer = createFrameServer();
+  frameServer.on("error", (err) => {
+    console.error("Frame server error, using JSON frames", err);
+    frameServer = null;
+    spawnPythonRecognition(null);
+  });
+  frameServer.listen(0, "127.0.0.1", () => {
+    spawnPythonRecognition(frameServer.address().port);
+  });
+}
+
+function spawnPythonRecognition(framePort) {
   if (pyShell) return;
   const pythonPath = path.join(
     app.getAppPath(),
@@ -195,6 +256,7 @@ function startPythonRecognition() {
     mode: "json",
     pythonPath,
     scriptPath,
+    args: framePort ? ["--frame-port", String(framePort)] : [],
   });
 
   const currentSettings = loadSettings();
@@ -202,12 +264,19 @@ function startPythonRecognition() {
     command: "set_weapon_detection",
     value: currentSettings.detect_weapons,
   });
+  pyShell.send({ command: "select_camera", value: viewedCameraIndex });
 
+  const thisShell = pyShell;
   pyShell.on("message", (message) => {
     if (cameraWindow) cameraWindow.webContents.send("python-data", message);
   });
   pyShell.on("stderr", (stderr) => console.error(`${stderr}`));
-  pyShell.on("close", () => (pyShell = null));
+  pyShell.on("close", () => {
+    // A late close from a shell that was already replaced must not tear down the new one
+    if (pyShell !== thisShell) return;
+    pyShell = null;
+    stopFrameServer();
+  });
 }
 
 ipcMain.on("toggle-overlays-change", (event, shouldShow) => {
@@ -216,6 +285,13 @@ ipcMain.on("toggle-overlays-change", (event, shouldShow) => {
   }
 });
 
+ipcMain.on("select-camera", (event, cameraIndex) => {
+  viewedCameraIndex = cameraIndex;
+  if (pyShell) {
+    pyShell.send({ command: "select_camera", value: cameraIndex });
+  }
+});
+
 ipcMain.on("toggle-global-weapon-detection", (event, isEnabled) => {
   const settings = loadSettings();
   settings.detect_weapons = isEnabled;
@@ -227,13 +303,14 @@ ipcMain.on("toggle-global-weapon-detection", (event, isEnabled) => {
   console.log("Global Weapon Detection set to:", isEnabled);
 });
 
-// IPC Handlers
-ipcMain.on("open-camera", () => createCameraWindow());
-ipcMain.on("open-dashboard", () => createDashboardWindow());
-ipcMain.on("open-incidents", () => createIncidentsWindow());
-ipcMain.on("logout-request", () => handleLogout());
+// Long-lived Python backend for auth, incidents and enrollment: line-delimited JSON-RPC
+// over stdio, so each UI action is one round trip instead of a fresh interpreter.
+let backendShell;
+let backendRequestId = 0;
+const backendPending = new Map();
 
-ipcMain.on("login-attempt", (event, credentials) => {
+function startBackendWorker() {
+  if (backendShell) return backendShell;
   const pythonPath = path.join(
     app.getAppPath(),
     "..",
@@ -243,20 +320,67 @@ ipcMain.on("login-attempt", (event, credentials) => {
   );
   const scriptPath = path.join(app.getAppPath(), "..", "python_backend");
 
-  PythonShell.run("authenticator.py", {
+  const thisShell = new PythonShell("backend_worker.py", {
     mode: "json",
     pythonPath,
     scriptPath,
-    args: [credentials.username, credentials.password],
+  });
+  backendShell = thisShell;
+  thisShell.on("message", (message) => {
+    const pending = backendPending.get(message.id);
+    if (!pending) return;
+    backendPending.delete(message.id);
+    if (message.error) pending.reject(new Error(message.error.message));
+    else pending.resolve(message.result);
+  });
+  thisShell.on("stderr", (stderr) => console.error(`${stderr}`));
+  thisShell.on("close", () => {
+    // Fail whatever this worker had in flight; the next call starts a fresh one
+    if (backendShell === thisShell) backendShell = null;
+    for (const [id, pending] of backendPending) {
+      if (pending.shell !== thisShell) continue;
+      backendPending.delete(id);
+      pending.reject(new Error("Backend worker exited"));
+    }
+  });
+  return thisShell;
+}
+
+function callBackend(method, params = {}) {
+  return new Promise((resolve, reject) => {
+    const id = ++backendRequestId;
+    const shell = startBackendWorker();
+    backendPending.set(id, { resolve, reject, shell });
+    shell.send({ jsonrpc: "2.0", id, method, params });
+  });
+}
+
+function stopBackendWorker() {
+  if (backendShell) {
+    backendShell.kill();
+    backendShell = null;
+  }
+}
+
+// IPC Handlers
+ipcMain.on("open-camera", () => createCameraWindow());
+ipcMain.on("open-dashboard", () => createDashboardWindow());
+ipcMain.on("open-incidents", () => createIncidentsWindow());
+ipcMain.on("logout-request", () => handleLogout());
+
+ipcMain.on("login-attempt", (event, credentials) => {
+  callBackend("auth.login", {
+    username: credentials.username,
+    password: credentials.password,
   })
-    .then((results) => {
-      if (results && results[0] && results[0].status === "success") {
-        currentUserRole = results[0].role;
-        currentIsOffline = results[0].mode === "offline";
+    .then((result) => {
+      if (result && result.status === "success") {
+        currentUserRole = result.role;
+        currentIsOffline = result.mode === "offline";
         if (loginWindow) loginWindow.close();
         createHomeWindow();
       } else {
-        event.reply("login-fail", results[0]?.message || "Login failed");
+        event.reply("login-fail", result?.message || "Login failed");
       }
     })
     .catch((err) => event.reply("login-fail", err.toString()));
@@ -271,20 +395,15 @@ ipcMain.on("open-login-window", () => {
   createLoginWindow();
 });
 ipcMain.on("register-attempt", (event, args) => {
-  const pythonPath = path.join(
-    app.getAppPath(),
-    "..",
-    "venv",
-    "Scripts",
-    "python.exe"
-  );
-  const scriptPath = path.join(app.getAppPath(), "..", "python_backend");
-  PythonShell.run("register.py", {
-    mode: "json",
-    pythonPath,
-    scriptPath,
-    args: [args.username, args.password, args.adminCode],
-  }).then((results) => event.reply("register-result", results[0]));
+  callBackend("auth.register", {
+    username: args.username,
+    password: args.password,
+    admin_code: args.adminCode && args.adminCode !== "none" ? args.adminCode : null,
+  })
+    .then((result) => event.reply("register-result", result))
+    .catch((err) =>
+      event.reply("register-result", { status: "error", message: err.toString() })
+    );
 });
 
 ipcMain.on("upload-profile", (event, { userData, fileBuffer, fileName }) => {
@@ -295,25 +414,15 @@ ipcMain.on("upload-profile", (event, { userData, fileBuffer, fileName }) => {
     tempPath = path.join(os.tmpdir(), `temp_${Date.now()}${fileExtension}`);
     fs.writeFileSync(tempPath, buffer);
     const cleanTempPath = tempPath.replace(/\\/g, "/");
-    const pythonPath = path.join(
-      app.getAppPath(),
-      "..",
-      "venv",
-      "Scripts",
-      "python.exe"
-    );
-    const scriptPath = path.join(app.getAppPath(), "..", "python_backend");
 
-    PythonShell.run("admin_uploader.py", {
-      mode: "json",
-      pythonPath,
-      scriptPath,
-      args: [JSON.stringify(userData), cleanTempPath],
+    callBackend("profiles.upload", {
+      user_data_json: JSON.stringify(userData),
+      image_path: cleanTempPath,
     })
-      .then((results) => {
+      .then((result) => {
         event.reply("upload-result", {
-          success: results[0].status === "success",
-          message: results[0].message,
+          success: result.status === "success",
+          message: result.message,
         });
       })
       .catch((err) =>
@@ -330,53 +439,29 @@ ipcMain.on("upload-profile", (event, { userData, fileBuffer, fileName }) => {
   }
 });
 
-ipcMain.on("get-incidents", (event) => {
-  const pythonPath = path.join(
-    app.getAppPath(),
-    "..",
-    "venv",
-    "Scripts",
-    "python.exe"
-  );
-  const scriptPath = path.join(app.getAppPath(), "..", "python_backend");
-  PythonShell.run("incident_manager.py", {
-    mode: "json",
-    pythonPath,
-    scriptPath,
-    args: ["list"],
-  }).then((r) => event.reply("incidents-data", r[0]));
+ipcMain.on("get-incidents", (event, options = {}) => {
+  callBackend("incidents.list", {
+    status: options.status || null,
+    since: options.since || null,
+    until: options.until || null,
+    cursor: options.cursor || null,
+    sync: !options.cached,
+    // "Load more" reads the index but may need older history fetched first
+    backfill: !options.cached || Boolean(options.cursor),
+    full: Boolean(options.full),
+  })
+    .catch((err) => ({ status: "error", message: err.toString() }))
+    .then((result) => event.reply("incidents-data", { ...result, request: options }));
 });
 ipcMain.on("update-incident-status", (event, args) => {
-  const pythonPath = path.join(
-    app.getAppPath(),
-    "..",
-    "venv",
-    "Scripts",
-    "python.exe"
-  );
-  const scriptPath = path.join(app.getAppPath(), "..", "python_backend");
-  PythonShell.run("incident_manager.py", {
-    mode: "json",
-    pythonPath,
-    scriptPath,
-    args: ["update", args.id, args.status],
-  }).then(() => event.reply("incident-updated"));
+  callBackend("incidents.update", { incident_id: args.id, new_status: args.status })
+    .catch((err) => console.error("Incident update failed", err))
+    .then(() => event.reply("incident-updated"));
 });
 ipcMain.on("delete-incident", (event, args) => {
-  const pythonPath = path.join(
-    app.getAppPath(),
-    "..",
-    "venv",
-    "Scripts",
-    "python.exe"
-  );
-  const scriptPath = path.join(app.getAppPath(), "..", "python_backend");
-  PythonShell.run("incident_manager.py", {
-    mode: "json",
-    pythonPath,
-    scriptPath,
-    args: ["delete", args.id],
-  }).then(() => event.reply("incident-updated"));
+  callBackend("incidents.delete", { incident_id: args.id })
+    .catch((err) => console.error("Incident delete failed", err))
+    .then(() => event.reply("incident-updated"));
 });
 
 ipcMain.handle("show-confirm-dialog", async (event, message) => {
@@ -406,11 +491,14 @@ ipcMain.handle("load-form-config", () => {
 
 app.whenReady().then(() => {
   Menu.setApplicationMenu(null);
+  // Warm the backend while the login form is on screen
+  startBackendWorker();
   createLoginWindow();
   app.on("activate", () => {
     if (BrowserWindow.getAllWindows().length === 0) createLoginWindow();
   });
 });
+app.on("will-quit", () => stopBackendWorker());
 app.on("window-all-closed", () => {
   if (process.platform !== "darwin") app.quit();
 });
@@ -14,6 +14,7 @@ contextBridge.exposeInMainWorld("api", {
       "open-register-window",
       "register-attempt",
       "save-form-config",
+      "select-camera",
       "toggle-global-weapon-detection",
       "toggle-overlays-change",
       "update-incident-status",
@@ -33,6 +34,7 @@ contextBridge.exposeInMainWorld("api", {
       "login-fail",
       "login-success",
       "python-data",
+      "python-frame",
       "register-result",
       "save-form-config-fail",
       "save-form-config-success",
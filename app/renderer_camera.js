@@ -1,3 +1,9 @@
+const accessCardClass = {
+  denied: "bg-danger-subtle text-danger-emphasis",
+  full: "bg-success-subtle text-success-emphasis",
+  first_floor: "bg-warning-subtle text-warning-emphasis",
+};
+
 document.addEventListener("DOMContentLoaded", () => {
   const cameraFeed = document.getElementById("camera-feed");
   const infoPanel = document.getElementById("info-panel");
@@ -18,10 +24,50 @@ document.addEventListener("DOMContentLoaded", () => {
   );
   const userWeaponStatus = document.getElementById("user-weapon-status");
 
+  const cameraSelect = document.getElementById("camera-select");
+
   let savedRole = null;
+  let currentFrameUrl = null;
+  // The backend sends frames only for the selected camera; the others report status about
+  // once a second, which is enough to list them in the selector
+  let activeCameraIndex = 0;
+  const knownCameras = new Map();
+
+  function isActiveCamera(cameraIndex) {
+    return (cameraIndex || 0) === activeCameraIndex;
+  }
+
+  function trackCamera(data) {
+    const index = data.camera_index || 0;
+    const label = `Camera ${data.camera_id ?? index}${
+      data.is_recording ? " (recording)" : ""
+    }`;
+    const known = knownCameras.get(index);
+    knownCameras.set(index, label);
+    if (!cameraSelect || known === label) return;
+
+    let option = cameraSelect.querySelector(`option[value="${index}"]`);
+    if (!option) {
+      option = document.createElement("option");
+      option.value = String(index);
+      const later = [...cameraSelect.options].find((o) => Number(o.value) > index);
+      cameraSelect.insertBefore(option, later || null);
+    }
+    option.textContent = label;
+    cameraSelect.value = String(activeCameraIndex);
+    cameraSelect.classList.toggle("d-none", knownCameras.size < 2);
+  }
+
+  if (cameraSelect) {
+    cameraSelect.addEventListener("change", (e) => {
+      activeCameraIndex = Number(e.target.value);
+      window.api.send("select-camera", activeCameraIndex);
+    });
+  }
 
   window.api.receive("init-camera", (data) => {
     savedRole = data.role;
+    activeCameraIndex = data.cameraIndex || 0;
 
     if (globalWeaponToggle) {
       globalWeaponToggle.checked = data.settings.detect_weapons;
@@ -52,8 +98,20 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   }
 
+  window.api.receive("python-frame", (cameraIndex, jpegBytes) => {
+    if (!isActiveCamera(cameraIndex)) return;
+    const frameUrl = URL.createObjectURL(
+      new Blob([jpegBytes], { type: "image/jpeg" })
+    );
+    cameraFeed.src = frameUrl;
+    if (currentFrameUrl) URL.revokeObjectURL(currentFrameUrl);
+    currentFrameUrl = frameUrl;
+  });
+
   window.api.receive("python-data", (data) => {
     if (!data) return;
+    trackCamera(data);
+    if (!isActiveCamera(data.camera_index)) return;
 
     if (loadingSection) loadingSection.classList.add("d-none");
 
@@ -114,19 +172,8 @@ document.addEventListener("DOMContentLoaded", () => {
       data.results.forEach((person_tuple) => {
         const p = person_tuple[1];
         const status = p.status || "No data";
-        let cardClass = "bg-light";
-
-        if (
-          status.includes("Denied") ||
-          status.includes("Unknown") ||
-          status.includes("No profile")
-        ) {
-          cardClass = "bg-danger-subtle text-danger-emphasis";
-        } else if (status.includes("All") || status.includes("Full")) {
-          cardClass = "bg-success-subtle text-success-emphasis";
-        } else if (status.includes("Only first floor")) {
-          cardClass = "bg-warning-subtle text-warning-emphasis";
-        }
+        // "access" is classified once by the backend's profile store
+        const cardClass = accessCardClass[p.access] || "bg-light";
 
         infoPanel.innerHTML += `
           <div class="card person-card ${cardClass}">
@@ -16,47 +16,23 @@ document.addEventListener("DOMContentLoaded", () => {
   refreshBtn.addEventListener("click", loadIncidents);
 
   window.api.receive("incidents-data", (response) => {
-    listContainer.innerHTML = "";
+    const request = response.request || {};
 
     if (response.status === "error") {
-      listContainer.innerHTML = `<div class="p-3 text-danger">Error: ${response.message}</div>`;
+      if (!request.cursor) {
+        listContainer.innerHTML = `<div class="p-3 text-danger">Error: ${response.message}</div>`;
+      }
       return;
     }
 
-    if (response.data.length === 0) {
-      listContainer.innerHTML = `<div class="p-3 text-center">No incidents found.</div>`;
+    // The cached page paints immediately; then ask for the synced one
+    if (request.cached && !request.cursor) {
+      if (response.data.length > 0) renderIncidents(response, false);
+      window.api.send("get-incidents", {});
       return;
     }
 
-    response.data.forEach((incident) => {
-      const item = document.createElement("div");
-      item.className = "list-group-item incident-item";
-
-      const statusConfig = statusMap[incident.status] || {
-        badgeClass: "bg-secondary",
-        badgeText: incident.status,
-      };
-
-      item.innerHTML = `
-        <div class="d-flex w-100 justify-content-between">
-          <small>${new Date(incident.timestamp).toLocaleString()}</small>
-          <span class="badge ${statusConfig.badgeClass}">${
-        statusConfig.badgeText
-      }</span>
-        </div>
-        <p class="mb-1 small text-truncate">${incident.id}</p>
-      `;
-
-      item.addEventListener("click", () => {
-        document
-          .querySelectorAll(".incident-item")
-          .forEach((el) => el.classList.remove("active"));
-        item.classList.add("active");
-        playIncident(incident);
-      });
-
-      listContainer.appendChild(item);
-    });
+    renderIncidents(response, Boolean(request.cursor));
   });
 
   window.api.receive("incident-updated", () => {
@@ -73,7 +49,77 @@ function loadIncidents() {
       </div>
     </div>
   `;
-  window.api.send("get-incidents");
+  window.api.send("get-incidents", { cached: true });
+}
+
+function renderIncidents(response, append) {
+  const listContainer = document.getElementById("list-column");
+  if (!append) listContainer.innerHTML = "";
+  document.getElementById("load-more-btn")?.remove();
+  document.getElementById("offline-note")?.remove();
+
+  if (response.offline) {
+    const note = document.createElement("div");
+    note.id = "offline-note";
+    note.className = "p-2 small text-warning text-center";
+    note.textContent = "Offline - showing locally indexed incidents.";
+    listContainer.prepend(note);
+  }
+
+  if (!append && response.data.length === 0) {
+    listContainer.insertAdjacentHTML(
+      "beforeend",
+      `<div class="p-3 text-center">No incidents found.</div>`
+    );
+    return;
+  }
+
+  response.data.forEach((incident) => {
+    const item = document.createElement("div");
+    item.className = "list-group-item incident-item";
+
+    const statusConfig = statusMap[incident.status] || {
+      badgeClass: "bg-secondary",
+      badgeText: incident.status,
+    };
+
+    item.innerHTML = `
+      <div class="d-flex w-100 justify-content-between">
+        <small>${new Date(incident.timestamp).toLocaleString()}</small>
+        <span class="badge ${statusConfig.badgeClass}">${
+      statusConfig.badgeText
+    }</span>
+      </div>
+      <p class="mb-1 small text-truncate">${incident.id}${
+        incident.segments && incident.segments.length > 1
+          ? ` (${incident.segments.length} segments)`
+          : ""
+      }</p>
+    `;
+
+    item.addEventListener("click", () => {
+      document
+        .querySelectorAll(".incident-item")
+        .forEach((el) => el.classList.remove("active"));
+      item.classList.add("active");
+      playIncident(incident);
+    });
+
+    listContainer.appendChild(item);
+  });
+
+  if (response.next) {
+    const more = document.createElement("button");
+    more.id = "load-more-btn";
+    more.className = "list-group-item list-group-item-action text-center";
+    more.textContent = "Load more";
+    more.addEventListener("click", () => {
+      more.disabled = true;
+      // Later pages skip the incremental sync so offsets stay stable; only older history is fetched
+      window.api.send("get-incidents", { cursor: response.next, cached: true });
+    });
+    listContainer.appendChild(more);
+  }
 }
 
 function playIncident(incident) {
@@ -84,8 +130,21 @@ function playIncident(incident) {
 
   document.getElementById("incident-id-display").textContent = incident.id;
 
+  // Long incidents are stored as consecutive segments; play them back to back
+  const segments = incident.segments && incident.segments.length
+    ? incident.segments
+    : [incident.videoUrl];
+  let segmentIndex = 0;
+
   const player = document.getElementById("player");
-  player.src = incident.videoUrl;
+  player.onended = () => {
+    if (segmentIndex + 1 < segments.length) {
+      segmentIndex += 1;
+      player.src = segments[segmentIndex];
+      player.play();
+    }
+  };
+  player.src = segments[segmentIndex];
   player.play();
 }
 
@@ -3,8 +3,8 @@ import json
 import os
 import datetime
 import re
-from azure.storage.blob import BlobServiceClient
 import config_manager
+import azure_clients
 
 def generate_unique_id(name, surname):
     now = datetime.datetime.now()
@@ -26,9 +26,7 @@ def generate_unique_id(name, surname):
 
 def upload_profile(user_data_json, image_path):
     try:
-        blob_service_client = BlobServiceClient.from_connection_string(
-            config_manager.AZURE_STORAGE_CONNECTION_STRING
-        )
+        blob_service_client = azure_clients.get_blob_service_client()
 
         user_data = json.loads(user_data_json)
         name = user_data.get('name')
@@ -66,11 +64,10 @@ def upload_profile(user_data_json, image_path):
         with open(image_path, "rb") as data:
             blob_client_image.upload_blob(data, overwrite=True)
 
-        print(json.dumps({"status": "success", "message": f"Successfully registered ID: {user_id}"}))
+        return {"status": "success", "message": f"Successfully registered ID: {user_id}"}
 
     except Exception as e:
-        print(json.dumps({"status": "error", "message": f"Upload error: {str(e)}"}))
-        sys.exit(1)
+        return {"status": "error", "message": f"Upload error: {str(e)}"}
 
 if __name__ == "__main__":
     try:
@@ -80,7 +77,10 @@ if __name__ == "__main__":
 
         user_data_arg = sys.argv[1]
         image_path_arg = sys.argv[2]
-        upload_profile(user_data_arg, image_path_arg)
+        result = upload_profile(user_data_arg, image_path_arg)
+        print(json.dumps(result))
+        if result["status"] != "success":
+            sys.exit(1)
     except Exception as e:
         print(json.dumps({"status": "error", "message": f"Critical error: {str(e)}"}))
         sys.exit(1)
@@ -1,10 +1,9 @@
 import sys
 import json
 import os
-from azure.data.tables import TableServiceClient
 from azure.core.exceptions import ResourceNotFoundError
 from passlib.hash import pbkdf2_sha256
-import config_manager
+import azure_clients
 
 CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'local_data')
 USERS_CACHE_FILE = os.path.join(CACHE_DIR, 'users_cache.json')
@@ -55,9 +54,7 @@ def authenticate_offline(username, password):
 
 def authenticate(username, password):
     try:
-        connection_string = config_manager.AZURE_STORAGE_CONNECTION_STRING
-        table_service = TableServiceClient.from_connection_string(connection_string)
-        table_client = table_service.get_table_client(table_name="Users")
+        table_client = azure_clients.get_table_client("Users")
 
         try:
             user_entity = table_client.get_entity(partition_key="users", row_key=username)
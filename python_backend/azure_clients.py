@@ -0,0 +1,35 @@
+import threading
+
+from azure.data.tables import TableServiceClient
+from azure.storage.blob import BlobServiceClient
+
+import config_manager
+
+# One client per service for the life of the process. The SDK clients are thread-safe and
+# keep their HTTP session, so repeated calls from the backend worker reuse TLS connections.
+_lock = threading.Lock()
+_table_service_client = None
+_blob_service_client = None
+_table_clients = {}
+
+def get_table_service_client():
+    global _table_service_client
+    with _lock:
+        if _table_service_client is None:
+            _table_service_client = TableServiceClient.from_connection_string(config_manager.AZURE_STORAGE_CONNECTION_STRING)
+        return _table_service_client
+
+def get_table_client(table_name):
+    service = get_table_service_client()
+    with _lock:
+        client = _table_clients.get(table_name)
+        if client is None:
+            client = _table_clients[table_name] = service.get_table_client(table_name=table_name)
+        return client
+
+def get_blob_service_client():
+    global _blob_service_client
+    with _lock:
+        if _blob_service_client is None:
+            _blob_service_client = BlobServiceClient.from_connection_string(config_manager.AZURE_STORAGE_CONNECTION_STRING)
+        return _blob_service_client
@@ -0,0 +1,115 @@
+import sys
+import json
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Long-lived backend for the UI: one JSON-RPC 2.0 request per stdin line, one response per
+# stdout line. The Azure SDKs, config and pooled clients are loaded once, so a login or an
+# incident listing costs one round trip instead of a fresh interpreter.
+#   -> {"jsonrpc": "2.0", "id": 1, "method": "incidents.update", "params": {"incident_id": "...", "new_status": "Resolved"}}
+#   <- {"jsonrpc": "2.0", "id": 1, "result": {"status": "success", ...}}
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+WORKER_THREADS = 4
+
+class BackendWorker:
+    def __init__(self, output):
+        # Handlers run on a small pool so a slow listing never holds up a login
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=WORKER_THREADS)
+        self.methods = {}
+
+    def register(self, name, handler):
+        self.methods[name] = handler
+
+    def send(self, message):
+        line = json.dumps(message, default=str)
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def reply(self, request_id, result=None, error=None):
+        message = {"jsonrpc": "2.0", "id": request_id}
+        if error is not None:
+            message["error"] = error
+        else:
+            message["result"] = result
+        self.send(message)
+
+    def handle(self, request):
+        # Requests without an id are notifications and get no response
+        request_id = request.get("id")
+        respond = "id" in request
+        handler = self.methods.get(request["method"])
+        if handler is None:
+            if respond:
+                self.reply(request_id, error={"code": METHOD_NOT_FOUND, "message": f"Unknown method {request['method']!r}"})
+            return
+
+        params = request.get("params") or {}
+        args, kwargs = (params, {}) if isinstance(params, list) else ([], params)
+        try:
+            inspect.signature(handler).bind(*args, **kwargs)
+        except TypeError as e:
+            if respond:
+                self.reply(request_id, error={"code": INVALID_PARAMS, "message": str(e)})
+            return
+
+        try:
+            result = handler(*args, **kwargs)
+        except Exception as e:
+            print(f"Backend worker: {request['method']} failed: {e}", file=sys.stderr)
+            if respond:
+                self.reply(request_id, error={"code": INTERNAL_ERROR, "message": str(e)})
+            return
+        if respond:
+            self.reply(request_id, result=result)
+
+    def dispatch(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            self.reply(None, error={"code": PARSE_ERROR, "message": str(e)})
+            return
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            request_id = request.get("id") if isinstance(request, dict) else None
+            self.reply(request_id, error={"code": INVALID_REQUEST, "message": "Expected a JSON-RPC request object"})
+            return
+        self.executor.submit(self.handle, request)
+
+    def serve(self, stream):
+        for line in iter(stream.readline, ""):
+            line = line.strip()
+            if line:
+                self.dispatch(line)
+        self.executor.shutdown(wait=True)
+
+def register_methods(worker):
+    import authenticator
+    import register
+    import admin_uploader
+    import incident_manager
+
+    worker.register("ping", lambda: {"status": "success"})
+    worker.register("auth.login", authenticator.authenticate)
+    worker.register("auth.register", register.register_user)
+    worker.register("profiles.upload", admin_uploader.upload_profile)
+    worker.register("incidents.list", incident_manager.list_incidents)
+    worker.register("incidents.update", incident_manager.update_incident_status)
+    worker.register("incidents.delete", incident_manager.delete_incident)
+
+if __name__ == "__main__":
+    # stdout carries responses only; stray prints from handlers go to stderr
+    worker = BackendWorker(sys.stdout)
+    sys.stdout = sys.stderr
+
+    register_methods(worker)
+    print("Backend worker ready.", file=sys.stderr)
+    worker.serve(sys.stdin)
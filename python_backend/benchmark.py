@@ -0,0 +1,337 @@
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import shutil
+import tempfile
+import threading
+import subprocess
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BENCHMARK_CONFIG = {
+    "AZURE_KEY": "benchmark",
+    "AZURE_ENDPOINT": "https://benchmark.invalid/",
+    "AZURE_STORAGE_CONNECTION_STRING": "DefaultEndpointsProtocol=https;AccountName=benchmark;AccountKey=YmVuY2htYXJr;EndpointSuffix=core.windows.net",
+    "PROFILE_CONTAINER": "profiles",
+    "IMAGE_CONTAINER": "images",
+    "INCIDENT_CONTAINER": "incidents",
+    "ADMIN_INVITE_CODE": "benchmark"
+}
+
+class StageTimer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        return timed
+
+    def summary(self):
+        with self.lock:
+            return {stage: summarize_ms(values) for stage, values in self.samples.items()}
+
+def summarize_ms(values):
+    if not values:
+        return {"count": 0}
+    ms = np.asarray(values) * 1000.0
+    p50, p90, p95, p99 = np.percentile(ms, [50, 90, 95, 99])
+    return {
+        "count": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3)
+    }
+
+class ResourceSampler:
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.process = psutil.Process() if psutil else None
+        self.cpu_samples = []
+        self.rss_samples = []
+        self.running = False
+        self.thread = None
+        self.started_cpu = None
+        self.started_at = None
+
+    def cpu_times(self):
+        times = os.times()
+        return times.user + times.system
+
+    def start(self):
+        self.running = True
+        self.started_cpu = self.cpu_times()
+        self.started_at = time.time()
+        if self.process:
+            self.process.cpu_percent(None)
+        self.thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def _sample_loop(self):
+        while self.running:
+            time.sleep(self.interval)
+            if self.process:
+                self.cpu_samples.append(self.process.cpu_percent(None))
+                self.rss_samples.append(self.process.memory_info().rss)
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=self.interval * 2)
+        elapsed = time.time() - self.started_at
+        cpu_seconds = self.cpu_times() - self.started_cpu
+        stats = {
+            "cpu_seconds": round(cpu_seconds, 3),
+            "cpu_percent_avg": round(100.0 * cpu_seconds / elapsed, 1) if elapsed > 0 else 0.0,
+            "cpu_count": os.cpu_count()
+        }
+        if self.cpu_samples:
+            stats["cpu_percent_p95"] = round(float(np.percentile(self.cpu_samples, 95)), 1)
+        if self.rss_samples:
+            stats["rss_mb_avg"] = round(float(np.mean(self.rss_samples)) / 2**20, 1)
+            stats["rss_mb_max"] = round(max(self.rss_samples) / 2**20, 1)
+        return stats
+
+class BenchmarkSink:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.packets = 0
+        self.status_packets = 0
+        self.frame_bytes = 0
+        self.last_packets = {}
+
+    def send(self, data_packet, jpeg_buffer):
+        with self.lock:
+            self.packets += 1
+            self.frame_bytes += len(jpeg_buffer)
+            self.last_packets[data_packet.get("camera_id")] = data_packet
+
+    def send_status(self, data_packet):
+        with self.lock:
+            self.status_packets += 1
+            self.last_packets[data_packet.get("camera_id")] = data_packet
+
+    def close(self):
+        pass
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def ensure_config():
+    # The real config must never be needed to benchmark; fall back to a throwaway one
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    if "VISION_CONFIG_PATH" in os.environ or os.path.exists(os.path.join(base_dir, "..", "config.json")):
+        return
+    fd, path = tempfile.mkstemp(prefix="benchmark_config_", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(BENCHMARK_CONFIG, f)
+    os.environ["VISION_CONFIG_PATH"] = path
+
+def load_gallery(mr, gallery_dir):
+    from face_encoder import encode_face_image
+
+    encodings, names = [], []
+    if gallery_dir:
+        for filename in sorted(os.listdir(gallery_dir)):
+            path = os.path.join(gallery_dir, filename)
+            try:
+                encoding = encode_face_image(path)
+            except Exception as e:
+                print(f"Skipping gallery image {filename}: {e}", file=sys.stderr)
+                continue
+            if encoding is not None:
+                encodings.append(encoding)
+                names.append(os.path.splitext(filename)[0])
+    mr.fr.set_gallery(encodings, names)
+    return len(names)
+
+def run_benchmark(args):
+    ensure_config()
+
+    import fake_azure
+    import upload_queue
+    import main_recognition as mr
+    from inference_worker import InferenceWorker
+    from frame_sources import VideoFileSource
+    from threat_detector import create_threat_detector
+
+    upload_queue.BlobServiceClient = fake_azure.FakeBlobServiceClient
+    upload_queue.TableClient = fake_azure.FakeTableClient
+    # Clips from the run must never land in the app's real queue, where an interrupted run
+    # would leave them to be uploaded by the next real start
+    queue_dir = tempfile.mkdtemp(prefix="benchmark_upload_queue_")
+    clip_queue = upload_queue.UploadQueue(queue_dir=queue_dir).start()
+    try:
+        face_client = fake_azure.configure_latency(args.face_ms, args.blob_ms, args.table_ms)
+
+        timer = StageTimer()
+        mr.face_client = face_client
+        mr.blob_service_client = fake_azure.FakeBlobServiceClient()
+        mr.IS_OFFLINE_MODE = args.offline
+        mr.SYSTEM_STATUS = "Offline Mode" if args.offline else "Online"
+        mr.DETECT_WEAPONS = not args.no_weapons
+        mr.SHOW_OVERLAYS = args.overlays
+
+        mr.fr = mr.FacialRecognition()
+        gallery_size = load_gallery(mr, args.gallery)
+        mr.fr.identify_faces_with_distances = timer.wrap("face_identify", mr.fr.identify_faces_with_distances)
+        mr.threat_detector = create_threat_detector(
+            args.backend or mr.config_manager.THREAT_BACKEND,
+            model_filename="best.pt",
+            conf_threshold=0.45,
+            quantize=args.int8,
+            num_threads=mr.config_manager.THREAT_ONNX_THREADS
+        )
+        mr.detect_faces_azure = timer.wrap("face_detect_azure", mr.detect_faces_azure)
+        mr.detect_faces_locally = timer.wrap("face_detect_local", mr.detect_faces_locally)
+
+        weapon_worker = InferenceWorker("weapon", timer.wrap("weapon_batch", mr.detect_weapons_batch), max_batch=max(1, len(args.videos)))
+        face_worker = InferenceWorker("face", timer.wrap("face_batch", mr.analyze_faces_batch), max_batch=1)
+        sink = BenchmarkSink()
+
+        pipelines = []
+        for index, path in enumerate(args.videos):
+            cap = VideoFileSource(path, realtime=not args.fast, loops=args.loops)
+            if not cap.isOpened():
+                raise RuntimeError(f"Cannot open video {path}")
+            pipeline = mr.CameraPipeline(
+                index, {"id": os.path.basename(path), "source": path}, weapon_worker, face_worker, sink,
+                cap=cap, upload_queue=clip_queue
+            )
+
+            def timed_process(frame, frame_time, process=pipeline.process_frame):
+                started = time.perf_counter()
+                process(frame, frame_time)
+                timer.record("frame", time.perf_counter() - started)
+                timer.record("end_to_end", time.time() - frame_time)
+            pipeline.process_frame = timed_process
+            pipelines.append(pipeline)
+
+        sampler = ResourceSampler().start()
+        started_at = time.time()
+        for pipeline in pipelines:
+            pipeline.start()
+
+        try:
+            while time.time() - started_at < args.duration:
+                if all(p.cap.finished for p in pipelines):
+                    break
+                time.sleep(0.1)
+        finally:
+            elapsed = time.time() - started_at
+            for pipeline in pipelines:
+                pipeline.stop()
+            weapon_worker.stop()
+            face_worker.stop()
+            resources = sampler.stop()
+            upload_stats = clip_queue.get_stats()
+
+        cameras = {}
+        for pipeline in pipelines:
+            grab_stats = pipeline.grabber.get_stats()
+            packet = sink.last_packets.get(pipeline.camera_id, {})
+            cameras[pipeline.camera_id] = {
+                "source_frames": pipeline.cap.frames_read,
+                "captured_frames": grab_stats["captured_frames"],
+                "dropped_frames": grab_stats["dropped_frames"],
+                "stale_frames": grab_stats["stale_frames"],
+                "scheduler": packet.get("scheduler"),
+                "motion_gate": packet.get("motion_gate")
+            }
+
+        stages = timer.summary()
+        processed = stages.get("frame", {}).get("count", 0)
+        return {
+            "meta": {
+                "revision": git_revision(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "videos": args.videos,
+                "realtime": not args.fast,
+                "offline": args.offline,
+                "weapons": not args.no_weapons,
+                "backend": args.backend or mr.config_manager.THREAT_BACKEND,
+                "gallery_size": gallery_size,
+                "stub_latency_ms": {"face": args.face_ms, "blob": args.blob_ms, "table": args.table_ms}
+            },
+            "elapsed_seconds": round(elapsed, 3),
+            "fps": round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "fps_per_camera": round(processed / elapsed / len(pipelines), 2) if elapsed > 0 else 0.0,
+            "stages": stages,
+            "cameras": cameras,
+            "workers": {"weapon": weapon_worker.get_stats(), "face": face_worker.get_stats()},
+            "resources": resources,
+            "stubs": {
+                "face": face_client.stats.get_stats(),
+                "blob": fake_azure.FakeBlobServiceClient.stats.get_stats(),
+                "table": fake_azure.FakeTableClient.stats.get_stats()
+            },
+            "upload_queue": upload_stats,
+            "frames_emitted": sink.packets,
+            "status_packets_emitted": sink.status_packets,
+            "frame_bytes_emitted": sink.frame_bytes
+        }
+    finally:
+        # Runs even when the benchmark is interrupted or fails to start
+        clip_queue.stop()
+        shutil.rmtree(queue_dir, ignore_errors=True)
+
+def print_report(report):
+    print(f"Processed at {report['fps']} fps ({report['fps_per_camera']} per camera) over {report['elapsed_seconds']} s")
+    for stage, stats in sorted(report["stages"].items()):
+        if stats["count"]:
+            print(f"  {stage:<18} n={stats['count']:<6} p50 {stats['p50_ms']:8.1f} ms   p95 {stats['p95_ms']:8.1f} ms   p99 {stats['p99_ms']:8.1f} ms")
+    resources = report["resources"]
+    print(f"  CPU {resources['cpu_percent_avg']}% avg, RSS max {resources.get('rss_mb_max', 'n/a')} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play recorded video through the recognition pipeline with stubbed Azure services.")
+    parser.add_argument("videos", nargs="+", help="One video file per simulated camera")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--duration", type=float, default=600.0, help="Stop after this many seconds")
+    parser.add_argument("--loops", type=int, default=1, help="Play each video this many times")
+    parser.add_argument("--fast", action="store_true", help="Analyse every frame as fast as possible instead of at the video frame rate")
+    parser.add_argument("--offline", action="store_true", help="Use local face detection instead of the stubbed Face API")
+    parser.add_argument("--no-weapons", action="store_true")
+    parser.add_argument("--overlays", action="store_true")
+    parser.add_argument("--gallery", help="Folder of face images (file name = person) to match against")
+    parser.add_argument("--backend", choices=["torch", "onnx"], help="Threat detector backend (default: config)")
+    parser.add_argument("--int8", action="store_true", help="Use the int8 ONNX model")
+    parser.add_argument("--face-ms", type=float, default=150.0, help="Stub Face API latency")
+    parser.add_argument("--blob-ms", type=float, default=80.0, help="Stub Blob Storage latency")
+    parser.add_argument("--table-ms", type=float, default=40.0, help="Stub Table Storage latency")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"Results written to {args.output}")
@@ -1,13 +1,94 @@
 import os
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from azure.storage.blob import BlobServiceClient
 import config_manager
+from image_files import is_image_file
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOCAL_DATA_DIR = os.path.join(BASE_DIR, '..', 'local_data')
 IMAGES_DIR = os.path.join(LOCAL_DATA_DIR, 'images')
 PROFILES_DIR = os.path.join(LOCAL_DATA_DIR, 'profiles')
+ENCODINGS_DIR = os.path.join(LOCAL_DATA_DIR, 'encodings')
+
+SYNC_MANIFEST_FILE = os.path.join(LOCAL_DATA_DIR, 'sync_manifest.json')
+SYNC_MAX_WORKERS = 8
+
+def load_sync_manifest():
+    if not os.path.exists(SYNC_MANIFEST_FILE):
+        return {}
+    try:
+        with open(SYNC_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_sync_manifest(manifest):
+    tmp_path = SYNC_MANIFEST_FILE + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, SYNC_MANIFEST_FILE)
+    except Exception as e:
+        print(f"Could not save sync manifest: {e}", file=sys.stderr)
+
+def download_blob_to_file(container_client, blob_name, local_path):
+    data = container_client.get_blob_client(blob_name).download_blob().readall()
+    tmp_path = local_path + '.part'
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, local_path)
+
+def sync_container(executor, container_client, local_dir, manifest, file_filter=None):
+    remote = {}
+    for blob in container_client.list_blobs():
+        if file_filter and not file_filter(blob.name):
+            continue
+        remote[blob.name] = {
+            "etag": blob.etag,
+            "last_modified": blob.last_modified.isoformat() if blob.last_modified else None
+        }
+
+    to_download = [
+        name for name, meta in remote.items()
+        if manifest.get(name) != meta or not os.path.exists(os.path.join(local_dir, name))
+    ]
+
+    futures = {
+        executor.submit(download_blob_to_file, container_client, name, os.path.join(local_dir, name)): name
+        for name in to_download
+    }
+
+    failed = 0
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            future.result()
+            manifest[name] = remote[name]
+        except Exception as e:
+            failed += 1
+            manifest.pop(name, None)
+            print(f"Failed to download {name}: {e}", file=sys.stderr)
+
+    removed = 0
+    for filename in os.listdir(local_dir):
+        local_path = os.path.join(local_dir, filename)
+        if filename in remote or not os.path.isfile(local_path):
+            continue
+        if file_filter and not file_filter(filename) and not filename.endswith('.part'):
+            continue
+        try:
+            os.remove(local_path)
+            removed += 1
+        except OSError as e:
+            print(f"Could not remove stale file {filename}: {e}", file=sys.stderr)
+
+    for name in list(manifest.keys()):
+        if name not in remote:
+            del manifest[name]
+
+    return len(to_download) - failed, removed, failed
 
 def sync_data_from_azure():
     print("Starting synchronization...", file=sys.stderr)
@@ -15,48 +96,32 @@ def sync_data_from_azure():
     os.makedirs(IMAGES_DIR, exist_ok=True)
     os.makedirs(PROFILES_DIR, exist_ok=True)
 
+    manifest = load_sync_manifest()
+    profiles_manifest = manifest.setdefault("profiles", {})
+    images_manifest = manifest.setdefault("images", {})
+
     try:
         blob_service_client = BlobServiceClient.from_connection_string(
             config_manager.AZURE_STORAGE_CONNECTION_STRING
         )
 
-        container_client = blob_service_client.get_container_client(config_manager.PROFILE_CONTAINER)
-        for blob in container_client.list_blobs():
-            local_path = os.path.join(PROFILES_DIR, blob.name)
-            with open(local_path, "wb") as f:
-                blob_client = container_client.get_blob_client(blob)
-                data = blob_client.download_blob().readall()
-                f.write(data)
-        print("Profiles synced.", file=sys.stderr)
-
-        container_client = blob_service_client.get_container_client(config_manager.IMAGE_CONTAINER)
-        for blob in container_client.list_blobs():
-            if not any(blob.name.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.webp']):
-                continue
-            local_path = os.path.join(IMAGES_DIR, blob.name)
-            with open(local_path, "wb") as f:
-                blob_client = container_client.get_blob_client(blob)
-                data = blob_client.download_blob().readall()
-                f.write(data)
-        print("Images synced.", file=sys.stderr)
-        
-        return True
+        with ThreadPoolExecutor(max_workers=SYNC_MAX_WORKERS) as executor:
+            container_client = blob_service_client.get_container_client(config_manager.PROFILE_CONTAINER)
+            downloaded, removed, profile_failures = sync_container(
+                executor, container_client, PROFILES_DIR, profiles_manifest
+            )
+            print(f"Profiles synced. Downloaded: {downloaded}, Removed: {removed}, Failed: {profile_failures}", file=sys.stderr)
+
+            container_client = blob_service_client.get_container_client(config_manager.IMAGE_CONTAINER)
+            downloaded, removed, image_failures = sync_container(
+                executor, container_client, IMAGES_DIR, images_manifest, file_filter=is_image_file
+            )
+            print(f"Images synced. Downloaded: {downloaded}, Removed: {removed}, Failed: {image_failures}", file=sys.stderr)
+
+        save_sync_manifest(manifest)
+        return profile_failures == 0 and image_failures == 0
 
     except Exception as e:
+        save_sync_manifest(manifest)
         print(f"Sync warning: Could not connect to Azure. Using existing local files. Error: {e}", file=sys.stderr)
         return False
-
-def load_local_profiles():
-    profiles = {}
-    if not os.path.exists(PROFILES_DIR):
-        return profiles
-
-    for filename in os.listdir(PROFILES_DIR):
-        if filename.endswith(".json"):
-            name = os.path.splitext(filename)[0]
-            try:
-                with open(os.path.join(PROFILES_DIR, filename), 'r', encoding='utf-8') as f:
-                    profiles[name] = json.load(f)
-            except Exception:
-                pass
-    return profiles
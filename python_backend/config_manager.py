@@ -7,6 +7,9 @@ try:
 except NameError:
     _CONFIG_PATH = '../config.json'
 
+# Lets tools such as the offline benchmark run against a throwaway config
+_CONFIG_PATH = os.environ.get('VISION_CONFIG_PATH', _CONFIG_PATH)
+
 try:
     _config = config_loader.load_config(_CONFIG_PATH)
 except Exception as e:
@@ -32,3 +35,54 @@ required_keys = [
 
 if not all(required_keys):
     raise ValueError("One or more required keys are missing from config.json.")
+
+GALLERY_INDEX = _config.get('GALLERY_INDEX', 'exact')
+GALLERY_IVF_NLIST = _config.get('GALLERY_IVF_NLIST', 0)
+GALLERY_IVF_NPROBE = _config.get('GALLERY_IVF_NPROBE', 8)
+ENCODING_WORKERS = _config.get('ENCODING_WORKERS', 0)
+
+MOTION_GATE_ENABLED = _config.get('MOTION_GATE_ENABLED', True)
+MOTION_THRESHOLD = _config.get('MOTION_THRESHOLD', 25)
+MOTION_MIN_AREA = _config.get('MOTION_MIN_AREA', 0.002)
+MOTION_HOLD_SECONDS = _config.get('MOTION_HOLD_SECONDS', 2.0)
+MOTION_MAX_SKIP_SECONDS = _config.get('MOTION_MAX_SKIP_SECONDS', 10.0)
+
+WEAPON_PERIOD_SECONDS = _config.get('WEAPON_PERIOD_SECONDS', 0.5)
+FACE_PERIOD_ONLINE_SECONDS = _config.get('FACE_PERIOD_ONLINE_SECONDS', 3.0)
+FACE_PERIOD_OFFLINE_SECONDS = _config.get('FACE_PERIOD_OFFLINE_SECONDS', 0.5)
+WEAPON_CPU_BUDGET = _config.get('WEAPON_CPU_BUDGET', 0.3)
+FACE_CPU_BUDGET = _config.get('FACE_CPU_BUDGET', 0.3)
+
+# "torch" (ultralytics) or "onnx" (ONNX Runtime on CPU, exported from best.pt on first use)
+THREAT_BACKEND = _config.get('THREAT_BACKEND', 'torch')
+THREAT_ONNX_QUANTIZE = _config.get('THREAT_ONNX_QUANTIZE', False)
+THREAT_ONNX_THREADS = _config.get('THREAT_ONNX_THREADS', 0)
+
+# Each camera: {"id": ..., "source": ...} where source is a device index, an rtsp/http(s) URL,
+# a video file or a folder of images. Optional: "width"/"height"/"fps" (devices), "max_width"
+# (downscale anything wider), "realtime" (files; false = every frame, as fast as possible),
+# "loops", "reconnect_backoff"/"reconnect_max_backoff" (streams)
+CAMERAS = _config.get('CAMERAS') or [{"id": "0", "source": 0, "width": 1280, "height": 720}]
+
+# Local Prometheus-text endpoint at http://127.0.0.1:<port>/metrics; 0 disables it
+METRICS_PORT = _config.get('METRICS_PORT', 0)
+
+# Frames buffered for the incident encoder thread (~3 s at 20 fps); "oldest" or "newest" is dropped when full
+RECORDER_QUEUE_FRAMES = _config.get('RECORDER_QUEUE_FRAMES', 60)
+RECORDER_DROP_POLICY = _config.get('RECORDER_DROP_POLICY', 'oldest')
+
+# Incident clips start with the last PREROLL_SECONDS of UI JPEGs, capped at PREROLL_MAX_MB per camera
+PREROLL_SECONDS = _config.get('PREROLL_SECONDS', 5.0)
+PREROLL_MAX_MB = _config.get('PREROLL_MAX_MB', 32)
+
+# Incident clips are queued on disk and uploaded as UPLOAD_BLOCK_SIZE_MB blocks, at most
+# UPLOAD_MAX_CONCURRENCY at a time and UPLOAD_MAX_KBPS overall (0 = unthrottled)
+UPLOAD_BLOCK_SIZE_MB = _config.get('UPLOAD_BLOCK_SIZE_MB', 4)
+UPLOAD_MAX_CONCURRENCY = _config.get('UPLOAD_MAX_CONCURRENCY', 2)
+UPLOAD_MAX_KBPS = _config.get('UPLOAD_MAX_KBPS', 2048)
+
+# Incident clips are cut into segments of this length, each uploaded as soon as it closes
+RECORDER_SEGMENT_SECONDS = _config.get('RECORDER_SEGMENT_SECONDS', 10.0)
+
+# Seconds between checks of local_data/profiles for new or changed profiles; 0 = only after a sync
+PROFILE_WATCH_SECONDS = _config.get('PROFILE_WATCH_SECONDS', 2.0)
@@ -0,0 +1,86 @@
+import sys
+import time
+import random
+import threading
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    # CLOSED: requests flow. OPEN: requests are refused until the backoff expires.
+    # HALF_OPEN: a single probe (owned by whoever called wait_for_probe) decides the next state.
+    def __init__(self, name, failure_threshold=3, base_backoff=2.0, max_backoff=120.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.condition = threading.Condition()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.trip_count = 0
+        self.next_probe_at = 0.0
+        self.last_error = None
+        self.total_successes = 0
+        self.total_failures = 0
+
+    def allow_request(self):
+        # Lock-free read; safe to call every frame
+        return self.state == CLOSED
+
+    def record_success(self):
+        with self.condition:
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                print(f"[{self.name}] circuit closed.", file=sys.stderr)
+                self.state = CLOSED
+                self.trip_count = 0
+                self.condition.notify_all()
+
+    def record_failure(self, error=None):
+        with self.condition:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error) if error is not None else None
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._open()
+
+    def trip(self, error=None):
+        with self.condition:
+            self.last_error = str(error) if error is not None else None
+            if self.state != OPEN:
+                self._open()
+
+    def _open(self):
+        self.trip_count += 1
+        backoff = min(self.max_backoff, self.base_backoff * (2 ** (self.trip_count - 1)))
+        backoff *= random.uniform(0.8, 1.2)
+        self.state = OPEN
+        self.next_probe_at = time.time() + backoff
+        print(f"[{self.name}] circuit open, next probe in {backoff:.1f}s. Last error: {self.last_error}", file=sys.stderr)
+        self.condition.notify_all()
+
+    def wait_for_probe(self):
+        # Blocks until the breaker is open and its backoff has expired, then moves it to HALF_OPEN
+        with self.condition:
+            while True:
+                if self.state == OPEN:
+                    remaining = self.next_probe_at - time.time()
+                    if remaining <= 0:
+                        self.state = HALF_OPEN
+                        return
+                    self.condition.wait(remaining)
+                else:
+                    self.condition.wait()
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "successes": self.total_successes,
+                "failures": self.total_failures,
+                "next_probe_in": max(0.0, self.next_probe_at - time.time()) if self.state == OPEN else 0.0
+            }
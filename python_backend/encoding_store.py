@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import numpy as np
+import cache_manager
+
+ENCODING_DIM = 128
+STORE_VERSION = 1
+
+class EncodingStore:
+    def __init__(self, store_dir=cache_manager.ENCODINGS_DIR):
+        self.store_dir = store_dir
+        self.matrix_path = os.path.join(store_dir, 'encodings.npy')
+        self.index_path = os.path.join(store_dir, 'index.json')
+        self.entries = {}
+        self.matrix = np.empty((0, ENCODING_DIM), dtype=np.float32)
+
+    def load(self):
+        self.entries = {}
+        self.matrix = np.empty((0, ENCODING_DIM), dtype=np.float32)
+
+        if not os.path.exists(self.index_path) or not os.path.exists(self.matrix_path):
+            return
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get("version") != STORE_VERSION:
+                print("Encoding store version changed. Rebuilding.", file=sys.stderr)
+                return
+
+            matrix = np.load(self.matrix_path, mmap_mode='r')
+            if matrix.ndim != 2 or matrix.shape[1] != ENCODING_DIM:
+                raise ValueError(f"unexpected matrix shape {matrix.shape}")
+
+            entries = index.get("entries", {})
+            if any(e["row"] >= len(matrix) for e in entries.values()):
+                raise ValueError("index references rows past the end of the matrix")
+
+            self.matrix = matrix
+            self.entries = entries
+            print(f"Encoding store loaded: {len(self.entries)} entries.", file=sys.stderr)
+        except Exception as e:
+            print(f"Encoding store unreadable, ignoring it: {e}", file=sys.stderr)
+
+    def get(self, filename, stat_result):
+        # Returns (hit, encoding); encoding is None for images known to contain no face
+        entry = self.entries.get(filename)
+        if entry is None:
+            return False, None
+        if entry["mtime_ns"] != stat_result.st_mtime_ns or entry["size"] != stat_result.st_size:
+            return False, None
+
+        row = entry["row"]
+        if row < 0:
+            return True, None
+        # Copy the row out so no view keeps the memory map open
+        return True, np.array(self.matrix[row])
+
+    def save(self, records):
+        # records: list of (filename, stat_result, encoding or None)
+        new_entries = {}
+        rows = []
+        for filename, stat_result, encoding in records:
+            row = -1
+            if encoding is not None:
+                row = len(rows)
+                rows.append(np.asarray(encoding, dtype=np.float32))
+            new_entries[filename] = {
+                "row": row,
+                "mtime_ns": stat_result.st_mtime_ns,
+                "size": stat_result.st_size
+            }
+
+        if rows:
+            matrix = np.vstack(rows)
+        else:
+            matrix = np.empty((0, ENCODING_DIM), dtype=np.float32)
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_matrix_path = self.matrix_path + '.tmp'
+        tmp_index_path = self.index_path + '.tmp'
+
+        try:
+            with open(tmp_matrix_path, 'wb') as f:
+                np.save(f, matrix)
+            with open(tmp_index_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": STORE_VERSION, "entries": new_entries}, f)
+
+            # The old memory map must be released before it can be replaced on Windows
+            self.matrix = matrix
+            os.replace(tmp_matrix_path, self.matrix_path)
+            os.replace(tmp_index_path, self.index_path)
+            self.entries = new_entries
+            print(f"Encoding store saved: {len(new_entries)} entries.", file=sys.stderr)
+        except Exception as e:
+            print(f"Could not save encoding store: {e}", file=sys.stderr)
+            for path in (tmp_matrix_path, tmp_index_path):
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
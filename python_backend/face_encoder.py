@@ -0,0 +1,22 @@
+import cv2
+import face_recognition
+
+MAX_IMAGE_DIM = 500
+
+# Runs inside ProcessPoolExecutor workers, so it must stay importable without side effects
+def encode_face_image(path, max_dim=MAX_IMAGE_DIM):
+    img = cv2.imread(path)
+    if img is None:
+        raise ValueError("could not read image")
+
+    h, w = img.shape[:2]
+    if w > max_dim or h > max_dim:
+        scale = max_dim / max(w, h)
+        img = cv2.resize(img, (0, 0), fx=scale, fy=scale)
+
+    rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img_encodings = face_recognition.face_encodings(rgb_img)
+
+    if len(img_encodings) == 0:
+        return None
+    return img_encodings[0]
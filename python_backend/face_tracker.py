@@ -0,0 +1,181 @@
+import time
+import itertools
+import cv2
+
+def box_iou(a, b):
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    inter_w = min(ax2, bx2) - max(a[0], b[0])
+    inter_h = min(ay2, by2) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+def keeps_identity(track_entry, box, min_iou=0.5, max_scale_change=1.3):
+    # A confident identity only carries over to a box that barely moved and kept its size;
+    # anything else (someone else stepping into the spot) is encoded again
+    if track_entry is None or not track_entry[2]:
+        return False
+    track_box = track_entry[1]
+    if box_iou(box, track_box) < min_iou:
+        return False
+    if min(box[2], box[3], track_box[2], track_box[3]) <= 0:
+        return False
+    width_ratio = box[2] / track_box[2]
+    height_ratio = box[3] / track_box[3]
+    return all(1.0 / max_scale_change <= r <= max_scale_change for r in (width_ratio, height_ratio))
+
+def associate(track_snapshot, boxes, iou_threshold=0.3):
+    # Greedy IoU matching; returns the matched snapshot entry (or None) for every box
+    pairs = []
+    for d, box in enumerate(boxes):
+        for t, (_, track_box, _) in enumerate(track_snapshot):
+            iou = box_iou(box, track_box)
+            if iou >= iou_threshold:
+                pairs.append((iou, d, t))
+    pairs.sort(reverse=True)
+
+    matched = [None] * len(boxes)
+    used_tracks = set()
+    for _, d, t in pairs:
+        if matched[d] is None and t not in used_tracks:
+            matched[d] = track_snapshot[t]
+            used_tracks.add(t)
+    return matched
+
+class FaceTrack:
+    def __init__(self, track_id, box, name, distance):
+        self.track_id = track_id
+        self.box = [float(v) for v in box]
+        self.name = name
+        self.distance = distance
+        self.template = None
+        self.misses = 0
+        self.verified_at = time.time()
+        self.reused_rounds = 0
+
+    def rect_dict(self):
+        l, t, w, h = self.box
+        return {"left": int(l), "top": int(t), "width": int(w), "height": int(h)}
+
+class FaceTracker:
+    def __init__(self, scale=0.25, match_threshold=0.5, iou_threshold=0.3, max_misses=2, confident_distance=0.45,
+                 reverify_rounds=5, reverify_seconds=3.0):
+        self.scale = scale
+        self.match_threshold = match_threshold
+        self.iou_threshold = iou_threshold
+        # Detection rounds a track survives unmatched, so one missed detection does not force a re-encode
+        self.max_misses = max_misses
+        self.confident_distance = confident_distance
+        # A reused identity expires after this many detection rounds or seconds and is re-encoded
+        self.reverify_rounds = reverify_rounds
+        self.reverify_seconds = reverify_seconds
+        self.tracks = []
+        self.track_ids = itertools.count(1)
+
+        self.encoded_faces = 0
+        self.reused_identities = 0
+
+    def is_confident(self, track, now=None):
+        if track.name in (None, "Unknown") or track.distance is None or track.distance > self.confident_distance:
+            return False
+        if track.reused_rounds >= self.reverify_rounds:
+            return False
+        now = time.time() if now is None else now
+        return now - track.verified_at < self.reverify_seconds
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        return [(t.track_id, list(t.box), self.is_confident(t, now)) for t in self.tracks]
+
+    def update_motion(self, frame):
+        if not self.tracks:
+            return
+
+        small = cv2.resize(frame, (0, 0), fx=self.scale, fy=self.scale)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        frame_h, frame_w = gray.shape[:2]
+
+        for track in self.tracks:
+            x, y, w, h = [int(round(v * self.scale)) for v in track.box]
+            if w < 4 or h < 4:
+                continue
+
+            if track.template is not None:
+                # Search a window twice the face size around the previous position
+                sx1, sy1 = max(0, x - w // 2), max(0, y - h // 2)
+                sx2, sy2 = min(frame_w, x + w + w // 2), min(frame_h, y + h + h // 2)
+                window = gray[sy1:sy2, sx1:sx2]
+                th, tw = track.template.shape[:2]
+                if window.shape[0] >= th and window.shape[1] >= tw:
+                    scores = cv2.matchTemplate(window, track.template, cv2.TM_CCOEFF_NORMED)
+                    _, best, _, (bx, by) = cv2.minMaxLoc(scores)
+                    if best >= self.match_threshold:
+                        track.box[0] = (sx1 + bx) / self.scale
+                        track.box[1] = (sy1 + by) / self.scale
+                        x, y = sx1 + bx, sy1 + by
+
+            x, y = max(0, min(x, frame_w - w)), max(0, min(y, frame_h - h))
+            patch = gray[y:y + h, x:x + w]
+            if patch.shape[0] == h and patch.shape[1] == w:
+                track.template = patch.copy()
+
+    def apply_detections(self, detections, now=None):
+        # detections: dicts with "box" [l, t, w, h], "track" (snapshot entry or None), "name", "distance"
+        now = time.time() if now is None else now
+        tracks_by_id = {t.track_id: t for t in self.tracks}
+        seen = set()
+        new_tracks = []
+
+        for det in detections:
+            snapshot_entry = det.get("track")
+            track = tracks_by_id.get(snapshot_entry[0]) if snapshot_entry else None
+
+            if track is None:
+                if det["name"] is None:
+                    continue
+                new_track = FaceTrack(next(self.track_ids), det["box"], det["name"], det["distance"])
+                new_track.verified_at = now
+                new_tracks.append(new_track)
+                self.encoded_faces += 1
+                continue
+
+            # Shift the detection by how far the track has moved since the frame was submitted
+            dx = track.box[0] - snapshot_entry[1][0]
+            dy = track.box[1] - snapshot_entry[1][1]
+            l, t, w, h = det["box"]
+            track.box = [l + dx, t + dy, float(w), float(h)]
+            track.template = None
+            track.misses = 0
+            seen.add(track.track_id)
+
+            if det["name"] is None:
+                track.reused_rounds += 1
+                self.reused_identities += 1
+            else:
+                track.name = det["name"]
+                track.distance = det["distance"]
+                track.verified_at = now
+                track.reused_rounds = 0
+                self.encoded_faces += 1
+
+        survivors = []
+        for track in self.tracks:
+            if track.track_id not in seen:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            survivors.append(track)
+        self.tracks = survivors + new_tracks
+
+    def clear(self):
+        self.tracks = []
+
+    def get_stats(self):
+        return {
+            "tracked_faces": len(self.tracks),
+            "encoded_faces": self.encoded_faces,
+            "reused_identities": self.reused_identities
+        }
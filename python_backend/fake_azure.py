@@ -0,0 +1,178 @@
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import cv2
+
+class FakeLatency:
+    # Sleeps for mean +/- jitter seconds (uniform) to stand in for a network round trip
+    def __init__(self, mean=0.0, jitter=0.0, seed=None):
+        self.mean = mean
+        self.jitter = jitter
+        self.random = random.Random(seed)
+
+    def wait(self):
+        delay = self.mean + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+class FakeCallStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.bytes_in = 0
+
+    def record(self, name, num_bytes=0):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.bytes_in += num_bytes
+
+    def get_stats(self):
+        with self.lock:
+            return {"calls": dict(self.calls), "bytes_in": self.bytes_in}
+
+class FakeFaceOperations:
+    # Face detection with OpenCV's bundled Haar cascade, so the boxes follow the real video
+    def __init__(self, latency, stats):
+        self.latency = latency
+        self.stats = stats
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        self.lock = threading.Lock()
+
+    def detect_with_stream(self, image, return_face_id=False, return_face_attributes=None):
+        data = image.read()
+        self.stats.record("face.detect_with_stream", len(data))
+        self.latency.wait()
+
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if frame is None:
+            return []
+        with self.lock:
+            rects = self.cascade.detectMultiScale(frame, scaleFactor=1.1, minNeighbors=5, minSize=(40, 40))
+        return [
+            SimpleNamespace(face_rectangle=SimpleNamespace(left=int(x), top=int(y), width=int(w), height=int(h)))
+            for x, y, w, h in rects
+        ]
+
+class FakeFaceClient:
+    def __init__(self, latency=None, stats=None):
+        self.stats = stats or FakeCallStats()
+        self.face = FakeFaceOperations(latency or FakeLatency(), self.stats)
+
+class FakeBlobClient:
+    def __init__(self, service, container, blob):
+        self.service = service
+        self.container = container
+        self.blob_name = blob
+        self.url = f"https://fake.blob.core.windows.net/{container}/{blob}"
+
+    def upload_blob(self, data, overwrite=False, **kwargs):
+        payload = data.read() if hasattr(data, "read") else bytes(data)
+        self.service.stats.record("blob.upload_blob", len(payload))
+        self.service.latency.wait()
+        with self.service.lock:
+            self.service.blobs[(self.container, self.blob_name)] = len(payload)
+
+    def stage_block(self, block_id, data, length=None, **kwargs):
+        payload = bytes(data)
+        self.service.stats.record("blob.stage_block", len(payload))
+        self.service.latency.wait()
+        with self.service.lock:
+            self.service.staged.setdefault((self.container, self.blob_name), {})[block_id] = len(payload)
+
+    def get_block_list(self, block_list_type="committed", **kwargs):
+        self.service.stats.record("blob.get_block_list")
+        self.service.latency.wait()
+        with self.service.lock:
+            staged = self.service.staged.get((self.container, self.blob_name), {})
+            return [], [SimpleNamespace(id=block_id, size=size) for block_id, size in staged.items()]
+
+    def commit_block_list(self, block_list, **kwargs):
+        self.service.stats.record("blob.commit_block_list")
+        self.service.latency.wait()
+        with self.service.lock:
+            staged = self.service.staged.pop((self.container, self.blob_name), {})
+            self.service.blobs[(self.container, self.blob_name)] = sum(staged.get(b.id, 0) for b in block_list)
+
+    def download_blob(self, **kwargs):
+        self.service.stats.record("blob.download_blob")
+        self.service.latency.wait()
+        raise FileNotFoundError(f"{self.container}/{self.blob_name}")
+
+    def delete_blob(self, **kwargs):
+        self.service.stats.record("blob.delete_blob")
+        self.service.latency.wait()
+        with self.service.lock:
+            self.service.blobs.pop((self.container, self.blob_name), None)
+
+class FakeContainerClient:
+    def __init__(self, service, container):
+        self.service = service
+        self.container = container
+
+    def list_blobs(self, **kwargs):
+        self.service.stats.record("blob.list_blobs")
+        self.service.latency.wait()
+        return []
+
+    def get_blob_client(self, blob):
+        return FakeBlobClient(self.service, self.container, blob)
+
+class FakeBlobServiceClient:
+    # Shared in-memory store so every from_connection_string() call sees the same blobs
+    latency = FakeLatency()
+    stats = FakeCallStats()
+    lock = threading.Lock()
+    blobs = {}
+    staged = {}
+
+    @classmethod
+    def from_connection_string(cls, conn_str, **kwargs):
+        return cls()
+
+    def get_account_information(self, **kwargs):
+        self.stats.record("blob.get_account_information")
+        self.latency.wait()
+        return {}
+
+    def get_blob_client(self, container, blob):
+        return FakeBlobClient(self, container, blob)
+
+    def get_container_client(self, container):
+        return FakeContainerClient(self, container)
+
+class FakeTableClient:
+    latency = FakeLatency()
+    stats = FakeCallStats()
+    lock = threading.Lock()
+    entities = {}
+
+    def __init__(self, table_name="Incidents"):
+        self.table_name = table_name
+
+    @classmethod
+    def from_connection_string(cls, conn_str=None, table_name="Incidents", **kwargs):
+        return cls(table_name)
+
+    def create_entity(self, entity, **kwargs):
+        self.stats.record("table.create_entity")
+        self.latency.wait()
+        with self.lock:
+            self.entities[(self.table_name, entity["PartitionKey"], entity["RowKey"])] = dict(entity)
+
+    def upsert_entity(self, entity, **kwargs):
+        self.create_entity(entity)
+
+    def list_entities(self, **kwargs):
+        self.stats.record("table.list_entities")
+        self.latency.wait()
+        with self.lock:
+            return [dict(e) for (table, _, _), e in self.entities.items() if table == self.table_name]
+
+def configure_latency(face_ms=0.0, blob_ms=0.0, table_ms=0.0, jitter=0.25, seed=0):
+    # jitter is relative to each mean; returns the FakeFaceClient to install
+    FakeBlobServiceClient.latency = FakeLatency(blob_ms / 1000.0, blob_ms / 1000.0 * jitter, seed)
+    FakeTableClient.latency = FakeLatency(table_ms / 1000.0, table_ms / 1000.0 * jitter, seed)
+    return FakeFaceClient(FakeLatency(face_ms / 1000.0, face_ms / 1000.0 * jitter, seed))
@@ -0,0 +1,93 @@
+import sys
+import time
+import threading
+from collections import deque
+
+import metrics
+
+class FrameGrabber:
+    # Live sources: keep only the newest frames and count what gets dropped.
+    # Recorded sources (cap.live is False): block the reader instead, so every frame is analysed.
+    def __init__(self, cap, buffer_size=2, stale_after=0.25):
+        self.cap = cap
+        self.lossless = not getattr(cap, "live", True)
+        self.stale_after = stale_after
+        self.buffer = deque(maxlen=buffer_size)
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        self.frame_seq = 0
+        self.captured_frames = 0
+        self.dropped_frames = 0
+        self.stale_frames = 0
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _capture_loop(self):
+        capture_histogram = metrics.REGISTRY.histogram("capture")
+        while self.running:
+            read_started = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+
+            capture_histogram.observe(time.perf_counter() - read_started)
+            captured_at = time.time()
+            with self.condition:
+                while self.lossless and self.running and len(self.buffer) == self.buffer.maxlen:
+                    self.condition.wait(0.1)
+                self.frame_seq += 1
+                self.captured_frames += 1
+                if len(self.buffer) == self.buffer.maxlen:
+                    # deque(maxlen) evicts the oldest entry on append
+                    self.dropped_frames += 1
+                self.buffer.append((self.frame_seq, captured_at, frame))
+                self.condition.notify_all()
+
+        print("Capture thread stopped.", file=sys.stderr)
+
+    def read(self, timeout=1.0):
+        with self.condition:
+            if not self.buffer:
+                self.condition.wait(timeout)
+            if not self.buffer:
+                return False, None, 0.0
+
+            if self.lossless:
+                _, captured_at, frame = self.buffer.popleft()
+                self.condition.notify_all()
+                return True, frame, captured_at
+
+            _, captured_at, frame = self.buffer.pop()
+            # Everything still queued behind the newest frame is never analysed
+            self.dropped_frames += len(self.buffer)
+            self.buffer.clear()
+
+            if time.time() - captured_at > self.stale_after:
+                self.stale_frames += 1
+
+        return True, frame, captured_at
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "captured_frames": self.captured_frames,
+                "dropped_frames": self.dropped_frames,
+                "stale_frames": self.stale_frames
+            }
@@ -0,0 +1,279 @@
+import sys
+import os
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+
+from image_files import is_image_file
+
+STREAM_PREFIXES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://")
+DEFAULT_RESOLUTIONS = [(1280, 720), (960, 540), (640, 480)]
+
+class FrameSource(ABC):
+    # Minimal cv2.VideoCapture-compatible surface (read/get/isOpened/release) so FrameGrabber
+    # and CameraPipeline never care where frames come from. `live` sources drop frames
+    # when the pipeline falls behind; recorded ones are read losslessly.
+    live = True
+
+    def __init__(self, name, max_width=None):
+        self.name = name
+        self.max_width = max_width
+        self.width = 0
+        self.height = 0
+        self.fps = 0.0
+        self.frames_read = 0
+        self.finished = False
+        self.closed = threading.Event()
+
+    def isOpened(self):
+        return not self.closed.is_set() and not self.finished
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.output_size()[0]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.output_size()[1]
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def output_size(self):
+        if self.max_width and self.width > self.max_width:
+            return self.max_width, int(self.height * self.max_width / self.width)
+        return self.width, self.height
+
+    def fit(self, frame):
+        # Oversized sources (e.g. 4K IP cameras) are scaled down once, here, for every stage
+        h, w = frame.shape[:2]
+        self.width, self.height = w, h
+        if self.max_width and w > self.max_width:
+            return cv2.resize(frame, self.output_size(), interpolation=cv2.INTER_AREA)
+        return frame
+
+    def read(self):
+        if not self.isOpened():
+            return False, None
+        ret, frame = self._read()
+        if not ret:
+            return False, None
+        self.frames_read += 1
+        return True, self.fit(frame)
+
+    @abstractmethod
+    def _read(self):
+        pass
+
+    def release(self):
+        self.closed.set()
+
+    def get_stats(self):
+        width, height = self.output_size()
+        return {"source": self.name, "frames_read": self.frames_read, "width": width, "height": height, "finished": self.finished}
+
+class Pacer:
+    # Releases frames at a fixed rate; falls back to "now" after a stall instead of bursting
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps and fps > 0 else 0.0
+        self.next_time = None
+
+    def wait(self, closed):
+        if not self.interval:
+            return
+        now = time.time()
+        if self.next_time is None or now - self.next_time > self.interval:
+            self.next_time = now
+        elif now < self.next_time:
+            closed.wait(self.next_time - now)
+        self.next_time += self.interval
+
+class DeviceSource(FrameSource):
+    def __init__(self, index, width=1280, height=720, fps=None, resolutions=None, max_width=None):
+        super().__init__(f"device:{index}", max_width)
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        if self.cap.isOpened():
+            self.negotiate([(width, height)] + [r for r in (resolutions or DEFAULT_RESOLUTIONS) if r != (width, height)])
+
+    def negotiate(self, candidates):
+        # Drivers silently clamp unsupported sizes, so ask, read back, and move down the list
+        for width, height in candidates:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            if (self.width, self.height) == (width, height):
+                break
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        if (self.width, self.height) != candidates[0]:
+            print(f"{self.name}: requested {candidates[0][0]}x{candidates[0][1]}, negotiated {self.width}x{self.height}.", file=sys.stderr)
+
+    def isOpened(self):
+        return super().isOpened() and self.cap.isOpened()
+
+    def _read(self):
+        return self.cap.read()
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=True, loops=1, max_width=None):
+        super().__init__(f"file:{os.path.basename(path)}", max_width)
+        self.live = realtime
+        self.loops_left = loops
+        self.cap = cv2.VideoCapture(path)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.pacer = Pacer(self.fps if realtime else None)
+
+    def isOpened(self):
+        return super().isOpened() and self.cap.isOpened()
+
+    def _read(self):
+        self.pacer.wait(self.closed)
+        ret, frame = self.cap.read()
+        if not ret:
+            self.loops_left -= 1
+            if self.loops_left <= 0:
+                self.finished = True
+                return False, None
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path, fps=None, loops=1, max_width=None):
+        super().__init__(f"images:{os.path.basename(os.path.normpath(path))}", max_width)
+        self.live = bool(fps)
+        self.files = sorted(os.path.join(path, f) for f in os.listdir(path) if is_image_file(f))
+        self.loops_left = loops
+        self.position = 0
+        self.fps = fps or 0.0
+        self.pacer = Pacer(fps)
+        if not self.files:
+            self.finished = True
+
+    def _read(self):
+        while not self.closed.is_set():
+            if self.position >= len(self.files):
+                self.loops_left -= 1
+                if self.loops_left <= 0:
+                    self.finished = True
+                    return False, None
+                self.position = 0
+
+            path = self.files[self.position]
+            self.position += 1
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"{self.name}: skipping unreadable image {os.path.basename(path)}", file=sys.stderr)
+                continue
+            self.pacer.wait(self.closed)
+            return True, frame
+        return False, None
+
+class StreamSource(FrameSource):
+    # Network camera. A failed open or read drops the connection and retries with
+    # exponential backoff; release() interrupts any wait immediately.
+    def __init__(self, url, base_backoff=1.0, max_backoff=30.0, max_width=None):
+        super().__init__(f"stream:{url.split('@')[-1]}", max_width)
+        self.url = url
+        self.cap = None
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        self.reconnects = 0
+        self.connect()
+
+    def schedule_retry(self, reason):
+        self.failures += 1
+        backoff = min(self.max_backoff, self.base_backoff * (2 ** (self.failures - 1))) * random.uniform(0.8, 1.2)
+        self.next_attempt_at = time.time() + backoff
+        print(f"{self.name}: {reason}, retrying in {backoff:.1f}s.", file=sys.stderr)
+
+    def connect(self):
+        cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not cap.isOpened():
+            cap.release()
+            self.schedule_retry("open failed")
+            return False
+        self.cap = cap
+        self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.failures = 0
+        print(f"{self.name}: connected at {self.width}x{self.height}.", file=sys.stderr)
+        return True
+
+    def isOpened(self):
+        # A stream that is reconnecting is still "open" from the pipeline's point of view
+        return not self.closed.is_set()
+
+    def _read(self):
+        while not self.closed.is_set():
+            if self.cap is None:
+                remaining = self.next_attempt_at - time.time()
+                if remaining > 0 and self.closed.wait(remaining):
+                    break
+                self.reconnects += 1
+                if not self.connect():
+                    continue
+
+            ret, frame = self.cap.read()
+            if ret:
+                return True, frame
+
+            self.cap.release()
+            self.cap = None
+            self.schedule_retry("read failed")
+        return False, None
+
+    def release(self):
+        super().release()
+        if self.cap is not None:
+            self.cap.release()
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats["connected"] = self.cap is not None
+        stats["reconnects"] = self.reconnects
+        return stats
+
+def open_frame_source(camera_config):
+    source = camera_config.get("source", 0)
+    max_width = camera_config.get("max_width")
+
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return DeviceSource(
+            int(source),
+            width=camera_config.get("width", 1280),
+            height=camera_config.get("height", 720),
+            fps=camera_config.get("fps"),
+            max_width=max_width
+        )
+    if source.lower().startswith(STREAM_PREFIXES):
+        return StreamSource(
+            source,
+            base_backoff=camera_config.get("reconnect_backoff", 1.0),
+            max_backoff=camera_config.get("reconnect_max_backoff", 30.0),
+            max_width=max_width
+        )
+    if os.path.isdir(source):
+        return ImageDirectorySource(source, fps=camera_config.get("fps"), loops=camera_config.get("loops", 1), max_width=max_width)
+    return VideoFileSource(source, realtime=camera_config.get("realtime", True), loops=camera_config.get("loops", 1), max_width=max_width)
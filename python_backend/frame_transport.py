@@ -0,0 +1,99 @@
+import sys
+import json
+import time
+import base64
+import socket
+import struct
+import threading
+
+FRAME_HEADER = struct.Struct("<HI")
+RECONNECT_INTERVAL = 1.0
+OUTPUT_LOCK = threading.Lock()
+
+def emit_packet(data_packet):
+    line = json.dumps(data_packet)
+    with OUTPUT_LOCK:
+        print(line)
+        sys.stdout.flush()
+
+class JsonFrameSink:
+    # Legacy transport: JPEG is base64-encoded into the JSON status line
+    def send(self, data_packet, jpeg_buffer):
+        data_packet["frame"] = base64.b64encode(jpeg_buffer).decode('utf-8')
+        emit_packet(data_packet)
+
+    def send_status(self, data_packet):
+        data_packet["frame"] = None
+        emit_packet(data_packet)
+
+    def close(self):
+        pass
+
+class SocketFrameSink:
+    # Binary transport: [uint16 camera index][uint32 length][JPEG bytes], little-endian, over a
+    # local TCP socket, while the status packet keeps going to stdout without the frame
+    def __init__(self, port, host="127.0.0.1"):
+        self.address = (host, port)
+        self.sock = None
+        self.last_connect_attempt = 0.0
+        self.fallback = JsonFrameSink()
+        self.lock = threading.Lock()
+        self.connect()
+
+    def connect(self):
+        self.last_connect_attempt = time.time()
+        try:
+            sock = socket.create_connection(self.address, timeout=2)
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock = sock
+            print(f"Frame socket connected on port {self.address[1]}.", file=sys.stderr)
+        except OSError as e:
+            self.sock = None
+            print(f"Frame socket unavailable ({e}). Falling back to JSON frames.", file=sys.stderr)
+
+    def send(self, data_packet, jpeg_buffer):
+        with self.lock:
+            if self.sock is None and time.time() - self.last_connect_attempt > RECONNECT_INTERVAL:
+                self.connect()
+
+            sent = False
+            if self.sock is not None:
+                try:
+                    self.sock.sendall(FRAME_HEADER.pack(data_packet.get("camera_index", 0), len(jpeg_buffer)))
+                    self.sock.sendall(jpeg_buffer)
+                    sent = True
+                except OSError as e:
+                    print(f"Frame socket error: {e}", file=sys.stderr)
+                    self._close()
+
+        if not sent:
+            self.fallback.send(data_packet, jpeg_buffer)
+            return
+
+        data_packet["frame"] = None
+        emit_packet(data_packet)
+
+    def send_status(self, data_packet):
+        self.fallback.send_status(data_packet)
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+def create_frame_sink(argv):
+    if "--frame-port" in argv:
+        try:
+            port = int(argv[argv.index("--frame-port") + 1])
+            return SocketFrameSink(port)
+        except (IndexError, ValueError):
+            print("Invalid --frame-port argument. Using JSON frames.", file=sys.stderr)
+    return JsonFrameSink()
@@ -0,0 +1,251 @@
+import sys
+import time
+import numpy as np
+
+ENCODING_DIM = 128
+ASSIGN_CHUNK_ROWS = 8192
+
+def squared_norms(matrix):
+    return np.einsum('ij,ij->i', matrix, matrix)
+
+def pairwise_distances(queries, vectors, vector_sq_norms):
+    # ||q - v||^2 = ||q||^2 + ||v||^2 - 2 q.v
+    sq_dists = squared_norms(queries)[:, None] + vector_sq_norms[None, :] - 2.0 * (queries @ vectors.T)
+    return np.sqrt(np.maximum(sq_dists, 0.0))
+
+def top_k_rows(distances, k):
+    k = min(k, distances.shape[1])
+    if k == 0:
+        return np.empty((len(distances), 0), dtype=np.int64)
+    if k < distances.shape[1]:
+        rows = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        rows = np.tile(np.arange(distances.shape[1]), (len(distances), 1))
+    order = np.argsort(np.take_along_axis(distances, rows, axis=1), axis=1)
+    return np.take_along_axis(rows, order, axis=1)
+
+def as_matrix(vectors, dim=ENCODING_DIM):
+    if len(vectors) == 0:
+        return np.empty((0, dim), dtype=np.float32)
+    return np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+
+class BruteForceIndex:
+    is_exact = True
+
+    def __init__(self, dim=ENCODING_DIM):
+        self.dim = dim
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.sq_norms = np.empty((0,), dtype=np.float32)
+        self.labels = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def build(self, vectors, labels):
+        self.vectors = as_matrix(vectors, self.dim)
+        self.sq_norms = squared_norms(self.vectors)
+        self.labels = list(labels)
+        self._on_rows_changed()
+
+    def add(self, vectors, labels):
+        new_vectors = as_matrix(vectors, self.dim)
+        if len(new_vectors) == 0:
+            return
+        self.vectors = np.vstack([self.vectors, new_vectors])
+        self.sq_norms = np.concatenate([self.sq_norms, squared_norms(new_vectors)])
+        self.labels.extend(labels)
+        self._on_rows_added(new_vectors)
+
+    def remove(self, labels):
+        to_remove = set(labels)
+        keep = np.array([label not in to_remove for label in self.labels], dtype=bool)
+        if keep.all():
+            return 0
+        removed = int((~keep).sum())
+        self.vectors = self.vectors[keep]
+        self.sq_norms = self.sq_norms[keep]
+        self.labels = [label for label, k in zip(self.labels, keep) if k]
+        self._on_rows_removed(keep)
+        return removed
+
+    def _on_rows_changed(self):
+        pass
+
+    def _on_rows_added(self, new_vectors):
+        pass
+
+    def _on_rows_removed(self, keep_mask):
+        pass
+
+    def search_rows(self, queries, k=1):
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if len(queries) == 0 or len(self.vectors) == 0:
+            empty = np.empty((len(queries), 0))
+            return empty, empty.astype(np.int64)
+
+        distances = pairwise_distances(queries, self.vectors, self.sq_norms)
+        rows = top_k_rows(distances, k)
+        return np.take_along_axis(distances, rows, axis=1), rows
+
+    def search(self, queries, k=1):
+        distances, rows = self.search_rows(queries, k)
+        return [
+            [(self.labels[r], float(d)) for d, r in zip(dist_row, row_ids) if r >= 0]
+            for dist_row, row_ids in zip(distances, rows)
+        ]
+
+class IVFIndex(BruteForceIndex):
+    # Inverted-file index: k-means partitions the gallery, queries scan only the nprobe closest partitions
+    is_exact = False
+
+    def __init__(self, dim=ENCODING_DIM, nlist=0, nprobe=8, min_train_size=1024, kmeans_iters=10, seed=0):
+        super().__init__(dim)
+        self.requested_nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+
+        self.centroids = None
+        self.trained_size = 0
+        self.assignments = np.empty((0,), dtype=np.int64)
+        self.list_order = np.empty((0,), dtype=np.int64)
+        self.list_bounds = np.zeros((1,), dtype=np.int64)
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def _assign(self, vectors):
+        centroid_norms = squared_norms(self.centroids)
+        assignments = np.empty((len(vectors),), dtype=np.int64)
+        for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+            chunk = vectors[start:start + ASSIGN_CHUNK_ROWS]
+            scores = centroid_norms[None, :] - 2.0 * (chunk @ self.centroids.T)
+            assignments[start:start + ASSIGN_CHUNK_ROWS] = np.argmin(scores, axis=1)
+        return assignments
+
+    def train(self):
+        n = len(self.vectors)
+        if n < self.min_train_size:
+            self.centroids = None
+            return
+
+        nlist = self.requested_nlist or int(np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        rng = np.random.default_rng(self.seed)
+
+        started = time.time()
+        sample_size = min(n, nlist * 256)
+        sample = self.vectors[rng.choice(n, size=sample_size, replace=False)]
+        self.centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iters):
+            labels = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist).astype(np.float32)
+            filled = counts > 0
+            self.centroids[filled] = sums[filled] / counts[filled, None]
+            # Re-seed empty partitions from random sample points
+            empty = np.flatnonzero(~filled)
+            if len(empty):
+                self.centroids[empty] = sample[rng.choice(sample_size, size=len(empty), replace=False)]
+
+        self.trained_size = n
+        print(f"IVF index trained: {nlist} lists over {n} encodings in {time.time() - started:.2f}s", file=sys.stderr)
+
+    def _rebuild_lists(self):
+        if not self.is_trained:
+            return
+        self.list_order = np.argsort(self.assignments, kind='stable')
+        self.list_bounds = np.searchsorted(self.assignments[self.list_order], np.arange(len(self.centroids) + 1))
+
+    def _on_rows_changed(self):
+        n = len(self.vectors)
+        # Keep existing partitions across reloads unless the gallery size moved a lot
+        if not self.is_trained or n > 2 * self.trained_size or n < self.trained_size // 2:
+            self.train()
+        if self.is_trained:
+            self.assignments = self._assign(self.vectors)
+            self._rebuild_lists()
+
+    def _on_rows_added(self, new_vectors):
+        if not self.is_trained or len(self.vectors) > 2 * self.trained_size:
+            self._on_rows_changed()
+            return
+        self.assignments = np.concatenate([self.assignments, self._assign(new_vectors)])
+        self._rebuild_lists()
+
+    def _on_rows_removed(self, keep_mask):
+        if not self.is_trained:
+            return
+        self.assignments = self.assignments[keep_mask]
+        self._rebuild_lists()
+
+    def search_rows(self, queries, k=1):
+        if not self.is_trained:
+            return super().search_rows(queries, k)
+
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        nprobe = max(1, min(self.nprobe, len(self.centroids)))
+
+        coarse = pairwise_distances(queries, self.centroids, squared_norms(self.centroids))
+        probe_lists = top_k_rows(coarse, nprobe)
+
+        out_distances = np.full((len(queries), k), np.inf)
+        out_rows = np.full((len(queries), k), -1, dtype=np.int64)
+
+        for q, lists in enumerate(probe_lists):
+            candidates = np.concatenate([self.list_order[self.list_bounds[c]:self.list_bounds[c + 1]] for c in lists])
+            if len(candidates) == 0:
+                continue
+            distances = pairwise_distances(queries[q:q + 1], self.vectors[candidates], self.sq_norms[candidates])
+            best = top_k_rows(distances, k)[0]
+            out_distances[q, :len(best)] = distances[0, best]
+            out_rows[q, :len(best)] = candidates[best]
+
+        return out_distances, out_rows
+
+def create_gallery_index(kind="exact", nlist=0, nprobe=8):
+    if kind == "ivf":
+        return IVFIndex(nlist=nlist, nprobe=nprobe)
+    if kind != "exact":
+        print(f"Unknown gallery index '{kind}', using exact search.", file=sys.stderr)
+    return BruteForceIndex()
+
+def estimate_recall(index, k=1, sample_size=200, noise=0.025, seed=0):
+    # Perturbed gallery vectors stand in for live probes of enrolled people
+    if len(index) == 0:
+        return 1.0, 0.0, 0.0
+
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(index), size=min(sample_size, len(index)), replace=False)
+    queries = index.vectors[picks] + rng.normal(0.0, noise, size=(len(picks), index.dim)).astype(np.float32)
+
+    started = time.time()
+    exact_rows = BruteForceIndex.search_rows(index, queries, k)[1]
+    exact_time = time.time() - started
+
+    started = time.time()
+    approx_rows = index.search_rows(queries, k)[1]
+    approx_time = time.time() - started
+
+    hits = sum(len(set(e.tolist()) & set(a.tolist())) for e, a in zip(exact_rows, approx_rows))
+    recall = hits / float(exact_rows.size) if exact_rows.size else 1.0
+    return recall, exact_time / len(picks), approx_time / len(picks)
+
+if __name__ == "__main__":
+    from encoding_store import EncodingStore
+
+    store = EncodingStore()
+    store.load()
+    vectors = np.asarray(store.matrix, dtype=np.float32)
+    print(f"Gallery size: {len(vectors)}")
+
+    index = IVFIndex()
+    index.build(vectors, list(range(len(vectors))))
+    for nprobe in [1, 2, 4, 8, 16, 32]:
+        index.nprobe = nprobe
+        recall, exact_ms, approx_ms = estimate_recall(index)
+        print(f"nprobe={nprobe:3d}  recall@1={recall:.3f}  exact={exact_ms * 1000:.3f} ms/query  ivf={approx_ms * 1000:.3f} ms/query")
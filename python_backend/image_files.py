@@ -0,0 +1,5 @@
+# Kept free of SDK imports so frame sources can list image folders without Azure installed
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp']
+
+def is_image_file(filename):
+    return any(filename.lower().endswith(ext) for ext in IMAGE_EXTENSIONS)
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+
+import cache_manager
+
+INCIDENT_INDEX_FILE = os.path.join(cache_manager.LOCAL_DATA_DIR, 'incidents_index.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    row_key TEXT PRIMARY KEY,
+    incident_id TEXT NOT NULL,
+    segment INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'New',
+    camera_id TEXT NOT NULL DEFAULT '',
+    started_at TEXT NOT NULL,
+    video_url TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS segments_incident ON segments (incident_id, segment);
+CREATE INDEX IF NOT EXISTS segments_started ON segments (started_at);
+CREATE INDEX IF NOT EXISTS segments_status ON segments (status, started_at);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+class IncidentIndex:
+    # Local mirror of the Incidents table (one row per segment), so the first page of the
+    # incident list comes from disk instantly and still works offline.
+    def __init__(self, path=INCIDENT_INDEX_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def upsert(self, rows):
+        # rows: dicts with row_key, incident_id, segment, status, camera_id, started_at, video_url
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO segments (row_key, incident_id, segment, status, camera_id, started_at, video_url) "
+                "VALUES (:row_key, :incident_id, :segment, :status, :camera_id, :started_at, :video_url)",
+                rows
+            )
+
+    def prune(self, keep_row_keys):
+        with self.lock, self.db:
+            existing = {row[0] for row in self.db.execute("SELECT row_key FROM segments")}
+            stale = [(key,) for key in existing - set(keep_row_keys)]
+            self.db.executemany("DELETE FROM segments WHERE row_key = ?", stale)
+            return len(stale)
+
+    def set_status(self, incident_id, status):
+        with self.lock, self.db:
+            self.db.execute("UPDATE segments SET status = ? WHERE incident_id = ?", (status, incident_id))
+
+    def delete_incident(self, incident_id):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM segments WHERE incident_id = ?", (incident_id,))
+
+    def get_state(self, key, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def query(self, status=None, since=None, until=None, limit=50, offset=0):
+        # Newest incidents first; filters use the started_at/status indexes
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if since:
+            conditions.append("started_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("started_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.lock:
+            incidents = self.db.execute(
+                f"SELECT incident_id, MIN(started_at) AS started_at, MIN(status) AS status, COUNT(*) "
+                f"FROM segments {where} GROUP BY incident_id ORDER BY started_at DESC LIMIT ? OFFSET ?",
+                params + [limit + 1, offset]
+            ).fetchall()
+
+            has_more = len(incidents) > limit
+            incidents = incidents[:limit]
+            segments = {}
+            if incidents:
+                ids = [row[0] for row in incidents]
+                placeholders = ",".join("?" * len(ids))
+                for incident_id, row_key, video_url in self.db.execute(
+                    f"SELECT incident_id, row_key, video_url FROM segments WHERE incident_id IN ({placeholders}) ORDER BY segment, row_key",
+                    ids
+                ):
+                    segments.setdefault(incident_id, []).append((row_key, video_url))
+
+        page = [
+            {"id": incident_id, "timestamp": started_at, "status": status, "segments": segments.get(incident_id, [])}
+            for incident_id, started_at, status, _ in incidents
+        ]
+        return page, has_more
+
+    def close(self):
+        self.db.close()
@@ -1,10 +1,17 @@
 import sys
 import json
+import argparse
 import datetime
 import os
-from azure.data.tables import TableClient
-from azure.storage.blob import generate_blob_sas, BlobSasPermissions, BlobServiceClient
+from azure.storage.blob import generate_blob_sas, BlobSasPermissions
 import config_manager
+import azure_clients
+from incident_index import IncidentIndex
+
+INDEX_COLUMNS = ["RowKey", "IncidentId", "Segment", "Status", "CameraId", "VideoUrl"]
+INDEX_SYNC_PAGE_SIZE = 500
+INDEX_SYNC_MARGIN_SECONDS = 300
+INDEX_BACKFILL_WINDOW_DAYS = 1
 
 def extract_account_credentials(connection_string):
     try:
@@ -23,93 +30,284 @@ def extract_account_credentials(connection_string):
 def extract_timestamp_from_filename(filename):
     try:
         name_without_ext = os.path.splitext(filename)[0]
-        date_part = name_without_ext.replace("incident_", "")
+        # incident_YYYYmmdd_HHMMSS[_<camera id>]
+        date_part = name_without_ext.replace("incident_", "", 1)[:15]
         dt = datetime.datetime.strptime(date_part, "%Y%m%d_%H%M%S")
         return dt.isoformat()
     except Exception:
         return None
 
-def list_incidents():
+def incident_id_of(entity):
+    # Segmented recordings share an IncidentId; older single-file rows are their own incident
+    return entity.get('IncidentId') or entity['RowKey']
+
+def build_sas_url(account_name, account_key, blob_name, fallback_url=""):
+    if not (account_name and account_key):
+        return fallback_url
     try:
-        table_client = TableClient.from_connection_string(
-            config_manager.AZURE_STORAGE_CONNECTION_STRING, 
-            table_name="Incidents"
+        sas_token = generate_blob_sas(
+            account_name=account_name,
+            container_name=config_manager.INCIDENT_CONTAINER,
+            blob_name=blob_name,
+            account_key=account_key,
+            permission=BlobSasPermissions(read=True),
+            expiry=datetime.datetime.utcnow() + datetime.timedelta(hours=1)
         )
+        base_url = f"https://{account_name}.blob.core.windows.net/{config_manager.INCIDENT_CONTAINER}/{blob_name}"
+        return f"{base_url}?{sas_token}"
+    except Exception:
+        return fallback_url
+
+def get_incident_rows(table_client, incident_id):
+    # Segment row keys start with the incident id, so this is a row key range read inside the
+    # partition; IncidentId then drops other incidents whose id merely shares the prefix
+    rows = list(table_client.query_entities(
+        "PartitionKey eq 'incidents' and RowKey ge @start and RowKey lt @end and IncidentId eq @id",
+        parameters={"start": incident_id, "end": incident_id + "~", "id": incident_id}
+    ))
+    if not rows:
+        try:
+            rows = [table_client.get_entity(partition_key="incidents", row_key=incident_id)]
+        except Exception:
+            rows = []
+    return rows
+
+def get_table_client():
+    return azure_clients.get_table_client("Incidents")
+
+def row_key_for_time(value):
+    # Row keys start with incident_YYYYmmdd_HHMMSS, so a time bound is a row key bound
+    return "incident_" + value.strftime("%Y%m%d_%H%M%S")
+
+def fetch_incident_page(table_client, start=None, end=None, modified_since=None, page_size=INDEX_SYNC_PAGE_SIZE, continuation=None):
+    # One server-side filtered page of segment rows, in row key (= time) order.
+    # Returns (entities, continuation) where continuation is None on the last page.
+    conditions = ["PartitionKey eq 'incidents'"]
+    parameters = {}
+    if start:
+        conditions.append("RowKey ge @start")
+        parameters["start"] = row_key_for_time(start)
+    if end:
+        conditions.append("RowKey lt @end")
+        parameters["end"] = row_key_for_time(end)
+    if modified_since:
+        conditions.append("Timestamp ge @modified")
+        parameters["modified"] = modified_since
+
+    pages = table_client.query_entities(
+        " and ".join(conditions),
+        parameters=parameters,
+        results_per_page=page_size,
+        select=INDEX_COLUMNS
+    ).by_page(continuation_token=continuation)
+    entities = list(next(pages, []))
+    return entities, pages.continuation_token
+
+def index_row_of(entity):
+    incident_id = incident_id_of(entity)
+    started_at = extract_timestamp_from_filename(incident_id)
+    if not started_at:
+        modified = getattr(entity, "metadata", {}).get("timestamp")
+        started_at = (modified or datetime.datetime.utcnow()).isoformat()
+    return {
+        "row_key": entity["RowKey"],
+        "incident_id": incident_id,
+        "segment": entity.get("Segment", 0) or 0,
+        "status": entity.get("Status", "New"),
+        "camera_id": str(entity.get("CameraId", "") or ""),
+        "started_at": started_at,
+        "video_url": entity.get("VideoUrl", "")
+    }
+
+def fetch_incident_rows(index, table_client, **filters):
+    # Follows the continuation token through every page matching filters into the index
+    seen = []
+    continuation = None
+    while True:
+        entities, continuation = fetch_incident_page(table_client, continuation=continuation, **filters)
+        rows = [index_row_of(e) for e in entities]
+        index.upsert(rows)
+        seen.extend(row["row_key"] for row in rows)
+        if not continuation:
+            return seen
+
+def sync_index(index, table_client, full=False):
+    # Incremental by default: only rows the service modified since the last sync (minus a
+    # margin for clock skew), which also picks up status changes made on other machines.
+    # A full sync re-reads the key columns of every row and drops rows deleted elsewhere.
+    # A fresh index is not read in full here; backfill_index fills it a window at a time.
+    sync_started = datetime.datetime.now(datetime.timezone.utc)
+    last_sync = None if full else index.get_state("last_sync")
+    if not full and not last_sync:
+        index.set_state("last_sync", sync_started.isoformat())
+        index.set_state("backfilled_to", (datetime.datetime.now() + datetime.timedelta(seconds=INDEX_SYNC_MARGIN_SECONDS)).isoformat(timespec="seconds"))
+        return {"fetched": 0, "pruned": 0}
+
+    modified_since = None
+    if last_sync:
+        modified_since = datetime.datetime.fromisoformat(last_sync) - datetime.timedelta(seconds=INDEX_SYNC_MARGIN_SECONDS)
+
+    seen = fetch_incident_rows(index, table_client, modified_since=modified_since)
+    pruned = 0
+    if modified_since is None:
+        pruned = index.prune(seen)
+        index.set_state("backfilled_to", "")
+    index.set_state("last_sync", sync_started.isoformat())
+    return {"fetched": len(seen), "pruned": pruned}
+
+def oldest_incident_time(table_client):
+    # Rows come back in row key order, so the first row of a one-row page is the oldest
+    pages = table_client.query_entities("PartitionKey eq 'incidents'", results_per_page=1, select=["RowKey"]).by_page()
+    first = list(next(pages, []))
+    if not first:
+        return None, True
+    started_at = extract_timestamp_from_filename(first[0]["RowKey"])
+    return (datetime.datetime.fromisoformat(started_at) if started_at else None), False
+
+def backfill_index(index, table_client, wanted, status=None, since=None, until=None):
+    # Everything at or after the backfilled_to frontier is mirrored. Older rows are pulled in
+    # RowKey windows that double in length, newest first, only until `wanted` incidents match
+    # the filters, the frontier passes `since`, or the oldest row is reached.
+    frontier = index.get_state("backfilled_to")
+    if not frontier:
+        return 0
+    frontier = datetime.datetime.fromisoformat(frontier)
+    since_time = datetime.datetime.fromisoformat(since) if since else None
+
+    oldest, empty = oldest_incident_time(table_client)
+    if oldest is None and not empty:
+        # The oldest row is not named by time, so windows would never reach it
+        return sync_index(index, table_client, full=True)["fetched"]
+
+    fetched = 0
+    window = datetime.timedelta(days=INDEX_BACKFILL_WINDOW_DAYS)
+    while True:
+        if empty or frontier <= oldest:
+            index.set_state("backfilled_to", "")
+            break
+        if since_time and since_time >= frontier:
+            break
+        mirrored_since = max(since_time, frontier) if since_time else frontier
+        _, enough = index.query(status=status, since=mirrored_since.isoformat(), until=until, limit=wanted)
+        if enough:
+            break
+
+        start = frontier - window
+        fetched += len(fetch_incident_rows(index, table_client, start=start, end=frontier))
+        frontier = start
+        index.set_state("backfilled_to", frontier.isoformat(timespec="seconds"))
+        window *= 2
+    return fetched
+
+def list_incidents(status=None, since=None, until=None, page_size=50, cursor=None, sync=True, full=False, backfill=True):
+    # Pages are served from the local index (newest first) so the list renders without a
+    # network round trip; `sync` first pulls what changed remotely and `backfill` fetches
+    # only as much older history as the requested page needs. SAS URLs are only signed for
+    # the incidents on the requested page.
+    try:
+        index = IncidentIndex()
+        offline = False
+        message = None
+        offset = int(cursor or 0)
+        if sync or backfill:
+            try:
+                table_client = get_table_client()
+                if sync:
+                    sync_index(index, table_client, full=full)
+                if backfill:
+                    backfill_index(index, table_client, offset + page_size, status, since, until)
+            except Exception as e:
+                offline = True
+                message = str(e)
+
+        page, has_more = index.query(status=status, since=since, until=until, limit=page_size, offset=offset)
+        index.close()
+
         account_name, account_key = extract_account_credentials(config_manager.AZURE_STORAGE_CONNECTION_STRING)
-        
-        entities = table_client.list_entities()
         results = []
-        
-        for entity in entities:
-            row_key = entity['RowKey']
-            timestamp_str = extract_timestamp_from_filename(row_key)
-            if not timestamp_str:
-                timestamp_str = entity.get('Timestamp', datetime.datetime.now()).isoformat()
-            
-            video_url_with_sas = ""
-            if account_name and account_key:
-                try:
-                    sas_token = generate_blob_sas(
-                        account_name=account_name,
-                        container_name=config_manager.INCIDENT_CONTAINER,
-                        blob_name=row_key,
-                        account_key=account_key,
-                        permission=BlobSasPermissions(read=True),
-                        expiry=datetime.datetime.utcnow() + datetime.timedelta(hours=1)
-                    )
-                    base_url = f"https://{account_name}.blob.core.windows.net/{config_manager.INCIDENT_CONTAINER}/{row_key}"
-                    video_url_with_sas = f"{base_url}?{sas_token}"
-                except Exception:
-                    video_url_with_sas = entity.get('VideoUrl', '')
-            
+        for incident in page:
+            segment_urls = [build_sas_url(account_name, account_key, row_key, video_url) for row_key, video_url in incident["segments"]]
             results.append({
-                "id": row_key,
-                "status": entity.get('Status', 'New'),
-                "timestamp": timestamp_str,
-                "videoUrl": video_url_with_sas
+                "id": incident["id"],
+                "status": incident["status"],
+                "timestamp": incident["timestamp"],
+                "videoUrl": segment_urls[0] if segment_urls else "",
+                "segments": segment_urls
             })
-            
-        results.sort(key=lambda x: x['timestamp'], reverse=True)
-        return {"status": "success", "data": results}
+
+        response = {
+            "status": "success",
+            "data": results,
+            "next": str(offset + len(results)) if has_more else None,
+            "synced": sync and not offline,
+            "offline": offline
+        }
+        if message:
+            response["message"] = message
+        return response
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-def update_incident_status(row_key, new_status):
+def update_index(change):
+    # The table is the source of truth; a stale index is fixed by the next sync
     try:
-        table_client = TableClient.from_connection_string(
-            config_manager.AZURE_STORAGE_CONNECTION_STRING, 
-            table_name="Incidents"
-        )
-        entity = table_client.get_entity(partition_key="incidents", row_key=row_key)
-        entity["Status"] = new_status
-        table_client.update_entity(mode="merge", entity=entity)
+        index = IncidentIndex()
+        change(index)
+        index.close()
+    except Exception as e:
+        print(f"Incident index not updated: {e}", file=sys.stderr)
+
+def update_incident_status(incident_id, new_status):
+    try:
+        table_client = get_table_client()
+        rows = get_incident_rows(table_client, incident_id)
+        if not rows:
+            return {"status": "error", "message": f"Incident {incident_id} not found"}
+        for entity in rows:
+            entity["Status"] = new_status
+            table_client.update_entity(mode="merge", entity=entity)
+        update_index(lambda index: index.set_status(incident_id, new_status))
         return {"status": "success", "message": f"Updated to {new_status}"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-def delete_incident(row_key):
+def delete_incident(incident_id):
     try:
-        table_client = TableClient.from_connection_string(
-            config_manager.AZURE_STORAGE_CONNECTION_STRING, 
-            table_name="Incidents"
-        )
-        table_client.delete_entity(partition_key="incidents", row_key=row_key)
-        
-        blob_service = BlobServiceClient.from_connection_string(config_manager.AZURE_STORAGE_CONNECTION_STRING)
-        blob_client = blob_service.get_blob_client(container=config_manager.INCIDENT_CONTAINER, blob=row_key)
-        
-        if blob_client.exists():
-            blob_client.delete_blob()
-            
-        return {"status": "success", "message": f"Deleted incident {row_key}"}
+        table_client = get_table_client()
+        blob_service = azure_clients.get_blob_service_client()
+
+        for entity in get_incident_rows(table_client, incident_id):
+            row_key = entity['RowKey']
+            blob_client = blob_service.get_blob_client(container=config_manager.INCIDENT_CONTAINER, blob=row_key)
+            if blob_client.exists():
+                blob_client.delete_blob()
+            table_client.delete_entity(partition_key="incidents", row_key=row_key)
+
+        update_index(lambda index: index.delete_incident(incident_id))
+        return {"status": "success", "message": f"Deleted incident {incident_id}"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+def parse_list_args(argv):
+    parser = argparse.ArgumentParser(prog="incident_manager.py list")
+    parser.add_argument("--status")
+    parser.add_argument("--since", help="ISO date/time, inclusive")
+    parser.add_argument("--until", help="ISO date/time, exclusive")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--cursor", help="`next` value from the previous page")
+    parser.add_argument("--cached", action="store_true", help="serve from the local index without syncing")
+    parser.add_argument("--full", action="store_true", help="full resync, dropping rows deleted elsewhere")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
     command = sys.argv[1] if len(sys.argv) > 1 else "list"
     
     if command == "list":
-        print(json.dumps(list_incidents()))
+        options = parse_list_args(sys.argv[2:])
+        print(json.dumps(list_incidents(
+            options.status, options.since, options.until, options.page_size, options.cursor,
+            sync=not options.cached, full=options.full, backfill=not options.cached
+        )))
     elif command == "update":
         if len(sys.argv) != 4:
             print(json.dumps({"status": "error", "message": "Missing arguments"}))
@@ -5,23 +5,60 @@ import datetime
 import threading
 import time
 import tempfile
-from azure.storage.blob import BlobServiceClient
-from azure.data.tables import TableClient
+from collections import deque
+import numpy as np
 import config_manager
+import metrics
+from preroll_buffer import PrerollBuffer
+from upload_queue import get_upload_queue
+
+DROP_OLDEST = "oldest"
+DROP_NEWEST = "newest"
 
 class IncidentRecorder:
-    def __init__(self):
+    # The camera thread only enqueues; VideoWriter open/encode/release all happen on the
+    # encoder thread. Control messages are never dropped, frames are once the queue is full.
+    def __init__(self, camera_id=None, max_queue=None, drop_policy=None, upload_queue=None):
+        self.camera_id = camera_id
+        self.upload_queue = upload_queue or get_upload_queue()
         self.is_recording = False
         self.video_writer = None
+        self.frame_size = None
+        self.fps = 20.0
         self.current_file_path = None
-        self.blob_service_client = None
-        
-        try:
-            self.blob_service_client = BlobServiceClient.from_connection_string(
-                config_manager.AZURE_STORAGE_CONNECTION_STRING
-            )
-        except Exception as e:
-            print(f"Azure connection error: {e}", file=sys.stderr)
+        # An incident is written as fixed-length segments named <incident id>_segNNN.webm
+        self.incident_id = None
+        self.segment_seconds = config_manager.RECORDER_SEGMENT_SECONDS
+        self.segment_index = 0
+        self.segment_frames = 0
+        self.segment_frame_limit = 1
+        self.segments_closed = 0
+        # Set when the writer for the current segment would not open; its frames are discarded
+        self.segment_failed = False
+        self.failed_segments = 0
+
+        self.max_queue = max_queue or config_manager.RECORDER_QUEUE_FRAMES
+        self.drop_policy = drop_policy or config_manager.RECORDER_DROP_POLICY
+        self.queue = deque()
+        self.queued_frames = 0
+        self.condition = threading.Condition()
+        self.running = True
+        self.written_frames = 0
+        self.dropped_frames = 0
+        self.max_depth = 0
+        self.preroll = PrerollBuffer(
+            max_bytes=int(config_manager.PREROLL_MAX_MB * 2**20),
+            max_seconds=config_manager.PREROLL_SECONDS
+        )
+        self.preroll_frames_written = 0
+
+        self.encoder_thread = threading.Thread(target=self._encoder_loop, daemon=True)
+        self.encoder_thread.start()
+
+    def _enqueue(self, item):
+        with self.condition:
+            self.queue.append(item)
+            self.condition.notify()
 
     def start_recording(self, frame_width, frame_height, fps=20.0):
         if self.is_recording:
@@ -29,77 +66,194 @@ class IncidentRecorder:
 
         self.is_recording = True
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"incident_{timestamp}.webm"
-        self.current_file_path = os.path.join(tempfile.gettempdir(), filename)
-        
-        fourcc = cv2.VideoWriter_fourcc(*'vp80')
-        
-        self.video_writer = cv2.VideoWriter(
-            self.current_file_path, fourcc, fps, (frame_width, frame_height)
-        )
-        print(f"Started recording: {filename}", file=sys.stderr)
+        if self.camera_id is not None:
+            incident_id = f"incident_{timestamp}_{self.camera_id}"
+        else:
+            incident_id = f"incident_{timestamp}"
+        with self.condition:
+            self.queue.append(("start", incident_id, frame_width, frame_height, fps))
+            # Queued behind "start" and ahead of any live frame, so the clip stays in order
+            self.queue.append(("preroll", self.preroll.drain()))
+            self.condition.notify()
 
-    def write_frame(self, frame):
-        if self.is_recording and self.video_writer:
-            self.video_writer.write(frame)
+    def add_preroll(self, frame_time, jpeg_buffer):
+        # Called with the JPEG already encoded for the UI; while recording, frames go to the clip instead
+        if not self.is_recording:
+            self.preroll.push(frame_time, jpeg_buffer)
+
+    def write_frame(self, frame, annotate=None):
+        # annotate(frame) runs on the encoder thread, so overlay drawing is off the hot path too
+        if not self.is_recording:
+            return False
+
+        with self.condition:
+            if self.queued_frames >= self.max_queue:
+                self.dropped_frames += 1
+                if self.drop_policy == DROP_NEWEST:
+                    return False
+                for i, item in enumerate(self.queue):
+                    if item[0] == "frame":
+                        del self.queue[i]
+                        self.queued_frames -= 1
+                        break
+
+            self.queue.append(("frame", frame, annotate))
+            self.queued_frames += 1
+            self.max_depth = max(self.max_depth, self.queued_frames)
+            self.condition.notify()
+        return True
 
     def stop_recording(self):
         if not self.is_recording:
             return
 
         self.is_recording = False
-        if self.video_writer:
-            self.video_writer.release()
-            self.video_writer = None
-            print("Stopped recording.", file=sys.stderr)
-            
-            if self.current_file_path:
-                upload_thread = threading.Thread(
-                    target=self._upload_worker,
-                    args=(self.current_file_path, os.path.basename(self.current_file_path))
-                )
-                upload_thread.start()
-                self.current_file_path = None
-
-    def _upload_worker(self, local_path, cloud_filename):
-        time.sleep(1.5) 
-        
+        self._enqueue(("stop",))
+
+    def close(self, timeout=5.0):
+        # Finishes whatever is queued (including a pending stop/upload), then ends the thread
+        self.stop_recording()
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.encoder_thread.join(timeout=timeout)
+
+    def _encoder_loop(self):
+        while True:
+            with self.condition:
+                while not self.queue and self.running:
+                    self.condition.wait()
+                if not self.queue:
+                    return
+                item = self.queue.popleft()
+                if item[0] == "frame":
+                    self.queued_frames -= 1
+
+            try:
+                if item[0] == "frame":
+                    self._write(item[1], item[2])
+                elif item[0] == "start":
+                    self._open(*item[1:])
+                elif item[0] == "preroll":
+                    self._write_preroll(item[1])
+                else:
+                    self._finish()
+            except Exception as e:
+                print(f"Recorder error: {e}", file=sys.stderr)
+
+    def _open(self, incident_id, frame_width, frame_height, fps):
+        if self.incident_id:
+            self._finish()
+
+        self.incident_id = incident_id
+        self.frame_size = (frame_width, frame_height)
+        self.fps = fps
+        self.segment_index = 0
+        self.segment_frame_limit = max(1, int(round(fps * self.segment_seconds)))
+        print(f"Started recording: {incident_id}", file=sys.stderr)
+
+    def _ensure_segment(self):
+        # Segments open lazily, so stopping right after a rotation never leaves an empty file
+        if self.video_writer or self.segment_failed or not self.incident_id:
+            return self.video_writer is not None
+
+        filename = f"{self.incident_id}_seg{self.segment_index:03d}.webm"
+        file_path = os.path.join(tempfile.gettempdir(), filename)
+        fourcc = cv2.VideoWriter_fourcc(*'vp80')
+        self.segment_frames = 0
+
+        video_writer = cv2.VideoWriter(file_path, fourcc, self.fps, self.frame_size)
+        if not video_writer.isOpened():
+            # Skip this segment rather than queue an empty file; the next one tries again
+            video_writer.release()
+            print(f"Recorder could not open {file_path} (codec or path unavailable); skipping segment.", file=sys.stderr)
+            self.segment_failed = True
+            self.failed_segments += 1
+            return False
+
+        self.current_file_path = file_path
+        self.video_writer = video_writer
+        return True
+
+    def _after_frame(self):
+        self.segment_frames += 1
+        if self.segment_frames >= self.segment_frame_limit:
+            self._close_segment()
+
+    def _write(self, frame, annotate):
+        if not self._ensure_segment():
+            if self.segment_failed:
+                self._after_frame()
+            return
+        started = time.perf_counter()
+        if annotate:
+            annotate(frame)
+        self.video_writer.write(frame)
+        metrics.observe("recorder_encode", time.perf_counter() - started)
+        self.written_frames += 1
+        self._after_frame()
+
+    def _write_preroll(self, frames):
+        if not frames:
+            return
+        started = time.perf_counter()
+        for _, jpeg_buffer in frames:
+            frame = cv2.imdecode(np.frombuffer(jpeg_buffer, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            if not self._ensure_segment():
+                if self.segment_failed:
+                    self._after_frame()
+                continue
+            if (frame.shape[1], frame.shape[0]) != self.frame_size:
+                frame = cv2.resize(frame, self.frame_size)
+            self.video_writer.write(frame)
+            self.preroll_frames_written += 1
+            self._after_frame()
+        print(f"Pre-roll: {len(frames)} frames ({frames[-1][0] - frames[0][0]:.1f}s) written in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    def _close_segment(self):
+        # Every finished segment goes straight to the upload queue, even mid-incident
+        if not self.video_writer:
+            if self.segment_failed:
+                self.segment_failed = False
+                self.segment_index += 1
+            return
+        self.video_writer.release()
+        self.video_writer = None
+
+        cloud_filename = os.path.basename(self.current_file_path)
         try:
-            print(f"Starting upload for {cloud_filename}...", file=sys.stderr)
-            
-            blob_client = self.blob_service_client.get_blob_client(
-                container=config_manager.INCIDENT_CONTAINER,
-                blob=cloud_filename
-            )
-            
-            with open(local_path, "rb") as data:
-                blob_client.upload_blob(data, overwrite=True)
-            
-            print("Blob uploaded successfully. Updating Table...", file=sys.stderr)
-
-            table_service = TableClient.from_connection_string(
-                conn_str=config_manager.AZURE_STORAGE_CONNECTION_STRING,
-                table_name="Incidents"
-            )
-            
-            incident_entity = {
+            self.upload_queue.enqueue(self.current_file_path, cloud_filename, {
                 "PartitionKey": "incidents",
                 "RowKey": cloud_filename,
-                "Timestamp": datetime.datetime.utcnow(),
-                "Status": "New",
-                "VideoUrl": blob_client.url
-            }
-            
-            table_service.create_entity(entity=incident_entity)
-            
-            print(f"SUCCESS: {cloud_filename} registered in DB.", file=sys.stderr)
-
+                "IncidentId": self.incident_id,
+                "Segment": self.segment_index,
+                "CameraId": self.camera_id or "",
+                "Status": "New"
+            })
         except Exception as e:
-            print(f"CRITICAL ERROR during upload: {str(e)}", file=sys.stderr)
-            
-        finally:
-            if os.path.exists(local_path):
-                try:
-                    os.remove(local_path)
-                except:
-                    pass
+            print(f"CRITICAL ERROR queueing {cloud_filename} for upload: {e}", file=sys.stderr)
+        self.current_file_path = None
+        self.segment_index += 1
+        self.segments_closed += 1
+
+    def _finish(self):
+        if self.incident_id:
+            self._close_segment()
+            print(f"Stopped recording: {self.incident_id} ({self.segment_index} segment(s)).", file=sys.stderr)
+            self.incident_id = None
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "queue_depth": self.queued_frames,
+                "max_queue_depth": self.max_depth,
+                "queue_capacity": self.max_queue,
+                "written_frames": self.written_frames,
+                "segments": self.segments_closed,
+                "failed_segments": self.failed_segments,
+                "dropped_frames": self.dropped_frames,
+                "preroll": self.preroll.get_stats(),
+                "preroll_frames_written": self.preroll_frames_written
+            }
@@ -0,0 +1,65 @@
+class ScheduledStage:
+    def __init__(self, name, period, budget):
+        self.name = name
+        self.period = period
+        self.budget = budget
+        self.latency = None
+        self.last_run = 0.0
+        self.next_due = 0.0
+        self.runs = 0
+
+class InferenceScheduler:
+    # Wall-clock scheduling for heavy stages. A stage runs every `period` seconds, stretched so
+    # that its measured latency never takes more than `budget` of the wall clock.
+    def __init__(self, smoothing=0.2):
+        self.smoothing = smoothing
+        self.stages = {}
+
+    def add_stage(self, name, period, budget):
+        self.stages[name] = ScheduledStage(name, period, budget)
+
+    def effective_period(self, name):
+        stage = self.stages[name]
+        if stage.latency is None or stage.budget <= 0:
+            return stage.period
+        return max(stage.period, stage.latency / stage.budget)
+
+    def set_period(self, name, period):
+        stage = self.stages[name]
+        if stage.period == period:
+            return
+        stage.period = period
+        # Pull the deadline in when switching to a faster schedule (e.g. going offline)
+        stage.next_due = min(stage.next_due, stage.last_run + self.effective_period(name))
+
+    def is_due(self, name, now):
+        return now >= self.stages[name].next_due
+
+    def mark_started(self, name, now):
+        stage = self.stages[name]
+        stage.last_run = now
+        stage.runs += 1
+        stage.next_due = now + self.effective_period(name)
+
+    def record_latency(self, name, seconds):
+        stage = self.stages[name]
+        if stage.latency is None:
+            stage.latency = seconds
+        else:
+            stage.latency = (1.0 - self.smoothing) * stage.latency + self.smoothing * seconds
+        stage.next_due = stage.last_run + self.effective_period(name)
+
+    def time_until(self, name, now):
+        return max(0.0, self.stages[name].next_due - now)
+
+    def get_stats(self):
+        stats = {}
+        for name, stage in self.stages.items():
+            period = self.effective_period(name)
+            stats[name] = {
+                "period": round(period, 3),
+                "latency_ms": round(stage.latency * 1000, 1) if stage.latency is not None else None,
+                "load": round(stage.latency / period, 3) if stage.latency is not None and period > 0 else 0.0,
+                "runs": stage.runs
+            }
+        return stats
@@ -0,0 +1,123 @@
+import sys
+import time
+import threading
+
+class InferenceResult:
+    def __init__(self, value, error, frame_time, submitted_at, completed_at):
+        self.value = value
+        self.error = error
+        self.frame_time = frame_time
+        self.submitted_at = submitted_at
+        self.completed_at = completed_at
+
+    @property
+    def latency(self):
+        return self.completed_at - self.submitted_at
+
+    def age(self, now=None):
+        return (now or time.time()) - self.frame_time
+
+class InferenceClient:
+    # Per-camera handle on a shared worker: at most one request in flight, newest result wins
+    def __init__(self, worker, client_id):
+        self.worker = worker
+        self.client_id = client_id
+        self.pending = None
+        self.result = None
+        self.busy = False
+
+    @property
+    def in_flight(self):
+        with self.worker.condition:
+            return self.busy
+
+    def submit(self, frame, frame_time, *args):
+        with self.worker.condition:
+            if self.busy:
+                return False
+            self.busy = True
+            self.pending = (frame, frame_time, time.time(), args)
+            self.worker.condition.notify()
+            return True
+
+    def poll(self):
+        with self.worker.condition:
+            result = self.result
+            self.result = None
+            return result
+
+class InferenceWorker:
+    # One background thread serving many cameras. Pending requests are taken round-robin, so a busy
+    # camera cannot starve the others, and up to max_batch of them share one process_fn call.
+    # Replaces the single-camera AsyncFaceDetector; an InferenceClient keeps its one-slot,
+    # newest-result-wins behaviour per camera.
+    def __init__(self, name, process_fn, max_batch=1):
+        self.name = name
+        self.process_fn = process_fn
+        self.max_batch = max_batch
+        self.condition = threading.Condition()
+        self.clients = []
+        self.next_client = 0
+        self.running = True
+        self.batches = 0
+        self.items = 0
+        self.thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self.thread.start()
+
+    def register(self, client_id):
+        with self.condition:
+            client = InferenceClient(self, client_id)
+            self.clients.append(client)
+            return client
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def _take_batch(self):
+        batch = []
+        count = len(self.clients)
+        for offset in range(count):
+            client = self.clients[(self.next_client + offset) % count]
+            if client.pending is not None:
+                batch.append((client, client.pending))
+                client.pending = None
+                if len(batch) >= self.max_batch:
+                    break
+        if batch:
+            self.next_client = (self.clients.index(batch[-1][0]) + 1) % count
+        return batch
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                batch = self._take_batch() if self.running else []
+                while self.running and not batch:
+                    self.condition.wait()
+                    batch = self._take_batch()
+                if not self.running:
+                    return
+
+            values, error = [None] * len(batch), None
+            try:
+                values = self.process_fn([(frame, args) for _, (frame, _, _, args) in batch])
+            except Exception as e:
+                error = e
+                print(f"[{self.name}] inference error: {e}", file=sys.stderr)
+
+            completed_at = time.time()
+            with self.condition:
+                self.batches += 1
+                self.items += len(batch)
+                for (client, (_, frame_time, submitted_at, _)), value in zip(batch, values):
+                    client.result = InferenceResult(value, error, frame_time, submitted_at, completed_at)
+                    client.busy = False
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0
+            }
@@ -2,13 +2,13 @@ import sys
 import os
 import time
 import json
-import base64
 import socket
 import threading
 import io
+import copy
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import warnings
 
-import numpy as np
 import cv2
 import face_recognition
 from azure.cognitiveservices.vision.face import FaceClient
@@ -18,26 +18,89 @@ from azure.storage.blob import BlobServiceClient
 import config_manager
 import cache_manager
 from incident_recorder import IncidentRecorder
-from threat_detector import ThreatDetector
+from frame_grabber import FrameGrabber
+from frame_sources import open_frame_source
+from frame_transport import create_frame_sink
+from inference_worker import InferenceWorker
+from connectivity import CircuitBreaker, CLOSED
+from face_tracker import FaceTracker, associate, keeps_identity
+from motion_gate import MotionGate
+from inference_scheduler import InferenceScheduler
+from encoding_store import EncodingStore
+from face_encoder import encode_face_image
+from gallery_index import create_gallery_index, estimate_recall
+from threat_detector import create_threat_detector
+from profile_store import ProfileStore, ACCESS_FULL, ACCESS_FIRST_FLOOR, ACCESS_DENIED
+import metrics
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
 IS_OFFLINE_MODE = False
-LOCAL_PROFILES_CACHE = {}
+PROFILE_STORE = ProfileStore()
 SHOW_OVERLAYS = False
 DETECT_WEAPONS = True
+# Index of the camera shown in the UI; only it gets JPEG frames, the others send status only
+VIEWED_CAMERA = 0
+UNVIEWED_STATUS_INTERVAL = 1.0
 SYSTEM_STATUS = "Ready"
 
 CLIENT_LOCK = threading.Lock()
 RECONNECTION_IN_PROGRESS = False
 
+FACE_MATCH_TOLERANCE = 0.6
+MIN_IMAGES_FOR_POOL = 4
+
 class FacialRecognition:
     def __init__(self):
-        self.known_face_encodings = []
-        self.known_face_names = []
-        self.encoding_cache = {}
+        self.gallery_index = self.create_index()
+        self.encoding_store = EncodingStore()
+        self.encoding_store.load()
         self.face_lock = threading.Lock()
 
+    def create_index(self):
+        return create_gallery_index(
+            config_manager.GALLERY_INDEX,
+            nlist=config_manager.GALLERY_IVF_NLIST,
+            nprobe=config_manager.GALLERY_IVF_NPROBE
+        )
+
+    def set_gallery(self, encodings, names):
+        # Shallow copy keeps trained IVF partitions; build() swaps in fresh arrays so the live index is untouched
+        new_index = copy.copy(self.gallery_index)
+        new_index.build(encodings, names)
+
+        if not new_index.is_exact and len(new_index) > 0:
+            recall, exact_time, approx_time = estimate_recall(new_index)
+            print(f"Gallery index recall@1: {recall:.3f} (exact {exact_time * 1000:.2f} ms, approx {approx_time * 1000:.2f} ms per query)", file=sys.stderr)
+
+        with self.face_lock:
+            self.gallery_index = new_index
+
+    def match_encodings(self, probe_encodings, tolerance=FACE_MATCH_TOLERANCE, top_k=1):
+        candidates = self.gallery_index.search(probe_encodings, k=top_k)
+        return [[(name, dist) for name, dist in row if dist <= tolerance] for row in candidates]
+
+    def encode_images(self, pending):
+        workers = config_manager.ENCODING_WORKERS or max(1, (os.cpu_count() or 2) - 1)
+
+        # Starting worker interpreters costs more than encoding a handful of images inline
+        if workers == 1 or len(pending) < MIN_IMAGES_FOR_POOL:
+            for item in pending:
+                try:
+                    yield item, encode_face_image(item[2]), None
+                except Exception as e:
+                    yield item, None, e
+            return
+
+        print(f"Encoding {len(pending)} images on {workers} worker processes...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(encode_face_image, item[2]): item for item in pending}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
     def load_images(self, blob_service_client, container_name):
         global IS_OFFLINE_MODE, SYSTEM_STATUS
 
@@ -64,52 +127,54 @@ class FacialRecognition:
             valid_files = [f for f in file_list if any(f.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.webp'])]
             total_files = len(valid_files)
             calculated_count = 0
+            store_records = []
 
-            for i, filename in enumerate(valid_files):
-                name = os.path.splitext(filename)[0]
+            pending = []
 
-                if filename in self.encoding_cache:
-                    temp_encodings.append(self.encoding_cache[filename])
-                    temp_names.append(name)
-                    continue
-
-                print(f"Processing new face image {i+1}/{total_files}: {filename}", file=sys.stderr)
+            for filename in valid_files:
+                name = os.path.splitext(filename)[0]
                 path = os.path.join(images_dir, filename)
 
                 try:
-                    img = cv2.imread(path)
-                    if img is None: continue
-
-                    h, w = img.shape[:2]
-                    max_dim = 500
-                    if w > max_dim or h > max_dim:
-                        scale = max_dim / max(w, h)
-                        img = cv2.resize(img, (0, 0), fx=scale, fy=scale)
-
-                    rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                    img_encodings = face_recognition.face_encodings(rgb_img)
+                    stat_result = os.stat(path)
+                except OSError:
+                    continue
 
-                    if len(img_encodings) > 0:
-                        encoding = img_encodings[0]
+                is_cached, encoding = self.encoding_store.get(filename, stat_result)
+                if is_cached:
+                    store_records.append((filename, stat_result, encoding))
+                    if encoding is not None:
                         temp_encodings.append(encoding)
                         temp_names.append(name)
-                        self.encoding_cache[filename] = encoding
-                        calculated_count += 1
+                    continue
 
-                    time.sleep(0.1)
+                pending.append((filename, name, path, stat_result))
 
-                except Exception as e:
-                    print(f"Skipping file {filename}: {e}", file=sys.stderr)
+            for done, (item, encoding, error) in enumerate(self.encode_images(pending), start=1):
+                filename, name, _, stat_result = item
+                SYSTEM_STATUS = f"Processing database... {done}/{len(pending)}"
+
+                if error is not None:
+                    print(f"Skipping file {filename}: {error}", file=sys.stderr)
+                    continue
+
+                print(f"Processed new face image {done}/{len(pending)}: {filename}", file=sys.stderr)
+                if encoding is not None:
+                    temp_encodings.append(encoding)
+                    temp_names.append(name)
+                store_records.append((filename, stat_result, encoding))
+                calculated_count += 1
+
+            if calculated_count > 0 or len(store_records) != len(self.encoding_store.entries):
+                self.encoding_store.save(store_records)
 
             print(f"Database updated. Cached: {total_files - calculated_count}, New: {calculated_count}", file=sys.stderr)
 
-        with self.face_lock:
-            self.known_face_encodings = temp_encodings
-            self.known_face_names = temp_names
+        self.set_gallery(temp_encodings, temp_names)
 
         SYSTEM_STATUS = "Online" if not IS_OFFLINE_MODE else "Offline Mode"
 
-    def identify_faces_at_locations(self, frame, face_locations):
+    def identify_faces_with_distances(self, frame, face_locations):
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         clean_locations = []
         
@@ -123,34 +188,21 @@ class FacialRecognition:
             return []
 
         with self.face_lock:
-            if len(self.known_face_encodings) == 0:
-                return ["Unknown"] * len(clean_locations)
-
-            face_encodings = face_recognition.face_encodings(rgb_frame, clean_locations)
-            face_names = []
-
-            for face_encoding in face_encodings:
-                if len(self.known_face_encodings) == 0:
-                    face_names.append("Unknown")
-                    continue
+            if len(self.gallery_index) == 0:
+                return [("Unknown", None)] * len(clean_locations)
 
-                matches = face_recognition.compare_faces(self.known_face_encodings, face_encoding)
-                name = "Unknown"
-                face_distances = face_recognition.face_distance(self.known_face_encodings, face_encoding)
+            with metrics.timed("face_encode"):
+                face_encodings = face_recognition.face_encodings(rgb_frame, clean_locations)
+            with metrics.timed("face_match"):
+                matches = self.match_encodings(face_encodings)
 
-                if len(face_distances) > 0:
-                    best_match_index = np.argmin(face_distances)
-                    if matches[best_match_index]:
-                        name = self.known_face_names[best_match_index]
-                face_names.append(name)
-            
-            return face_names
+            return [m[0] if m else ("Unknown", None) for m in matches]
 
 blob_service_client = None
 face_client = None
-recorder = None
-fr = FacialRecognition()
-threat_detector = ThreatDetector(model_filename="best.pt", conf_threshold=0.45)
+fr = None
+threat_detector = None
+azure_breaker = CircuitBreaker("azure", failure_threshold=3, base_backoff=2.0, max_backoff=120.0)
 
 def check_internet(timeout=3):
     try:
@@ -171,82 +223,91 @@ def create_azure_clients_safely():
         print(f"Azure Connection Check Failed: {e}", file=sys.stderr)
         return None, None
 
-def init_recorder_if_needed():
-    global recorder
-    if recorder is None:
-        try:
-            recorder = IncidentRecorder()
-            print("Recorder initialized.", file=sys.stderr)
-        except Exception as e:
-            print(f"Recorder init error: {e}", file=sys.stderr)
-
-init_recorder_if_needed()
-
-try:
-    print("Checking internet connection...", file=sys.stderr)
-    if check_internet(timeout=2):
-        print("Internet OK. Connecting to Azure...", file=sys.stderr)
-        b_client, f_client = create_azure_clients_safely()
-        if b_client and f_client:
-            blob_service_client = b_client
-            face_client = f_client
-            print("Online Mode: Azure connected.", file=sys.stderr)
-            IS_OFFLINE_MODE = False
-            SYSTEM_STATUS = "Online"
+def init_backend():
+    global fr, threat_detector, blob_service_client, face_client, IS_OFFLINE_MODE, SYSTEM_STATUS
+
+    fr = FacialRecognition()
+    threat_detector = create_threat_detector(
+        config_manager.THREAT_BACKEND,
+        model_filename="best.pt",
+        conf_threshold=0.45,
+        quantize=config_manager.THREAT_ONNX_QUANTIZE,
+        num_threads=config_manager.THREAT_ONNX_THREADS
+    )
+
+    try:
+        print("Checking internet connection...", file=sys.stderr)
+        if check_internet(timeout=2):
+            print("Internet OK. Connecting to Azure...", file=sys.stderr)
+            b_client, f_client = create_azure_clients_safely()
+            if b_client and f_client:
+                blob_service_client = b_client
+                face_client = f_client
+                print("Online Mode: Azure connected.", file=sys.stderr)
+                azure_breaker.record_success()
+                IS_OFFLINE_MODE = False
+                SYSTEM_STATUS = "Online"
+            else:
+                raise Exception("Azure auth failed")
         else:
-            raise Exception("Azure auth failed")
-    else:
-        raise RuntimeError("No internet connection")
-except Exception as e:
-    print(f"Offline fallback triggered: {e}", file=sys.stderr)
-    IS_OFFLINE_MODE = True
-    SYSTEM_STATUS = "Offline Mode"
+            raise RuntimeError("No internet connection")
+    except Exception as e:
+        print(f"Offline fallback triggered: {e}", file=sys.stderr)
+        azure_breaker.trip(e)
+        IS_OFFLINE_MODE = True
+        SYSTEM_STATUS = "Offline Mode"
 
-if not IS_OFFLINE_MODE:
-    fr.load_images(blob_service_client, config_manager.IMAGE_CONTAINER)
-else:
-    fr.load_images(None, None)
+    if not IS_OFFLINE_MODE:
+        fr.load_images(blob_service_client, config_manager.IMAGE_CONTAINER)
+    else:
+        fr.load_images(None, None)
 
-LOCAL_PROFILES_CACHE = cache_manager.load_local_profiles()
+    PROFILE_STORE.refresh()
+    PROFILE_STORE.start_watching(config_manager.PROFILE_WATCH_SECONDS)
 
 def connection_monitor_loop():
     global IS_OFFLINE_MODE, RECONNECTION_IN_PROGRESS, SYSTEM_STATUS, blob_service_client, face_client
 
     while True:
-        time.sleep(5)
-
-        if IS_OFFLINE_MODE and not RECONNECTION_IN_PROGRESS:
-            if check_internet(timeout=2):
-                print("Internet restored. Attempting to reconnect...", file=sys.stderr)
-                RECONNECTION_IN_PROGRESS = True
-                SYSTEM_STATUS = "Reconnecting..."
-
-                new_blob, new_face = create_azure_clients_safely()
-
-                if new_blob and new_face:
-                    with CLIENT_LOCK:
-                        blob_service_client = new_blob
-                        face_client = new_face
-
-                    print("Azure client ready. Updating database in background...", file=sys.stderr)
-
-                    try:
-                        fr.load_images(blob_service_client, config_manager.IMAGE_CONTAINER)
-                        print("Sync complete. Switching to ONLINE.", file=sys.stderr)
-                        IS_OFFLINE_MODE = False
-                        SYSTEM_STATUS = "Online"
-                    except Exception as e:
-                        print(f"Sync failed: {e}", file=sys.stderr)
-                        IS_OFFLINE_MODE = True
-                        SYSTEM_STATUS = "Offline (Sync Failed)"
-                else:
-                    print("Azure init failed.", file=sys.stderr)
-                    SYSTEM_STATUS = "Offline (Azure Error)"
-
-                RECONNECTION_IN_PROGRESS = False
+        # Sleeps until the breaker opens and its backoff expires; no blind polling
+        azure_breaker.wait_for_probe()
+        IS_OFFLINE_MODE = True
+
+        print("Probing Azure connection...", file=sys.stderr)
+        RECONNECTION_IN_PROGRESS = True
+        SYSTEM_STATUS = "Reconnecting..."
+
+        new_blob, new_face = None, None
+        if check_internet(timeout=2):
+            new_blob, new_face = create_azure_clients_safely()
+
+        if new_blob and new_face:
+            with CLIENT_LOCK:
+                blob_service_client = new_blob
+                face_client = new_face
+
+            print("Azure client ready. Updating database in background...", file=sys.stderr)
+
+            try:
+                fr.load_images(blob_service_client, config_manager.IMAGE_CONTAINER)
+                PROFILE_STORE.refresh()
+                print("Sync complete. Switching to ONLINE.", file=sys.stderr)
+                azure_breaker.record_success()
+                IS_OFFLINE_MODE = False
+                SYSTEM_STATUS = "Online"
+            except Exception as e:
+                print(f"Sync failed: {e}", file=sys.stderr)
+                azure_breaker.record_failure(e)
+                SYSTEM_STATUS = "Offline (Sync Failed)"
+        else:
+            print("Azure probe failed.", file=sys.stderr)
+            azure_breaker.record_failure("probe failed")
+            SYSTEM_STATUS = "Offline (Azure Error)"
+
+        RECONNECTION_IN_PROGRESS = False
 
 def input_listener():
-    global SHOW_OVERLAYS, DETECT_WEAPONS
+    global SHOW_OVERLAYS, DETECT_WEAPONS, VIEWED_CAMERA
     while True:
         try:
             line = sys.stdin.readline()
@@ -256,31 +317,20 @@ def input_listener():
                 SHOW_OVERLAYS = data.get("value", False)
             elif data.get("command") == "set_weapon_detection":
                 DETECT_WEAPONS = data.get("value", True)
+            elif data.get("command") == "select_camera":
+                VIEWED_CAMERA = int(data.get("value", 0))
         except ValueError: pass
         except Exception: pass
 
 def get_profile(person_name):
-    if person_name == "Unknown":
-        return {
-            "status": "Access Denied - Unknown Person",
-            "name": "",
-            "surname": "Unknown",
-            "dynamic_field": ""
-        }
-    return LOCAL_PROFILES_CACHE.get(person_name, {
-        "status": f"No profile for {person_name}",
-        "name": "",
-        "surname": person_name,
-        "dynamic_field": ""
-    })
+    return PROFILE_STORE.get(person_name)
 
 def draw_overlays(frame, faces, threats):
     for rect_dict, profil in faces:
-        status = profil.get("status", "No data")
         color = (0, 0, 255)
-        if "Full" in status:
+        if profil["access"] == ACCESS_FULL:
             color = (0, 255, 0)
-        elif "Only first floor" in status:
+        elif profil["access"] == ACCESS_FIRST_FLOOR:
             color = (0, 255, 255)
             
         cv2.rectangle(frame, (rect_dict["left"], rect_dict["top"]),
@@ -291,189 +341,372 @@ def draw_overlays(frame, faces, threats):
         cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
         cv2.putText(frame, threat["label"], (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
-def main_loop():
+def detect_faces_locally(frame, scale_factor=0.5):
+    small_frame = cv2.resize(frame, (0, 0), fx=scale_factor, fy=scale_factor)
+    rgb_small = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+    with metrics.timed("face_detect_local"):
+        locs_small = face_recognition.face_locations(rgb_small)
+    return [(int(t/scale_factor), int(r/scale_factor), int(b/scale_factor), int(l/scale_factor)) for (t, r, b, l) in locs_small]
+
+def detect_faces_azure(frame):
+    with CLIENT_LOCK:
+        current_f_client = face_client
+    if not current_f_client:
+        # Counts against the breaker like an unreachable service, so analysis goes offline
+        raise RuntimeError("Azure face client is not configured")
+
+    is_success, buffer = cv2.imencode(".jpg", frame)
+    if not is_success:
+        # Nothing was sent, so the caller must not count this as a call
+        return None
+
+    image_stream = io.BytesIO(buffer)
+    with metrics.timed("azure_detect"):
+        faces = current_f_client.face.detect_with_stream(image=image_stream, return_face_id=False, return_face_attributes=None)
+    return [f.face_rectangle for f in faces] if faces else []
+
+def analyze_faces(frame, track_snapshot):
+    # Runs on the shared face InferenceWorker thread, never on a camera loop
     global IS_OFFLINE_MODE, SYSTEM_STATUS
 
-    threading.Thread(target=input_listener, daemon=True).start()
-    threading.Thread(target=connection_monitor_loop, daemon=True).start()
-
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-
-    if not cap.isOpened():
-        raise RuntimeError("Error: Cannot open camera.")
-    
-    f_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    f_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    face_locations = []
+    azure_failed = False
+    if not IS_OFFLINE_MODE and azure_breaker.allow_request():
+        try:
+            face_locations = detect_faces_azure(frame)
+            if face_locations is None:
+                azure_failed = True
+            else:
+                azure_breaker.record_success()
+        except Exception as e:
+            print(f"Azure API Error: {e}", file=sys.stderr)
+            azure_breaker.record_failure(e)
+            azure_failed = True
 
-    frame_counter = 0
-    ASSUMED_FPS = 30.0
-    FACE_INTERVAL_ONLINE = 90
-    FACE_INTERVAL_OFFLINE = 15
-    WEAPON_INTERVAL = 15
+        if azure_breaker.state != CLOSED:
+            IS_OFFLINE_MODE = True
+            SYSTEM_STATUS = "Offline (Azure API Err)"
 
-    last_known_faces = []
-    last_known_threats = []
-    last_known_theme = "theme-neutral"
+    if IS_OFFLINE_MODE or azure_failed:
+        face_locations = detect_faces_locally(frame)
 
-    recording_end_time = 0.0
+    detections = []
+    if face_locations:
+        boxes = []
+        for loc in face_locations:
+            if hasattr(loc, 'top'):
+                boxes.append([loc.left, loc.top, loc.width, loc.height])
+            else:
+                t, r, b, l = loc
+                boxes.append([l, t, r-l, b-t])
+
+        # Faces still in place on a confidently identified track keep their identity without
+        # re-encoding; tracks that are due for re-verification or whose box jumped are encoded again
+        matched_tracks = associate(track_snapshot, boxes)
+        to_identify = [i for i, track in enumerate(matched_tracks) if not keeps_identity(track, boxes[i])]
+        identities = dict(zip(to_identify, fr.identify_faces_with_distances(frame, [face_locations[i] for i in to_identify])))
+
+        for i, box in enumerate(boxes):
+            name, distance = identities.get(i, (None, None))
+            detections.append({"box": box, "track": matched_tracks[i], "name": name, "distance": distance})
+    return detections
+
+def prepare_weapon_frame(frame):
+    # Downscaling makes a private copy, so the camera thread can keep drawing on its frame
+    scale_factor_yolo = 640.0 / frame.shape[1]
+    if scale_factor_yolo >= 1.0:
+        return frame.copy(), 1.0
+    return cv2.resize(frame, (0, 0), fx=scale_factor_yolo, fy=scale_factor_yolo), scale_factor_yolo
+
+def detect_weapons_batch(items):
+    # One YOLO call for every camera that asked for a weapon check since the last batch
+    frames = [frame for frame, _ in items]
+    scales = [args[0] for _, args in items]
+
+    with metrics.timed("yolo"):
+        batch_threats = threat_detector.detect_batch(frames)
+
+    results = []
+    for raw_threats, scale_factor_yolo in zip(batch_threats, scales):
+        processed_threats = []
+        for t in raw_threats:
+            t["label"] = f"{t['label'].upper()} {t['confidence']:.2f}"
+            t["box"] = [int(b / scale_factor_yolo) for b in t["box"]]
+            processed_threats.append(t)
+        results.append(processed_threats)
+    return results
+
+def analyze_faces_batch(items):
+    return [analyze_faces(frame, *args) for frame, args in items]
+
+class CameraPipeline:
+    # Everything that belongs to one camera. Models, the gallery and the Azure clients stay
+    # module-level and are shared by all pipelines through the inference workers.
     RECORDING_EXTENSION_SECONDS = 5.0
-    prev_frame_time = time.time()
-    current_processing_fps = 10.0
 
-    print("Camera started.", file=sys.stderr)
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            time.sleep(0.01)
-            continue
+    def __init__(self, index, camera_config, weapon_worker, face_worker, frame_sink, cap=None, upload_queue=None):
+        self.index = index
+        self.camera_id = str(camera_config.get("id", index))
+        self.source = camera_config.get("source", 0)
+        self.frame_sink = frame_sink
+
+        self.cap = cap if cap is not None else open_frame_source(camera_config)
+
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise RuntimeError(f"Error: Cannot open camera {self.camera_id} ({self.source}).")
+
+        self.grabber = FrameGrabber(self.cap, buffer_size=2)
+        self.weapon_client = weapon_worker.register(self.camera_id)
+        self.face_client = face_worker.register(self.camera_id)
+        self.face_tracker = FaceTracker()
+        self.motion_gate = MotionGate(
+            threshold=config_manager.MOTION_THRESHOLD,
+            min_area=config_manager.MOTION_MIN_AREA,
+            hold_seconds=config_manager.MOTION_HOLD_SECONDS,
+            max_skip_seconds=config_manager.MOTION_MAX_SKIP_SECONDS
+        )
+
+        self.scheduler = InferenceScheduler()
+        self.scheduler.add_stage("weapon", config_manager.WEAPON_PERIOD_SECONDS, config_manager.WEAPON_CPU_BUDGET)
+        self.scheduler.add_stage("face", config_manager.FACE_PERIOD_ONLINE_SECONDS, config_manager.FACE_CPU_BUDGET)
+
+        self.recorder = None
+        try:
+            self.recorder = IncidentRecorder(camera_id=self.camera_id, upload_queue=upload_queue)
+        except Exception as e:
+            print(f"Recorder init error ({self.camera_id}): {e}", file=sys.stderr)
+
+        self.last_known_faces = []
+        self.last_known_threats = []
+        self.last_known_theme = "theme-neutral"
+        self.face_latency = None
+        self.face_frame_time = None
+        self.recording_end_time = 0.0
+        self.prev_frame_time = time.time()
+        self.current_processing_fps = 10.0
+        self.last_status_time = 0.0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.grabber.start()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        print(f"Camera {self.camera_id} started.", file=sys.stderr)
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        self.grabber.stop()
+        self.cap.release()
+        if self.recorder:
+            self.recorder.close()
+
+    def run(self):
+        while self.running:
+            ret, frame, frame_time = self.grabber.read()
+            if not ret:
+                if self.cap.finished:
+                    print(f"Camera {self.camera_id}: source finished.", file=sys.stderr)
+                    break
+                continue
+            try:
+                self.process_frame(frame, frame_time)
+            except Exception as e:
+                print(f"Camera {self.camera_id} frame error: {e}", file=sys.stderr)
 
+    def process_frame(self, frame, frame_time):
         current_time = time.time()
-        time_diff = current_time - prev_frame_time
-        prev_frame_time = current_time
+        time_diff = current_time - self.prev_frame_time
+        self.prev_frame_time = current_time
         if time_diff > 0:
-            current_processing_fps = (current_processing_fps * 0.9) + ((1.0/time_diff) * 0.1)
+            self.current_processing_fps = (self.current_processing_fps * 0.9) + ((1.0/time_diff) * 0.1)
+
+        scheduler = self.scheduler
+        scheduler.set_period("face", config_manager.FACE_PERIOD_OFFLINE_SECONDS if IS_OFFLINE_MODE else config_manager.FACE_PERIOD_ONLINE_SECONDS)
 
-        frame_counter += 1
-        current_face_interval = FACE_INTERVAL_OFFLINE if IS_OFFLINE_MODE else FACE_INTERVAL_ONLINE
-        seconds_left = max(0, (current_face_interval - (frame_counter % current_face_interval)) / ASSUMED_FPS)
+        weapon_ready = DETECT_WEAPONS and not self.weapon_client.in_flight
+        faces_ready = not self.face_client.in_flight
+        check_weapon = scheduler.is_due("weapon", current_time) and weapon_ready
+        check_faces = scheduler.is_due("face", current_time) and faces_ready
 
-        check_weapon = (frame_counter % WEAPON_INTERVAL == 0) and DETECT_WEAPONS
-        check_faces = (frame_counter % current_face_interval == 0)
+        gate = self.motion_gate if config_manager.MOTION_GATE_ENABLED else None
+        if gate:
+            gate.update(frame, current_time)
+            check_weapon = gate.check("weapon", check_weapon, current_time, ready=weapon_ready)
+            check_faces = gate.check("face", check_faces, current_time, ready=faces_ready)
 
         if check_weapon:
-            scale_factor_yolo = 640.0 / frame.shape[1]
-            small_frame_for_yolo = frame if scale_factor_yolo >= 1.0 else cv2.resize(frame, (0, 0), fx=scale_factor_yolo, fy=scale_factor_yolo)
-
-            raw_threats = threat_detector.detect(small_frame_for_yolo)
-            processed_threats = []
-            for t in raw_threats:
-                box = t["box"]
-                scaled_box = [int(b / scale_factor_yolo) for b in box]
-                t["label"] = f"{t['label'].upper()} {t['confidence']:.2f}"
-                t["box"] = scaled_box
-                processed_threats.append(t)
-            last_known_threats = processed_threats
+            small_frame_for_yolo, scale_factor_yolo = prepare_weapon_frame(frame)
+            if self.weapon_client.submit(small_frame_for_yolo, frame_time, scale_factor_yolo):
+                scheduler.mark_started("weapon", current_time)
+                if gate:
+                    gate.mark_run("weapon", current_time)
+
+        weapon_result = self.weapon_client.poll()
+        if weapon_result is not None:
+            if weapon_result.error is None:
+                self.last_known_threats = weapon_result.value
+            scheduler.record_latency("weapon", weapon_result.latency)
         if not DETECT_WEAPONS:
-            last_known_threats = []
-
-        if check_faces:
-            analysis_frame = frame.copy()
-            temp_faces_list = []
-            face_locations = []
-
-            if not IS_OFFLINE_MODE:
-                if not check_internet(timeout=0.1):
-                    IS_OFFLINE_MODE = True
-                    SYSTEM_STATUS = "Offline (Connection Drop)"
-
-                if not IS_OFFLINE_MODE:
-                    is_success, buffer = cv2.imencode(".jpg", analysis_frame)
-                    if is_success:
-                        try:
-                            image_stream = io.BytesIO(buffer)
-                            with CLIENT_LOCK:
-                                current_f_client = face_client
-
-                            if current_f_client:
-                                faces = current_f_client.face.detect_with_stream(image=image_stream, return_face_id=False, return_face_attributes=None)
-                            else:
-                                faces = []
-
-                            if faces:
-                                face_locations = [f.face_rectangle for f in faces]
-                        except Exception as e:
-                            print(f"Azure API Error: {e}", file=sys.stderr)
-                            IS_OFFLINE_MODE = True
-                            SYSTEM_STATUS = "Offline (Azure API Err)"
-
-                            scale_factor = 0.5
-                            rgb_small = cv2.cvtColor(cv2.resize(analysis_frame, (0, 0), fx=scale_factor, fy=scale_factor), cv2.COLOR_BGR2RGB)
-                            locs = face_recognition.face_locations(rgb_small)
-                            face_locations = [(int(t/scale_factor), int(r/scale_factor), int(b/scale_factor), int(l/scale_factor)) for (t, r, b, l) in locs]
-
-            if IS_OFFLINE_MODE and not face_locations:
-                scale_factor = 0.5
-                small_frame = cv2.resize(analysis_frame, (0, 0), fx=scale_factor, fy=scale_factor)
-                rgb_small = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-                locs_small = face_recognition.face_locations(rgb_small)
-                face_locations = [(int(t/scale_factor), int(r/scale_factor), int(b/scale_factor), int(l/scale_factor)) for (t, r, b, l) in locs_small]
-
-            if face_locations:
-                face_names = fr.identify_faces_at_locations(analysis_frame, face_locations)
-
-                for loc, name in zip(face_locations, face_names):
-                    profile = get_profile(name)
-                    if hasattr(loc, 'top'):
-                        r_dict = {"left": loc.left, "top": loc.top, "width": loc.width, "height": loc.height}
-                    else:
-                        t, r, b, l = loc
-                        r_dict = {"left": l, "top": t, "width": r-l, "height": b-t}
-                    temp_faces_list.append((r_dict, profile))
-            last_known_faces = temp_faces_list
+            self.last_known_threats = []
+
+        face_tracker = self.face_tracker
+        face_tracker.update_motion(frame)
+
+        if check_faces and self.face_client.submit(frame.copy(), frame_time, face_tracker.snapshot()):
+            scheduler.mark_started("face", current_time)
+            if gate:
+                gate.mark_run("face", current_time)
+
+        face_result = self.face_client.poll()
+        if face_result is not None:
+            if face_result.error is None:
+                face_tracker.apply_detections(face_result.value)
+            self.face_latency = face_result.latency
+            self.face_frame_time = face_result.frame_time
+            scheduler.record_latency("face", self.face_latency)
+
+        seconds_left = scheduler.time_until("face", time.time())
+
+        last_known_faces = [(track.rect_dict(), get_profile(track.name)) for track in face_tracker.tracks]
+        last_known_threats = self.last_known_threats
+        self.last_known_faces = last_known_faces
 
         is_weapon_present = len(last_known_threats) > 0
         is_unknown_present = any(p["name"] == "" and p["surname"] == "Unknown" for _, p in last_known_faces)
-        all_statuses = [p["status"] for _, p in last_known_faces]
+        access_levels = {p["access"] for _, p in last_known_faces}
 
         if is_weapon_present:
-            last_known_theme = "theme-red"
+            self.last_known_theme = "theme-red"
         elif is_unknown_present:
-            last_known_theme = "theme-red"
-        elif any("Denied" in s or "No profile" in s for s in all_statuses):
-            last_known_theme = "theme-red"
-        elif any("Only first floor" in s for s in all_statuses):
-            last_known_theme = "theme-yellow"
+            self.last_known_theme = "theme-red"
+        elif ACCESS_DENIED in access_levels:
+            self.last_known_theme = "theme-red"
+        elif ACCESS_FIRST_FLOOR in access_levels:
+            self.last_known_theme = "theme-yellow"
         else:
-            last_known_theme = "theme-neutral"
+            self.last_known_theme = "theme-neutral"
 
         current_is_recording = False
 
         if is_weapon_present or is_unknown_present:
-            recording_end_time = current_time + RECORDING_EXTENSION_SECONDS
+            self.recording_end_time = current_time + self.RECORDING_EXTENSION_SECONDS
+
+        should_record = current_time < self.recording_end_time
 
-        should_record = current_time < recording_end_time
+        # No CLIENT_LOCK here: the recorder has its own queue and never touches the Azure clients we guard
+        recorder = self.recorder
+        if recorder:
+            if should_record and not recorder.is_recording:
+                safe_fps = max(5.0, self.current_processing_fps - 2.0)
+                recorder.start_recording(frame.shape[1], frame.shape[0], safe_fps)
+            elif not should_record and recorder.is_recording:
+                recorder.stop_recording()
 
-        with CLIENT_LOCK:
-            if recorder:
-                if should_record and not recorder.is_recording:
-                    safe_fps = max(5.0, current_processing_fps - 2.0)
-                    recorder.start_recording(f_width, f_height, safe_fps)
-                elif not should_record and recorder.is_recording:
-                    recorder.stop_recording()
+            if recorder.is_recording:
+                faces, threats = last_known_faces, last_known_threats
+                with metrics.timed("recorder_write"):
+                    recorder.write_frame(frame.copy(), lambda rec_frame: draw_overlays(rec_frame, faces, threats))
+                current_is_recording = True
 
-                if recorder.is_recording:
-                    rec_frame = frame.copy()
-                    draw_overlays(rec_frame, last_known_faces, last_known_threats)
-                    recorder.write_frame(rec_frame)
-                    current_is_recording = True
+        capture_stats = self.grabber.get_stats()
 
         data_packet = {
             "frame": None,
+            "camera_id": self.camera_id,
+            "camera_index": self.index,
             "results": last_known_faces,
             "threats": last_known_threats,
-            "theme": last_known_theme,
+            "theme": self.last_known_theme,
             "timer": seconds_left,
             "is_recording": current_is_recording,
             "is_offline": IS_OFFLINE_MODE,
             "weapon_detection_enabled": DETECT_WEAPONS,
-            "system_status": SYSTEM_STATUS
+            "system_status": SYSTEM_STATUS,
+            "azure_circuit": azure_breaker.state,
+            "source": self.cap.get_stats(),
+            "dropped_frames": capture_stats["dropped_frames"],
+            "stale_frames": capture_stats["stale_frames"],
+            "face_latency_ms": round(self.face_latency * 1000) if self.face_latency is not None else None,
+            "face_age_ms": round((current_time - self.face_frame_time) * 1000) if self.face_frame_time is not None else None,
+            "tracked_faces": len(face_tracker.tracks),
+            "reused_identities": face_tracker.reused_identities,
+            "motion_gate": self.motion_gate.get_stats(),
+            "motion_regions": self.motion_gate.regions,
+            "scheduler": scheduler.get_stats(),
+            "recorder": recorder.get_stats() if recorder else None,
+            "profiles": PROFILE_STORE.get_stats(),
+            "upload_queue": recorder.upload_queue.get_stats() if recorder else None,
+            "timings": metrics.summary()
         }
 
-        if SHOW_OVERLAYS:
+        viewed = self.index == VIEWED_CAMERA
+        needs_preroll = recorder is not None and not current_is_recording
+        data_packet["viewed"] = viewed
+
+        if SHOW_OVERLAYS and viewed:
             draw_overlays(frame, last_known_faces, last_known_threats)
 
-        ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 60])
-        if ret:
-            data_packet["frame"] = base64.b64encode(buffer).decode('utf-8')
-            print(json.dumps(data_packet))
-            sys.stdout.flush()
+        # An unviewed camera still encodes while idle, because the pre-roll buffer holds JPEGs
+        ret = False
+        if viewed or needs_preroll:
+            with metrics.timed("jpeg_encode"):
+                ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 60])
+            if ret and needs_preroll:
+                recorder.add_preroll(frame_time, buffer)
+
+        if viewed and ret:
+            with metrics.timed("emit"):
+                self.frame_sink.send(data_packet, buffer)
+        elif not viewed and current_time - self.last_status_time >= UNVIEWED_STATUS_INTERVAL:
+            # Enough for the UI's camera selector, without a frame
+            self.last_status_time = current_time
+            self.frame_sink.send_status(data_packet)
+        metrics.observe("frame", time.time() - current_time)
+
+def main_loop(frame_sink=None):
+    if frame_sink is None:
+        frame_sink = create_frame_sink([])
+
+    threading.Thread(target=input_listener, daemon=True).start()
+    threading.Thread(target=connection_monitor_loop, daemon=True).start()
+    if config_manager.METRICS_PORT:
+        metrics.start_metrics_server(config_manager.METRICS_PORT)
+
+    camera_configs = config_manager.CAMERAS
+    weapon_worker = InferenceWorker("weapon", detect_weapons_batch, max_batch=max(1, len(camera_configs)))
+    face_worker = InferenceWorker("face", analyze_faces_batch, max_batch=1)
 
-    cap.release()
-    if recorder:
-        recorder.stop_recording()
+    pipelines = []
+    for index, camera_config in enumerate(camera_configs):
+        try:
+            pipelines.append(CameraPipeline(index, camera_config, weapon_worker, face_worker, frame_sink))
+        except Exception as e:
+            print(e, file=sys.stderr)
+
+    if not pipelines:
+        weapon_worker.stop()
+        face_worker.stop()
+        raise RuntimeError("Error: Cannot open any camera.")
+
+    for pipeline in pipelines:
+        pipeline.start()
+
+    try:
+        for pipeline in pipelines:
+            pipeline.thread.join()
+    finally:
+        for pipeline in pipelines:
+            pipeline.stop()
+        weapon_worker.stop()
+        face_worker.stop()
+        frame_sink.close()
 
 if __name__ == "__main__":
-    main_loop()
+    init_backend()
+    main_loop(create_frame_sink(sys.argv[1:]))
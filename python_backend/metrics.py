@@ -0,0 +1,169 @@
+import sys
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, growing by 1.25x from 0.1 ms to ~10 s; anything slower lands in +Inf
+BUCKET_BOUNDS = [0.0001 * 1.25 ** i for i in range(52)]
+SUMMARY_WINDOW_SECONDS = 10.0
+SUMMARY_MAX_AGE_SECONDS = 1.0
+
+class Histogram:
+    # Fixed buckets, so observe() is a bisect plus two increments and memory never grows.
+    # Cumulative counts feed Prometheus; the two most recent windows feed the packet summary.
+    def __init__(self, window_seconds=SUMMARY_WINDOW_SECONDS):
+        self.lock = threading.Lock()
+        self.window_seconds = window_seconds
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = 0.0
+        self.window = [0] * len(self.counts)
+        self.previous_window = [0] * len(self.counts)
+        self.window_started = time.time()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        with self.lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.window[index] += 1
+
+    def _rotate(self, now):
+        if now - self.window_started >= self.window_seconds:
+            if now - self.window_started >= 2 * self.window_seconds:
+                self.previous_window = [0] * len(self.counts)
+            else:
+                self.previous_window = self.window
+            self.window = [0] * len(self.counts)
+            self.window_started = now
+
+    def recent(self, now=None):
+        with self.lock:
+            self._rotate(now or time.time())
+            return [a + b for a, b in zip(self.window, self.previous_window)]
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.total
+
+def bucket_quantile(counts, q):
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= rank:
+            lower = BUCKET_BOUNDS[index - 1] if index > 0 else 0.0
+            upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else BUCKET_BOUNDS[-1]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return BUCKET_BOUNDS[-1]
+
+class StageTimer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.cached_summary = {}
+        self.summary_time = 0.0
+
+    def histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    def timed(self, stage):
+        return StageTimer(self.histogram(stage))
+
+    def summary(self):
+        # Recomputed at most once a second; every camera packet reuses the same dict
+        now = time.time()
+        if now - self.summary_time < SUMMARY_MAX_AGE_SECONDS:
+            return self.cached_summary
+
+        summary = {}
+        for stage, histogram in list(self.histograms.items()):
+            counts = histogram.recent(now)
+            n = sum(counts)
+            if n == 0:
+                continue
+            summary[stage] = {
+                "p50_ms": round(bucket_quantile(counts, 0.5) * 1000, 1),
+                "p95_ms": round(bucket_quantile(counts, 0.95) * 1000, 1),
+                "n": n
+            }
+        self.cached_summary = summary
+        self.summary_time = now
+        return summary
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP vision_stage_seconds Time spent in each pipeline stage.",
+            "# TYPE vision_stage_seconds histogram"
+        ]
+        for stage, histogram in sorted(self.histograms.items()):
+            counts, total = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS, counts):
+                cumulative += count
+                lines.append(f'vision_stage_seconds_bucket{{stage="{stage}",le="{bound:.6g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'vision_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {cumulative}')
+            lines.append(f'vision_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'vision_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+def observe(stage, seconds):
+    REGISTRY.observe(stage, seconds)
+
+def timed(stage):
+    return REGISTRY.timed(stage)
+
+def summary():
+    return REGISTRY.summary()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port, host="127.0.0.1"):
+    # Local-only by default; nothing is exposed unless METRICS_PORT is set
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"Metrics endpoint unavailable on {host}:{port}: {e}", file=sys.stderr)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics endpoint listening on http://{host}:{server.server_address[1]}/metrics", file=sys.stderr)
+    return server
@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+
+class MotionGate:
+    # Cheap change detector on a small grayscale copy of the frame. Heavy stages ask check()
+    # whether to run; when the scene is static their checks are deferred until motion resumes.
+    def __init__(self, width=160, threshold=25, min_area=0.002, hold_seconds=2.0, max_skip_seconds=10.0, learning_rate=0.05):
+        self.width = width
+        self.threshold = threshold
+        self.min_area = min_area
+        self.hold_seconds = hold_seconds
+        self.max_skip_seconds = max_skip_seconds
+        self.learning_rate = learning_rate
+
+        self.background = None
+        self.kernel = np.ones((3, 3), np.uint8)
+        self.last_motion_time = 0.0
+        # Bounding boxes (x, y, w, h) of the changed areas in full-frame pixels, from the last update()
+        self.regions = []
+
+        self.pending = {}
+        self.last_run = {}
+        self.frames = 0
+        self.motion_frames = 0
+        self.stage_stats = {}
+
+    def update(self, frame, now):
+        frame_h, frame_w = frame.shape[:2]
+        scale = self.width / float(frame_w)
+        small = cv2.resize(frame, (self.width, max(1, int(frame_h * scale))), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        self.frames += 1
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self.last_motion_time = now
+            self.regions = []
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        _, mask = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+        mask = cv2.dilate(mask, self.kernel, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        min_pixels = self.min_area * mask.shape[0] * mask.shape[1]
+        self.regions = []
+        for contour in contours:
+            if cv2.contourArea(contour) < min_pixels:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            self.regions.append((int(x / scale), int(y / scale), int(np.ceil(w / scale)), int(np.ceil(h / scale))))
+        if self.regions:
+            self.motion_frames += 1
+            self.last_motion_time = now
+        return bool(self.regions)
+
+    def is_open(self, now):
+        return now - self.last_motion_time <= self.hold_seconds
+
+    def check(self, stage, due, now, ready=True):
+        # due: the stage's own schedule fired on this frame; ready: the stage can take work now.
+        # A check stays pending until the caller reports it submitted with mark_run(), so a
+        # deferred check is never lost to a busy worker.
+        pending = self.pending.get(stage, False)
+        if not due and not pending:
+            return False
+        if not ready:
+            return False
+
+        self.pending[stage] = True
+        if self.is_open(now) or now - self.last_run.get(stage, 0.0) >= self.max_skip_seconds:
+            return True
+
+        if not pending:
+            self.stage_stats.setdefault(stage, {"run": 0, "skipped": 0})["skipped"] += 1
+        return False
+
+    def mark_run(self, stage, now):
+        self.pending[stage] = False
+        self.last_run[stage] = now
+        self.stage_stats.setdefault(stage, {"run": 0, "skipped": 0})["run"] += 1
+
+    def get_stats(self):
+        return {
+            "frames": self.frames,
+            "motion_frames": self.motion_frames,
+            "regions": len(self.regions),
+            "stages": self.stage_stats
+        }
@@ -0,0 +1,164 @@
+import sys
+import os
+import ast
+
+import numpy as np
+import cv2
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+INPUT_SIZE = 640
+NMS_IOU_THRESHOLD = 0.45
+LETTERBOX_COLOR = 114
+
+def export_onnx(pt_path, onnx_path, imgsz=INPUT_SIZE):
+    # One-off export; this is the only place the ONNX backend touches ultralytics/torch
+    from ultralytics import YOLO
+
+    print(f"Exporting {pt_path} to ONNX...", file=sys.stderr)
+    exported = YOLO(pt_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    if os.path.abspath(exported) != os.path.abspath(onnx_path):
+        os.replace(exported, onnx_path)
+    return onnx_path
+
+def quantize_onnx(onnx_path, int8_path):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    print(f"Quantizing {onnx_path} to int8...", file=sys.stderr)
+    tmp_path = int8_path + ".part"
+    quantize_dynamic(onnx_path, tmp_path, weight_type=QuantType.QUInt8)
+    os.replace(tmp_path, int8_path)
+    return int8_path
+
+def is_outdated(target_path, source_path):
+    if not os.path.exists(target_path):
+        return True
+    return os.path.exists(source_path) and os.path.getmtime(target_path) < os.path.getmtime(source_path)
+
+def letterbox(frame, size=INPUT_SIZE):
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+    canvas = np.full((size, size, 3), LETTERBOX_COLOR, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, pad_x, pad_y
+
+class OnnxThreatDetector:
+    # Same interface as ThreatDetector, but runs an exported copy of the YOLO weights on
+    # ONNX Runtime's CPU provider and never imports torch at runtime.
+    def __init__(self, model_filename="best.pt", conf_threshold=0.45, verbose=False, quantize=False, num_threads=0):
+        self.conf_threshold = conf_threshold
+        self.verbose = verbose
+        self.session = None
+        self.input_name = None
+        self.names = {}
+
+        if ort is None:
+            print("CRITICAL ERROR: onnxruntime is not installed.", file=sys.stderr)
+            return
+
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        pt_path = os.path.join(current_dir, model_filename)
+        base_path = os.path.splitext(pt_path)[0]
+        onnx_path = base_path + ".onnx"
+        model_path = base_path + ".int8.onnx" if quantize else onnx_path
+
+        try:
+            if is_outdated(onnx_path, pt_path):
+                if not os.path.exists(pt_path):
+                    print(f"CRITICAL ERROR: Model file not found at {pt_path}", file=sys.stderr)
+                    return
+                export_onnx(pt_path, onnx_path)
+            if quantize and is_outdated(model_path, onnx_path):
+                quantize_onnx(onnx_path, model_path)
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+
+            print(f"Loading ONNX model from {model_path}...", file=sys.stderr)
+            self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+            self.input_name = self.session.get_inputs()[0].name
+
+            metadata = self.session.get_modelmeta().custom_metadata_map
+            if "names" in metadata:
+                self.names = ast.literal_eval(metadata["names"])
+            print(f"ONNX model loaded successfully. Classes: {self.names}", file=sys.stderr)
+        except Exception as e:
+            self.session = None
+            print(f"Error loading ONNX model: {e}", file=sys.stderr)
+
+    @property
+    def model(self):
+        return self.session
+
+    def detect(self, frame):
+        if isinstance(frame, (list, tuple)):
+            return self.detect_batch(frame)
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        if self.session is None or len(frames) == 0:
+            return [[] for _ in frames]
+
+        try:
+            letterboxed = [letterbox(f) for f in frames]
+            # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+            batch = np.stack([img for img, _, _, _ in letterboxed])[..., ::-1].transpose(0, 3, 1, 2)
+            batch = np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+            output = self.session.run(None, {self.input_name: batch})[0]
+            return [
+                self.extract_detections(prediction, scale, pad_x, pad_y, frame.shape)
+                for prediction, (_, scale, pad_x, pad_y), frame in zip(output, letterboxed, frames)
+            ]
+        except Exception as e:
+            print(f"Inference error: {e}", file=sys.stderr)
+            return [[] for _ in frames]
+
+    def extract_detections(self, prediction, scale, pad_x, pad_y, frame_shape):
+        # prediction: (4 + num_classes, num_anchors) with rows cx, cy, w, h, class scores
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        keep = confidences >= self.conf_threshold
+        if not keep.any():
+            return []
+        xywh, confidences, class_ids = prediction[keep, :4], confidences[keep], class_ids[keep]
+
+        # Undo the letterbox, then clip to the original frame
+        xyxy = np.empty_like(xywh)
+        xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+        xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_x) / scale
+        xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_y) / scale
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, frame_shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, frame_shape[0])
+
+        # Class-aware NMS: offset each class so boxes of different classes never overlap
+        offset = class_ids[:, None].astype(np.float32) * 4096.0
+        nms_boxes = np.hstack([xyxy[:, :2] + offset, xyxy[:, 2:] - xyxy[:, :2]])
+        indices = cv2.dnn.NMSBoxes(nms_boxes.tolist(), confidences.tolist(), self.conf_threshold, NMS_IOU_THRESHOLD)
+        indices = np.array(indices).reshape(-1)
+
+        detections = [
+            {
+                "label": self.names.get(int(class_ids[i]), str(int(class_ids[i]))),
+                "confidence": float(confidences[i]),
+                "box": xyxy[i].astype(int).tolist()
+            }
+            for i in indices
+        ]
+
+        if self.verbose and detections:
+            print("DETECTED: " + ", ".join(f"{d['label']} ({d['confidence']:.2f})" for d in detections), file=sys.stderr)
+
+        return detections
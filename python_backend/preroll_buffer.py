@@ -0,0 +1,42 @@
+import threading
+from collections import deque
+
+class PrerollBuffer:
+    # Ring of already-compressed frames (the JPEGs made for the UI), bounded by total bytes
+    # and by age, so a clip can start with the seconds before the trigger at no extra encode.
+    def __init__(self, max_bytes=32 * 2**20, max_seconds=5.0):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.frames = deque()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.evicted_frames = 0
+
+    def push(self, frame_time, jpeg_buffer):
+        size = len(jpeg_buffer)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self.frames.append((frame_time, jpeg_buffer))
+            self.total_bytes += size
+            oldest_allowed = frame_time - self.max_seconds
+            while self.frames and (self.total_bytes > self.max_bytes or self.frames[0][0] < oldest_allowed):
+                _, dropped = self.frames.popleft()
+                self.total_bytes -= len(dropped)
+                self.evicted_frames += 1
+
+    def drain(self):
+        with self.lock:
+            frames = list(self.frames)
+            self.frames.clear()
+            self.total_bytes = 0
+            return frames
+
+    def get_stats(self):
+        with self.lock:
+            span = self.frames[-1][0] - self.frames[0][0] if len(self.frames) > 1 else 0.0
+            return {
+                "frames": len(self.frames),
+                "bytes": self.total_bytes,
+                "seconds": round(span, 2)
+            }
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import threading
+
+import cache_manager
+
+ACCESS_FULL = "full"
+ACCESS_FIRST_FLOOR = "first_floor"
+ACCESS_DENIED = "denied"
+ACCESS_UNKNOWN = "unknown"
+
+PROFILE_FIELDS = ("name", "surname", "status", "dynamic_field")
+
+def classify_status(status):
+    # The one place status strings are interpreted; everything per-frame reads "access"
+    if "Denied" in status or "No profile" in status:
+        return ACCESS_DENIED
+    if "Full" in status or "All" in status:
+        return ACCESS_FULL
+    if "Only first floor" in status:
+        return ACCESS_FIRST_FLOOR
+    return ACCESS_UNKNOWN
+
+def make_profile(data):
+    # Keep only what the overlay and UI use, plus the precomputed access class
+    profile = {field: data.get(field, "") for field in PROFILE_FIELDS}
+    profile["status"] = profile["status"] or "No data"
+    profile["access"] = classify_status(profile["status"])
+    return profile
+
+UNKNOWN_PERSON = make_profile({"status": "Access Denied - Unknown Person", "surname": "Unknown"})
+
+class ProfileStore:
+    # Profiles keyed by person name (the JSON file stem). refresh() re-parses only files whose
+    # size or mtime changed and then swaps in a new dict, so readers on the frame path never
+    # lock and never see a half-applied update.
+    def __init__(self, profiles_dir=cache_manager.PROFILES_DIR):
+        self.profiles_dir = profiles_dir
+        self.profiles = {}
+        self.file_stats = {}
+        self.dir_mtime_ns = None
+        self.refresh_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watch_thread = None
+        self.reloads = 0
+
+    def get(self, person_name):
+        if person_name == "Unknown":
+            return UNKNOWN_PERSON
+        profile = self.profiles.get(person_name)
+        if profile is None:
+            profile = make_profile({"status": f"No profile for {person_name}", "surname": person_name})
+        return profile
+
+    def refresh(self):
+        with self.refresh_lock:
+            try:
+                self.dir_mtime_ns = os.stat(self.profiles_dir).st_mtime_ns
+                entries = {e.name: e.stat() for e in os.scandir(self.profiles_dir) if e.name.endswith(".json") and e.is_file()}
+            except FileNotFoundError:
+                entries = {}
+
+            profiles = dict(self.profiles)
+            file_stats = {}
+            changed = 0
+            for filename, stat_result in entries.items():
+                key = (stat_result.st_mtime_ns, stat_result.st_size)
+                file_stats[filename] = key
+                if self.file_stats.get(filename) == key:
+                    continue
+                name = os.path.splitext(filename)[0]
+                try:
+                    with open(os.path.join(self.profiles_dir, filename), 'r', encoding='utf-8') as f:
+                        profiles[name] = make_profile(json.load(f))
+                    changed += 1
+                except Exception as e:
+                    # Leave it out of file_stats so a half-written file is retried next time
+                    print(f"Could not load profile {filename}: {e}", file=sys.stderr)
+                    file_stats.pop(filename)
+
+            removed = [filename for filename in self.file_stats if filename not in entries]
+            for filename in removed:
+                profiles.pop(os.path.splitext(filename)[0], None)
+
+            if changed or removed:
+                self.profiles = profiles
+                self.reloads += 1
+                print(f"Profiles updated: {changed} changed, {len(removed)} removed, {len(profiles)} total.", file=sys.stderr)
+            self.file_stats = file_stats
+            return changed, len(removed)
+
+    def start_watching(self, interval):
+        # Polls the directory mtime, which changes whenever sync renames a file into place
+        if self.watch_thread is None and interval > 0:
+            self.watch_thread = threading.Thread(target=self._watch_loop, args=(interval,), daemon=True)
+            self.watch_thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _watch_loop(self, interval):
+        while not self.stop_event.wait(interval):
+            try:
+                mtime_ns = os.stat(self.profiles_dir).st_mtime_ns
+            except FileNotFoundError:
+                mtime_ns = None
+            if mtime_ns != self.dir_mtime_ns:
+                self.refresh()
+
+    def get_stats(self):
+        return {"profiles": len(self.profiles), "reloads": self.reloads}
@@ -1,17 +1,14 @@
 import sys
 import json
-from azure.data.tables import TableServiceClient
 from azure.core.exceptions import ResourceNotFoundError
 from passlib.hash import pbkdf2_sha256
 import config_manager
+import azure_clients
 
 def register_user(username, password, admin_code):
     try:
-        connection_string = config_manager.AZURE_STORAGE_CONNECTION_STRING
         secret_admin_code = config_manager.ADMIN_INVITE_CODE
-        
-        table_service = TableServiceClient.from_connection_string(connection_string)
-        table_client = table_service.get_table_client(table_name="Users")
+        table_client = azure_clients.get_table_client("Users")
 
         try:
             table_client.get_entity(partition_key="users", row_key=username)
@@ -1,10 +1,10 @@
 import sys
 import os
-from ultralytics import YOLO
 
 class ThreatDetector:
-    def __init__(self, model_filename="best.pt", conf_threshold=0.45):
+    def __init__(self, model_filename="best.pt", conf_threshold=0.45, verbose=False):
         self.conf_threshold = conf_threshold
+        self.verbose = verbose
         self.model = None
         
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,41 +18,58 @@ class ThreatDetector:
         else:
             try:
                 print("Loading YOLO model...", file=sys.stderr)
+                # Imported here so the ONNX backend can start without pulling in torch
+                from ultralytics import YOLO
                 self.model = YOLO(model_path)
                 print(f"Model loaded successfully. Classes: {self.model.names}", file=sys.stderr)
             except Exception as e:
                 print(f"Error loading YOLO weights: {e}", file=sys.stderr)
 
     def detect(self, frame):
-        if self.model is None:
-            return []
+        if isinstance(frame, (list, tuple)):
+            return self.detect_batch(frame)
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        if self.model is None or len(frames) == 0:
+            return [[] for _ in frames]
 
-        detections = []
         try:
-            results = self.model(frame, conf=self.conf_threshold, verbose=False)
-
-            for r in results:
-                boxes = r.boxes
-                
-                for box in boxes:
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    cls_id = int(box.cls[0])
-                    conf = float(box.conf[0])
-                    
-                    if self.model.names:
-                        label = self.model.names[cls_id]
-                    else:
-                        label = str(cls_id)
-
-                    print(f"DETECTED: {label} ({conf:.2f})", file=sys.stderr)
-                    
-                    detections.append({
-                        "label": label,
-                        "confidence": conf,
-                        "box": [int(x1), int(y1), int(x2), int(y2)]
-                    })
-                    
+            results = self.model(list(frames), conf=self.conf_threshold, verbose=False)
+            return [self.extract_detections(r) for r in results]
         except Exception as e:
             print(f"Inference error: {e}", file=sys.stderr)
+            return [[] for _ in frames]
+
+    def extract_detections(self, result):
+        # One device-to-host copy per result: columns are x1, y1, x2, y2, [track id,] conf, cls
+        data = result.boxes.data.cpu().numpy()
+        if len(data) == 0:
+            return []
+
+        boxes = data[:, :4].astype(int).tolist()
+        confidences = data[:, -2].tolist()
+        class_ids = data[:, -1].astype(int).tolist()
+        names = self.model.names
+
+        detections = [
+            {
+                "label": names[cls_id] if names else str(cls_id),
+                "confidence": conf,
+                "box": box
+            }
+            for box, conf, cls_id in zip(boxes, confidences, class_ids)
+        ]
+
+        if self.verbose:
+            print("DETECTED: " + ", ".join(f"{d['label']} ({d['confidence']:.2f})" for d in detections), file=sys.stderr)
 
         return detections
+
+def create_threat_detector(backend="torch", model_filename="best.pt", conf_threshold=0.45, quantize=False, num_threads=0):
+    if backend == "onnx":
+        from onnx_threat_detector import OnnxThreatDetector
+        return OnnxThreatDetector(model_filename, conf_threshold, quantize=quantize, num_threads=num_threads)
+    if backend != "torch":
+        print(f"Unknown threat detector backend '{backend}'. Using torch.", file=sys.stderr)
+    return ThreatDetector(model_filename, conf_threshold)
@@ -0,0 +1,94 @@
+import io
+import os
+import sys
+import time
+import contextlib
+from types import SimpleNamespace
+
+import numpy as np
+import cv2
+
+from threat_detector import ThreatDetector
+
+NAMES = {0: "pistol", 1: "knife"}
+
+def legacy_extract(result, names):
+    # Per-box extraction as ThreatDetector.detect did it before batching was added
+    detections = []
+    for box in result.boxes:
+        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+        cls_id = int(box.cls[0])
+        conf = float(box.conf[0])
+        label = names[cls_id] if names else str(cls_id)
+        print(f"DETECTED: {label} ({conf:.2f})", file=sys.stderr)
+        detections.append({"label": label, "confidence": conf, "box": [int(x1), int(y1), int(x2), int(y2)]})
+    return detections
+
+def fake_result(num_boxes, rng):
+    # torch/ultralytics only load here, so load_frames() stays usable without them
+    import torch
+    from ultralytics.engine.results import Boxes
+
+    xy = rng.uniform(0, 600, size=(num_boxes, 2))
+    wh = rng.uniform(10, 100, size=(num_boxes, 2))
+    conf = rng.uniform(0.45, 1.0, size=(num_boxes, 1))
+    cls = rng.integers(0, len(NAMES), size=(num_boxes, 1))
+    data = np.hstack([xy, xy + wh, conf, cls]).astype(np.float32)
+    return SimpleNamespace(boxes=Boxes(torch.from_numpy(data), (640, 640)))
+
+def time_call(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+def bench_extraction(iterations=2000):
+    detector = ThreatDetector.__new__(ThreatDetector)
+    detector.model = SimpleNamespace(names=NAMES)
+    detector.verbose = False
+    rng = np.random.default_rng(0)
+
+    print("Result extraction overhead per call:")
+    for num_boxes in [0, 1, 5, 20]:
+        result = fake_result(num_boxes, rng)
+        with contextlib.redirect_stderr(io.StringIO()):
+            legacy = time_call(lambda: legacy_extract(result, NAMES), iterations)
+        vectorized = time_call(lambda: detector.extract_detections(result), iterations)
+        print(f"  {num_boxes:3d} boxes: legacy {legacy * 1e6:8.1f} us   vectorized {vectorized * 1e6:8.1f} us")
+
+def load_frames(image_dir, limit=32):
+    frames = []
+    if image_dir and os.path.isdir(image_dir):
+        for filename in sorted(os.listdir(image_dir))[:limit]:
+            img = cv2.imread(os.path.join(image_dir, filename))
+            if img is not None:
+                frames.append(img)
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, size=(360, 640, 3), dtype=np.uint8) for _ in range(8)]
+    return [cv2.resize(f, (640, int(f.shape[0] * 640 / f.shape[1]))) for f in frames]
+
+def bench_inference(image_dir, batch_size=4):
+    detector = ThreatDetector(model_filename="best.pt", conf_threshold=0.45)
+    if detector.model is None:
+        print("Model not available, skipping inference benchmark.")
+        return
+
+    frames = load_frames(image_dir)
+    detector.detect(frames[0])
+
+    started = time.perf_counter()
+    for frame in frames:
+        detector.detect(frame)
+    single = (time.perf_counter() - started) / len(frames)
+
+    started = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        detector.detect_batch(frames[i:i + batch_size])
+    batched = (time.perf_counter() - started) / len(frames)
+
+    print(f"Inference per frame over {len(frames)} frames: single {single * 1000:.1f} ms   batch of {batch_size} {batched * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    bench_extraction()
+    bench_inference(sys.argv[1] if len(sys.argv) > 1 else None)
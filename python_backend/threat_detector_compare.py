@@ -0,0 +1,98 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from threat_detector import create_threat_detector
+from threat_detector_bench import load_frames
+
+MATCH_IOU = 0.5
+
+def xyxy_iou(a, b):
+    inter_w = min(a[2], b[2]) - max(a[0], b[0])
+    inter_h = min(a[3], b[3]) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def match_detections(reference, candidate):
+    # Greedy same-label IoU matching; returns (matched pairs, unmatched reference, unmatched candidate)
+    pairs = []
+    unmatched = list(candidate)
+    for ref in sorted(reference, key=lambda d: -d["confidence"]):
+        best, best_iou = None, MATCH_IOU
+        for cand in unmatched:
+            if cand["label"] != ref["label"]:
+                continue
+            iou = xyxy_iou(ref["box"], cand["box"])
+            if iou >= best_iou:
+                best, best_iou = cand, iou
+        if best is not None:
+            unmatched.remove(best)
+            pairs.append((ref, best, best_iou))
+    return pairs, len(reference) - len(pairs), len(unmatched)
+
+def time_detector(detector, frames):
+    detector.detect(frames[0])
+    latencies, outputs = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        outputs.append(detector.detect(frame))
+        latencies.append(time.perf_counter() - started)
+    return np.array(latencies), outputs
+
+def report_latency(name, latencies):
+    print(f"  {name:<10} mean {latencies.mean() * 1000:7.1f} ms   p50 {np.percentile(latencies, 50) * 1000:7.1f} ms   p95 {np.percentile(latencies, 95) * 1000:7.1f} ms")
+
+def compare(image_dir, limit, conf_threshold, quantize, num_threads):
+    frames = load_frames(image_dir, limit=limit)
+    print(f"Comparing on {len(frames)} frames ({'int8' if quantize else 'fp32'} ONNX)")
+
+    reference = create_threat_detector("torch", conf_threshold=conf_threshold)
+    candidate = create_threat_detector("onnx", conf_threshold=conf_threshold, quantize=quantize, num_threads=num_threads)
+    if reference.model is None or candidate.model is None:
+        print("Both backends must load to compare them.")
+        return 1
+
+    torch_latency, torch_outputs = time_detector(reference, frames)
+    onnx_latency, onnx_outputs = time_detector(candidate, frames)
+
+    print("Latency per frame:")
+    report_latency("torch", torch_latency)
+    report_latency("onnx", onnx_latency)
+    print(f"  speedup    {torch_latency.mean() / onnx_latency.mean():.2f}x")
+
+    matched = missed = extra = agreeing_frames = 0
+    ious, conf_deltas = [], []
+    for ref_dets, cand_dets in zip(torch_outputs, onnx_outputs):
+        pairs, frame_missed, frame_extra = match_detections(ref_dets, cand_dets)
+        matched += len(pairs)
+        missed += frame_missed
+        extra += frame_extra
+        agreeing_frames += bool(ref_dets) == bool(cand_dets)
+        for ref, cand, iou in pairs:
+            ious.append(iou)
+            conf_deltas.append(abs(ref["confidence"] - cand["confidence"]))
+
+    total_ref = matched + missed
+    total_cand = matched + extra
+    print("Agreement with torch:")
+    print(f"  detections: torch {total_ref}, onnx {total_cand}, matched {matched} (IoU >= {MATCH_IOU})")
+    print(f"  recall {matched / total_ref if total_ref else 1.0:.3f}   precision {matched / total_cand if total_cand else 1.0:.3f}")
+    print(f"  frame-level threat/no-threat agreement {agreeing_frames / len(frames):.3f}")
+    if ious:
+        print(f"  mean IoU {np.mean(ious):.3f}   mean |confidence delta| {np.mean(conf_deltas):.3f}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the ONNX Runtime threat detector against the PyTorch one.")
+    parser.add_argument("image_dir", nargs="?", help="Folder of sample frames (random noise if omitted)")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--conf", type=float, default=0.45)
+    parser.add_argument("--int8", action="store_true", help="Compare the int8-quantized model")
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+    sys.exit(compare(args.image_dir, args.limit, args.conf, args.int8, args.threads))
@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.storage.blob import BlobServiceClient, BlobBlock
+from azure.data.tables import TableClient
+
+import config_manager
+import cache_manager
+
+UPLOAD_QUEUE_DIR = os.path.join(cache_manager.LOCAL_DATA_DIR, 'upload_queue')
+JOB_SUFFIX = '.job.json'
+
+class TokenBucket:
+    # Caps upload bandwidth so queued clips never crowd out live Face API requests
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def consume(self, amount, stop_event):
+        if not self.rate:
+            return True
+        while not stop_event.is_set():
+            with self.lock:
+                now = time.time()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # Chunks larger than the burst size are let through once the bucket is full
+                if self.tokens >= min(amount, self.capacity):
+                    self.tokens -= amount
+                    return True
+                wait = (min(amount, self.capacity) - self.tokens) / self.rate
+            stop_event.wait(wait)
+        return False
+
+def make_block_ids(block_count):
+    # Deterministic and equal-length, as Azure requires within one blob
+    return [f"{index:08d}" for index in range(block_count)]
+
+class UploadJob:
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+
+    @property
+    def file_path(self):
+        return os.path.join(os.path.dirname(self.path), self.data["file"])
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        for path in (self.file_path, self.path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+class UploadQueue:
+    # Clips are moved into local_data/upload_queue next to a small JSON job file, so a crash,
+    # restart or long offline period never loses them. One dispatcher drains jobs oldest first;
+    # each clip goes up as fixed-size blocks staged in parallel and committed at the end.
+    # Block ids are deterministic, so a retry only stages blocks Azure does not already hold.
+    def __init__(self, queue_dir=UPLOAD_QUEUE_DIR, block_size=None, max_concurrency=None, max_kbps=None):
+        self.queue_dir = queue_dir
+        self.block_size = block_size or config_manager.UPLOAD_BLOCK_SIZE_MB * 2**20
+        self.max_concurrency = max_concurrency or config_manager.UPLOAD_MAX_CONCURRENCY
+        self.throttle = TokenBucket((max_kbps if max_kbps is not None else config_manager.UPLOAD_MAX_KBPS) * 1024)
+        self.base_backoff = 5.0
+        self.max_backoff = 600.0
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.executor = None
+        self.blob_service_client = None
+        self.table_client = None
+
+        self.jobs = {}
+        self.current_job = None
+        self.uploaded = 0
+        self.uploaded_bytes = 0
+        self.failures = 0
+        self.last_error = None
+
+        os.makedirs(self.queue_dir, exist_ok=True)
+
+    def start(self):
+        if self.thread is None:
+            with self.lock:
+                self.jobs = {job.path: job for job in self._load_jobs()}
+                # A fresh process may well have a working connection again; retry right away
+                for job in self.jobs.values():
+                    job.data["next_attempt_at"] = 0.0
+                if self.jobs:
+                    print(f"Upload queue: resuming {len(self.jobs)} pending clip(s).", file=sys.stderr)
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+            self.thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=5.0)
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+    def enqueue(self, local_path, blob_name, entity, container=None):
+        filename = os.path.basename(local_path)
+        queued_path = os.path.join(self.queue_dir, filename)
+        shutil.move(local_path, queued_path)
+
+        job = UploadJob(os.path.join(self.queue_dir, filename + JOB_SUFFIX), {
+            "file": filename,
+            "blob_name": blob_name,
+            "container": container or config_manager.INCIDENT_CONTAINER,
+            "size": os.path.getsize(queued_path),
+            "entity": entity,
+            "created_at": time.time(),
+            "attempts": 0,
+            "next_attempt_at": 0.0
+        })
+        job.save()
+        with self.lock:
+            self.jobs[job.path] = job
+        print(f"Queued {blob_name} for upload ({job.data['size'] / 2**20:.1f} MB).", file=sys.stderr)
+        self.wakeup.set()
+
+    def _load_jobs(self):
+        jobs = []
+        for filename in os.listdir(self.queue_dir):
+            if not filename.endswith(JOB_SUFFIX):
+                continue
+            path = os.path.join(self.queue_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    job = UploadJob(path, json.load(f))
+            except Exception as e:
+                print(f"Upload queue: unreadable job {filename}: {e}", file=sys.stderr)
+                continue
+            if not os.path.exists(job.file_path):
+                print(f"Upload queue: clip for {filename} is missing, dropping job.", file=sys.stderr)
+                job.remove()
+                continue
+            jobs.append(job)
+        return sorted(jobs, key=lambda j: j.data["created_at"])
+
+    def _dispatch_loop(self):
+        while not self.stop_event.is_set():
+            now = time.time()
+            with self.lock:
+                jobs = sorted(self.jobs.values(), key=lambda j: j.data["created_at"])
+            ready = [j for j in jobs if j.data["next_attempt_at"] <= now]
+
+            if not ready:
+                next_at = min((j.data["next_attempt_at"] for j in jobs), default=None)
+                self.wakeup.wait(None if next_at is None else max(0.1, next_at - now))
+                self.wakeup.clear()
+                continue
+
+            job = ready[0]
+            with self.lock:
+                self.current_job = job.data["blob_name"]
+            try:
+                self._upload(job)
+                job.remove()
+                with self.lock:
+                    self.jobs.pop(job.path, None)
+                    self.uploaded += 1
+                    self.uploaded_bytes += job.data["size"]
+                print(f"SUCCESS: {job.data['blob_name']} uploaded and registered in DB.", file=sys.stderr)
+            except Exception as e:
+                self._schedule_retry(job, e)
+            finally:
+                with self.lock:
+                    self.current_job = None
+
+    def _schedule_retry(self, job, error):
+        attempts = job.data["attempts"] + 1
+        backoff = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1))) * random.uniform(0.8, 1.2)
+        job.data["attempts"] = attempts
+        job.data["next_attempt_at"] = time.time() + backoff
+        job.data["last_error"] = str(error)
+        try:
+            job.save()
+        except OSError as e:
+            print(f"Upload queue: could not persist retry state: {e}", file=sys.stderr)
+        with self.lock:
+            self.failures += 1
+            self.last_error = str(error)
+        # Drop the clients so the next attempt reconnects from scratch
+        self.blob_service_client = None
+        self.table_client = None
+        print(f"Upload of {job.data['blob_name']} failed (attempt {attempts}), retrying in {backoff:.0f}s: {error}", file=sys.stderr)
+
+    def _clients(self):
+        if self.blob_service_client is None:
+            self.blob_service_client = BlobServiceClient.from_connection_string(config_manager.AZURE_STORAGE_CONNECTION_STRING)
+        if self.table_client is None:
+            self.table_client = TableClient.from_connection_string(
+                conn_str=config_manager.AZURE_STORAGE_CONNECTION_STRING,
+                table_name="Incidents"
+            )
+        return self.blob_service_client, self.table_client
+
+    def _upload(self, job):
+        blob_service_client, table_client = self._clients()
+        blob_client = blob_service_client.get_blob_client(container=job.data["container"], blob=job.data["blob_name"])
+
+        size = job.data["size"]
+        staged = {}
+        if "block_ids" in job.data:
+            # The block layout was saved before any block was staged, so a previous attempt
+            # (even one cut short by a crash) may have left blocks Azure still holds
+            try:
+                _, uncommitted = blob_client.get_block_list("uncommitted")
+                staged = {block.id: block.size for block in uncommitted}
+            except Exception:
+                staged = {}
+        else:
+            block_count = max(1, (size + self.block_size - 1) // self.block_size)
+            job.data["block_size"] = self.block_size
+            job.data["block_ids"] = make_block_ids(block_count)
+            job.save()
+
+        block_size = job.data["block_size"]
+        block_ids = job.data["block_ids"]
+        block_count = len(block_ids)
+
+        def expected_size(index):
+            return min(block_size, size - index * block_size)
+
+        todo = [i for i, block_id in enumerate(block_ids) if staged.get(block_id) != expected_size(i)]
+        if len(todo) < block_count:
+            print(f"Resuming {job.data['blob_name']}: {block_count - len(todo)}/{block_count} blocks already staged.", file=sys.stderr)
+
+        futures = [self.executor.submit(self._stage_block, blob_client, job.file_path, block_ids[i], i * block_size, expected_size(i)) for i in todo]
+        for future in futures:
+            future.result()
+        if self.stop_event.is_set():
+            raise RuntimeError("upload interrupted by shutdown")
+
+        blob_client.commit_block_list([BlobBlock(block_id=block_id) for block_id in block_ids])
+
+        entity = dict(job.data["entity"])
+        entity["VideoUrl"] = blob_client.url
+        entity["Timestamp"] = datetime.datetime.fromtimestamp(job.data["created_at"], datetime.timezone.utc)
+        # Upsert keeps a retry after a lost response from failing on a duplicate row
+        table_client.upsert_entity(entity=entity)
+
+    def _stage_block(self, blob_client, file_path, block_id, offset, length):
+        if not self.throttle.consume(length, self.stop_event):
+            return
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        blob_client.stage_block(block_id=block_id, data=data, length=len(data))
+
+    def get_stats(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+            return {
+                "pending": len(jobs),
+                "bytes_pending": sum(j.data["size"] for j in jobs),
+                "uploading": self.current_job,
+                "retrying": sum(1 for j in jobs if j.data["attempts"] > 0),
+                "uploaded": self.uploaded,
+                "uploaded_bytes": self.uploaded_bytes,
+                "failures": self.failures,
+                "last_error": self.last_error
+            }
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+def get_upload_queue():
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = UploadQueue().start()
+        return _default_queue
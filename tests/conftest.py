@@ -0,0 +1,25 @@
+import os
+import sys
+import json
+import tempfile
+
+# Backend modules import each other as top-level modules, the way the app's scripts run them
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_backend')
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+# config_manager refuses to import without the required keys; never read the real config.json
+TEST_CONFIG = {
+    "AZURE_KEY": "test",
+    "AZURE_ENDPOINT": "https://test.invalid/",
+    "AZURE_STORAGE_CONNECTION_STRING": "DefaultEndpointsProtocol=https;AccountName=test;AccountKey=dGVzdA==;EndpointSuffix=core.windows.net",
+    "PROFILE_CONTAINER": "profiles",
+    "IMAGE_CONTAINER": "images",
+    "INCIDENT_CONTAINER": "incidents",
+    "ADMIN_INVITE_CODE": "test"
+}
+
+if "VISION_CONFIG_PATH" not in os.environ:
+    _fd, _path = tempfile.mkstemp(prefix="test_config_", suffix=".json")
+    with os.fdopen(_fd, "w", encoding="utf-8") as f:
+        json.dump(TEST_CONFIG, f)
+    os.environ["VISION_CONFIG_PATH"] = _path
@@ -0,0 +1,70 @@
+import io
+import json
+import inspect
+
+import pytest
+
+import backend_worker
+from backend_worker import BackendWorker
+
+def run(worker, *lines):
+    output = io.StringIO()
+    worker.output = output
+    worker.serve(io.StringIO("".join(line + "\n" for line in lines)))
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    return {r["id"]: r for r in responses}, responses
+
+def make_worker():
+    worker = BackendWorker(io.StringIO())
+
+    def update(incident_id, new_status):
+        return {"status": "success", "message": f"{incident_id} -> {new_status}"}
+
+    def boom():
+        raise RuntimeError("table unavailable")
+
+    worker.register("incidents.update", update)
+    worker.register("boom", boom)
+    return worker
+
+def test_named_and_positional_params():
+    by_id, _ = run(
+        make_worker(),
+        json.dumps({"jsonrpc": "2.0", "id": 1, "method": "incidents.update", "params": {"incident_id": "a", "new_status": "Resolved"}}),
+        json.dumps({"jsonrpc": "2.0", "id": 2, "method": "incidents.update", "params": ["b", "New"]})
+    )
+    assert by_id[1]["result"]["message"] == "a -> Resolved"
+    assert by_id[2]["result"]["message"] == "b -> New"
+    assert by_id[1]["jsonrpc"] == "2.0"
+
+def test_error_codes():
+    by_id, responses = run(
+        make_worker(),
+        json.dumps({"id": 1, "method": "nope"}),
+        json.dumps({"id": 2, "method": "incidents.update", "params": {"id": "a", "status": "New"}}),
+        json.dumps({"id": 3, "method": "boom"}),
+        json.dumps({"id": 4, "params": {}}),
+        "not json"
+    )
+    assert by_id[1]["error"]["code"] == backend_worker.METHOD_NOT_FOUND
+    assert by_id[2]["error"]["code"] == backend_worker.INVALID_PARAMS
+    assert by_id[3]["error"]["code"] == backend_worker.INTERNAL_ERROR
+    assert by_id[3]["error"]["message"] == "table unavailable"
+    assert by_id[4]["error"]["code"] == backend_worker.INVALID_REQUEST
+    assert by_id[None]["error"]["code"] == backend_worker.PARSE_ERROR
+    assert len(responses) == 5
+
+def test_notifications_get_no_response():
+    _, responses = run(
+        make_worker(),
+        json.dumps({"jsonrpc": "2.0", "method": "incidents.update", "params": ["a", "New"]}),
+        json.dumps({"jsonrpc": "2.0", "method": "boom"})
+    )
+    assert responses == []
+
+def test_header_example_matches_registered_handler():
+    # The documented request must bind to the real incidents.update handler
+    pytest.importorskip("azure.storage.blob")
+    import incident_manager
+    params = {"incident_id": "incident_20260101_120000", "new_status": "Resolved"}
+    inspect.signature(incident_manager.update_incident_status).bind(**params)
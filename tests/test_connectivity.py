@@ -0,0 +1,66 @@
+import threading
+
+from connectivity import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+def test_opens_after_threshold_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    assert breaker.allow_request()
+
+    breaker.record_failure("timeout")
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_stats()["failures"] == 3
+    assert breaker.last_error == "timeout"
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_backoff_doubles_per_trip_and_is_capped():
+    breaker = CircuitBreaker("test", base_backoff=2.0, max_backoff=5.0)
+    breaker.trip("down")
+    first = breaker.get_stats()["next_probe_in"]
+    assert 1.5 <= first <= 2.4
+
+    breaker.state = HALF_OPEN
+    breaker.record_failure("still down")
+    assert breaker.state == OPEN
+    assert 3.1 <= breaker.get_stats()["next_probe_in"] <= 4.8
+
+    breaker.state = HALF_OPEN
+    breaker.record_failure("still down")
+    assert breaker.get_stats()["next_probe_in"] <= 6.0
+
+def test_probe_success_closes_and_resets_backoff():
+    breaker = CircuitBreaker("test", base_backoff=0.01)
+    breaker.trip("down")
+    breaker.wait_for_probe()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.trip_count == 0
+    assert breaker.allow_request()
+
+def test_wait_for_probe_blocks_until_tripped():
+    breaker = CircuitBreaker("test", base_backoff=0.01)
+    probed = threading.Event()
+
+    def prober():
+        breaker.wait_for_probe()
+        probed.set()
+
+    thread = threading.Thread(target=prober, daemon=True)
+    thread.start()
+    assert not probed.wait(0.05)
+
+    breaker.trip("down")
+    assert probed.wait(1.0)
+    assert breaker.state == HALF_OPEN
+    thread.join(1.0)
@@ -0,0 +1,93 @@
+from face_tracker import FaceTracker, associate, keeps_identity, box_iou
+
+def test_box_iou():
+    assert box_iou([0, 0, 10, 10], [0, 0, 10, 10]) == 1.0
+    assert box_iou([0, 0, 10, 10], [20, 20, 10, 10]) == 0.0
+    assert abs(box_iou([0, 0, 10, 10], [5, 0, 10, 10]) - 50 / 150) < 1e-9
+
+def test_associate_matches_greedily_by_iou():
+    snapshot = [(1, [0, 0, 100, 100], True), (2, [200, 0, 100, 100], False)]
+    boxes = [[205, 5, 100, 100], [2, 2, 100, 100], [500, 500, 50, 50]]
+    matched = associate(snapshot, boxes)
+    assert matched[0][0] == 2
+    assert matched[1][0] == 1
+    assert matched[2] is None
+
+def test_associate_uses_each_track_once():
+    snapshot = [(1, [0, 0, 100, 100], True)]
+    matched = associate(snapshot, [[0, 0, 100, 100], [5, 5, 100, 100]])
+    assert [m[0] if m else None for m in matched] == [1, None]
+
+def test_keeps_identity_requires_confident_stable_box():
+    entry = (1, [100, 100, 80, 80], True)
+    assert keeps_identity(entry, [104, 102, 80, 80])
+    assert not keeps_identity(None, [100, 100, 80, 80])
+    assert not keeps_identity((1, [100, 100, 80, 80], False), [100, 100, 80, 80])
+    # Same spot, very different face size: someone else stepped into the box
+    assert not keeps_identity(entry, [90, 90, 120, 120])
+    # Still overlaps enough to associate, but moved too far to trust the identity
+    assert not keeps_identity(entry, [140, 100, 80, 80])
+
+def make_tracker(**kwargs):
+    tracker = FaceTracker(**kwargs)
+    tracker.apply_detections([{"box": [100, 100, 80, 80], "track": None, "name": "alice", "distance": 0.3}], now=0.0)
+    return tracker
+
+def test_new_detection_creates_confident_track():
+    tracker = make_tracker()
+    (track_id, box, confident), = tracker.snapshot(now=0.5)
+    assert confident
+    assert tracker.tracks[0].name == "alice"
+
+def test_unidentified_detection_without_track_is_ignored():
+    tracker = FaceTracker()
+    tracker.apply_detections([{"box": [0, 0, 10, 10], "track": None, "name": None, "distance": None}], now=0.0)
+    assert tracker.tracks == []
+
+def test_reused_identity_expires_after_rounds():
+    tracker = make_tracker(reverify_rounds=2, reverify_seconds=100.0)
+    for now in (1.0, 2.0):
+        entry = tracker.snapshot(now=now)[0]
+        assert entry[2]
+        tracker.apply_detections([{"box": [100, 100, 80, 80], "track": entry, "name": None, "distance": None}], now=now)
+    assert not tracker.snapshot(now=3.0)[0][2]
+
+def test_reused_identity_expires_after_seconds():
+    tracker = make_tracker(reverify_rounds=100, reverify_seconds=3.0)
+    assert tracker.snapshot(now=2.9)[0][2]
+    assert not tracker.snapshot(now=3.1)[0][2]
+
+def test_reencoding_replaces_identity_and_resets_verification():
+    tracker = make_tracker(reverify_rounds=1, reverify_seconds=100.0)
+    entry = tracker.snapshot(now=1.0)[0]
+    tracker.apply_detections([{"box": [100, 100, 80, 80], "track": entry, "name": None, "distance": None}], now=1.0)
+    entry = tracker.snapshot(now=2.0)[0]
+    assert not entry[2]
+
+    tracker.apply_detections([{"box": [100, 100, 80, 80], "track": entry, "name": "Unknown", "distance": 0.7}], now=2.0)
+    track = tracker.tracks[0]
+    assert track.name == "Unknown"
+    assert track.reused_rounds == 0
+    assert not tracker.snapshot(now=2.5)[0][2]
+
+def test_unmatched_track_is_dropped_after_max_misses():
+    tracker = make_tracker(max_misses=1)
+    tracker.apply_detections([], now=1.0)
+    assert len(tracker.tracks) == 1
+    tracker.apply_detections([], now=2.0)
+    assert tracker.tracks == []
+
+def test_track_survives_one_missed_detection_and_keeps_identity():
+    tracker = make_tracker(reverify_rounds=100, reverify_seconds=100.0)
+    tracker.apply_detections([], now=1.0)
+    assert len(tracker.tracks) == 1
+    assert tracker.tracks[0].misses == 1
+
+    entry = tracker.snapshot(now=2.0)[0]
+    assert entry[2]
+    assert keeps_identity(entry, [102, 100, 80, 80])
+    tracker.apply_detections([{"box": [102, 100, 80, 80], "track": entry, "name": None, "distance": None}], now=2.0)
+    track, = tracker.tracks
+    assert track.name == "alice"
+    assert track.misses == 0
+    assert tracker.encoded_faces == 1
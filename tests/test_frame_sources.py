@@ -0,0 +1,28 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_sources import FrameSource, ImageDirectorySource
+
+def test_subclass_without_read_fails_on_creation():
+    class Incomplete(FrameSource):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete")
+
+def test_image_directory_reads_only_images_and_scales_down(tmp_path):
+    for name in ("b.png", "a.JPG"):
+        cv2.imwrite(str(tmp_path / name), np.full((100, 200, 3), 128, dtype=np.uint8))
+    (tmp_path / "notes.txt").write_text("not a frame")
+
+    source = ImageDirectorySource(str(tmp_path), max_width=100)
+    assert [os.path.basename(f) for f in source.files] == ["a.JPG", "b.png"]
+
+    ret, frame = source.read()
+    assert ret and frame.shape == (50, 100, 3)
+    assert source.read()[0]
+    assert source.read() == (False, None)
+    assert source.finished
@@ -0,0 +1,18 @@
+import json
+
+from frame_transport import JsonFrameSink, SocketFrameSink
+
+def test_json_sink_inlines_frame(capsys):
+    JsonFrameSink().send({"camera_index": 0}, b"\xff\xd8jpeg")
+    packet = json.loads(capsys.readouterr().out)
+    assert packet["frame"]
+
+def test_status_packets_carry_no_frame(capsys):
+    JsonFrameSink().send_status({"camera_index": 1, "frame": "stale"})
+    assert json.loads(capsys.readouterr().out) == {"camera_index": 1, "frame": None}
+
+def test_socket_sink_sends_status_without_connecting(capsys):
+    sink = SocketFrameSink.__new__(SocketFrameSink)
+    sink.fallback = JsonFrameSink()
+    sink.send_status({"camera_index": 2})
+    assert json.loads(capsys.readouterr().out)["frame"] is None
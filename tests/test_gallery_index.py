@@ -0,0 +1,60 @@
+import numpy as np
+
+from gallery_index import BruteForceIndex, IVFIndex, create_gallery_index, estimate_recall
+
+def clustered_gallery(people=400, per_person=5, dim=128, seed=0):
+    # A few encodings per person around a per-person centre, like a real face gallery
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(0.0, 1.0, size=(people, dim)).astype(np.float32)
+    vectors = np.repeat(centres, per_person, axis=0) + rng.normal(0.0, 0.05, size=(people * per_person, dim)).astype(np.float32)
+    labels = [f"person_{i // per_person}" for i in range(people * per_person)]
+    return vectors, labels
+
+def ivf_index(vectors, labels, nprobe):
+    index = IVFIndex(nlist=32, nprobe=nprobe, min_train_size=256)
+    index.build(vectors, labels)
+    return index
+
+def test_exact_search_finds_nearest():
+    vectors, labels = clustered_gallery(people=20)
+    index = BruteForceIndex()
+    index.build(vectors, labels)
+    results = index.search(vectors[7] + 0.01, k=3)
+    assert results[0][0][0] == labels[7]
+    assert [distance for _, distance in results[0]] == sorted(distance for _, distance in results[0])
+
+def test_ivf_recall_with_all_lists_probed_is_exact():
+    vectors, labels = clustered_gallery()
+    index = ivf_index(vectors, labels, nprobe=32)
+    assert index.is_trained
+    recall, _, _ = estimate_recall(index, k=1)
+    assert recall == 1.0
+
+def test_ivf_recall_stays_high_with_few_probes():
+    vectors, labels = clustered_gallery()
+    index = ivf_index(vectors, labels, nprobe=4)
+    recall, _, _ = estimate_recall(index, k=1)
+    assert recall >= 0.9
+
+def test_ivf_search_matches_labels_after_add_and_remove():
+    vectors, labels = clustered_gallery()
+    index = ivf_index(vectors, labels, nprobe=8)
+
+    extra = np.full((1, 128), 3.0, dtype=np.float32)
+    index.add(extra, ["newcomer"])
+    assert index.search(extra, k=1)[0][0][0] == "newcomer"
+
+    assert index.remove(["newcomer", "person_0"]) == 6
+    assert "person_0" not in index.labels
+    assert index.search(vectors[5], k=1)[0][0][0] == "person_1"
+
+def test_small_gallery_falls_back_to_exact_search():
+    vectors, labels = clustered_gallery(people=10)
+    index = create_gallery_index("ivf", nprobe=1)
+    index.build(vectors, labels)
+    assert not index.is_trained
+    assert estimate_recall(index)[0] == 1.0
+
+def test_unknown_kind_uses_exact_index():
+    assert isinstance(create_gallery_index("bogus"), BruteForceIndex)
+    assert estimate_recall(BruteForceIndex())[0] == 1.0
@@ -0,0 +1,82 @@
+import pytest
+
+# incident_index pulls in cache_manager, which needs the blob SDK
+pytest.importorskip("azure.storage.blob")
+
+from incident_index import IncidentIndex
+
+def segment(incident_id, index, started_at, status="New"):
+    return {
+        "row_key": f"{incident_id}_seg{index:03d}.webm",
+        "incident_id": incident_id,
+        "segment": index,
+        "status": status,
+        "camera_id": "cam0",
+        "started_at": started_at,
+        "video_url": f"https://example/{incident_id}_seg{index:03d}.webm"
+    }
+
+def filled_index(tmp_path):
+    index = IncidentIndex(str(tmp_path / "index.sqlite"))
+    index.upsert([
+        segment("incident_a", 0, "2024-01-01T10:00:00"),
+        segment("incident_a", 1, "2024-01-01T10:01:00"),
+        segment("incident_b", 0, "2024-01-02T10:00:00", status="Resolved"),
+        segment("incident_c", 0, "2024-01-03T10:00:00"),
+    ])
+    return index
+
+def test_query_pages_newest_first(tmp_path):
+    index = filled_index(tmp_path)
+    page, has_more = index.query(limit=2)
+    assert [incident["id"] for incident in page] == ["incident_c", "incident_b"]
+    assert has_more
+
+    page, has_more = index.query(limit=2, offset=2)
+    assert [incident["id"] for incident in page] == ["incident_a"]
+    assert not has_more
+    index.close()
+
+def test_query_groups_segments_in_order(tmp_path):
+    index = filled_index(tmp_path)
+    page, _ = index.query(until="2024-01-02T00:00:00")
+    assert len(page) == 1
+    assert page[0]["timestamp"] == "2024-01-01T10:00:00"
+    assert [row_key for row_key, _ in page[0]["segments"]] == ["incident_a_seg000.webm", "incident_a_seg001.webm"]
+    index.close()
+
+def test_query_filters_status_and_time(tmp_path):
+    index = filled_index(tmp_path)
+    page, _ = index.query(status="Resolved")
+    assert [incident["id"] for incident in page] == ["incident_b"]
+
+    page, _ = index.query(since="2024-01-02T00:00:00", until="2024-01-03T00:00:00")
+    assert [incident["id"] for incident in page] == ["incident_b"]
+    index.close()
+
+def test_set_status_and_delete(tmp_path):
+    index = filled_index(tmp_path)
+    index.set_status("incident_a", "Resolved")
+    page, _ = index.query(status="Resolved")
+    assert [incident["id"] for incident in page] == ["incident_b", "incident_a"]
+
+    index.delete_incident("incident_b")
+    page, _ = index.query()
+    assert [incident["id"] for incident in page] == ["incident_c", "incident_a"]
+    index.close()
+
+def test_prune_drops_rows_missing_from_table(tmp_path):
+    index = filled_index(tmp_path)
+    removed = index.prune(["incident_a_seg000.webm", "incident_c_seg000.webm"])
+    assert removed == 2
+    page, _ = index.query()
+    assert [incident["id"] for incident in page] == ["incident_c", "incident_a"]
+    assert len(page[1]["segments"]) == 1
+    index.close()
+
+def test_sync_state_round_trip(tmp_path):
+    index = IncidentIndex(str(tmp_path / "index.sqlite"))
+    assert index.get_state("last_sync", "never") == "never"
+    index.set_state("last_sync", "2024-01-01T00:00:00")
+    assert index.get_state("last_sync") == "2024-01-01T00:00:00"
+    index.close()
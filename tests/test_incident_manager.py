@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+pytest.importorskip("azure.storage.blob")
+
+import incident_manager
+from incident_index import IncidentIndex
+
+class FakePages:
+    # Like ItemPaged.by_page(): iterates pages and exposes the token for the next one
+    def __init__(self, pages, start):
+        self.pages = pages
+        self.position = start
+        self.continuation_token = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.position >= len(self.pages):
+            raise StopIteration
+        page = self.pages[self.position]
+        self.position += 1
+        self.continuation_token = self.position if self.position < len(self.pages) else None
+        return iter(page)
+
+class FakePager:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def by_page(self, continuation_token=None):
+        return FakePages(self.pages, continuation_token or 0)
+
+class FakeIncidentTable:
+    # Just enough of TableClient.query_entities: RowKey range and page size, rows in key order
+    def __init__(self, row_keys):
+        self.rows = [{"PartitionKey": "incidents", "RowKey": key, "IncidentId": key.rsplit(".", 1)[0], "Status": "New"} for key in sorted(row_keys)]
+        self.queries = []
+
+    def query_entities(self, query_filter, parameters=None, results_per_page=1000, select=None):
+        parameters = parameters or {}
+        self.queries.append(dict(parameters))
+        rows = [
+            row for row in self.rows
+            if row["RowKey"] >= parameters.get("start", "") and row["RowKey"] < parameters.get("end", "~")
+        ]
+        pages = [rows[i:i + results_per_page] for i in range(0, len(rows), results_per_page)] or [[]]
+        return FakePager(pages)
+
+def incident_keys(days, per_day=2):
+    now = datetime.datetime.now()
+    return [
+        f"incident_{(now - datetime.timedelta(days=day, hours=hour)).strftime('%Y%m%d_%H%M%S')}.webm"
+        for day in range(days) for hour in range(per_day)
+    ]
+
+def test_first_sync_fetches_only_recent_windows(tmp_path):
+    table = FakeIncidentTable(incident_keys(days=60))
+    index = IncidentIndex(str(tmp_path / "index.sqlite"))
+    incident_manager.sync_index(index, table)
+    assert index.query(limit=1000)[0] == []
+
+    incident_manager.backfill_index(index, table, wanted=5)
+    page, has_more = index.query(limit=5)
+    assert len(page) == 5 and has_more
+    # Only the first few windows were read, not the whole table
+    assert len(index.query(limit=1000)[0]) < 20
+    assert index.get_state("backfilled_to")
+
+    # A later page backfills further; the newest page is unchanged
+    incident_manager.backfill_index(index, table, wanted=40)
+    assert len(index.query(limit=1000)[0]) > 40
+    assert index.query(limit=5)[0] == page
+    index.close()
+
+def test_backfill_stops_at_requested_since(tmp_path):
+    table = FakeIncidentTable(incident_keys(days=60))
+    index = IncidentIndex(str(tmp_path / "index.sqlite"))
+    incident_manager.sync_index(index, table)
+    since = (datetime.datetime.now() - datetime.timedelta(days=3, minutes=-30)).isoformat(timespec="seconds")
+    incident_manager.backfill_index(index, table, wanted=1000, since=since)
+
+    page, has_more = index.query(since=since, limit=1000)
+    assert len(page) == 6 and not has_more
+    assert len(index.query(limit=1000)[0]) < 20
+    index.close()
+
+def test_backfill_completes_when_oldest_row_is_reached(tmp_path):
+    table = FakeIncidentTable(incident_keys(days=3))
+    index = IncidentIndex(str(tmp_path / "index.sqlite"))
+    incident_manager.sync_index(index, table)
+    incident_manager.backfill_index(index, table, wanted=1000)
+    assert len(index.query(limit=1000)[0]) == 6
+    assert index.get_state("backfilled_to") == ""
+
+    table.queries.clear()
+    assert incident_manager.backfill_index(index, table, wanted=1000) == 0
+    assert table.queries == []
+    index.close()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("azure.storage.blob")
+pytest.importorskip("azure.data.tables")
+
+import incident_recorder
+from incident_recorder import IncidentRecorder
+
+class RecordingQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, file_path, blob_name, entity):
+        self.jobs.append((blob_name, entity))
+
+class FakeWriter:
+    opened = []
+
+    def __init__(self, path, fourcc, fps, size):
+        self.path = path
+        self.frames = 0
+        self.ok = FakeWriter.opened.pop(0)
+
+    def isOpened(self):
+        return self.ok
+
+    def write(self, frame):
+        assert self.ok
+        self.frames += 1
+
+    def release(self):
+        pass
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.setattr(incident_recorder.cv2, "VideoWriter", FakeWriter)
+    recorder = IncidentRecorder(camera_id="cam", upload_queue=RecordingQueue())
+    recorder.segment_seconds = 1.0
+    yield recorder
+    recorder.close()
+
+def frame():
+    return np.zeros((48, 64, 3), dtype=np.uint8)
+
+def test_segment_that_fails_to_open_is_skipped(recorder):
+    FakeWriter.opened = [False, True]
+    recorder._open("incident_x", 64, 48, 2.0)
+
+    recorder._write(frame(), None)
+    assert recorder.video_writer is None
+    assert recorder.failed_segments == 1
+    recorder._write(frame(), None)
+    assert recorder.written_frames == 0
+    assert recorder.upload_queue.jobs == []
+
+    # The next segment gets a fresh writer and is the only one queued
+    recorder._write(frame(), None)
+    recorder._write(frame(), None)
+    blob_names = [blob_name for blob_name, _ in recorder.upload_queue.jobs]
+    assert blob_names == ["incident_x_seg001.webm"]
+    assert recorder.written_frames == 2
+    assert recorder.get_stats()["failed_segments"] == 1
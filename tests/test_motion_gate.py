@@ -0,0 +1,90 @@
+import numpy as np
+
+from motion_gate import MotionGate
+
+def static_frame():
+    return np.full((240, 320, 3), 80, dtype=np.uint8)
+
+def moving_frame():
+    frame = static_frame()
+    frame[60:180, 100:220] = 250
+    return frame
+
+def settled_gate(**kwargs):
+    gate = MotionGate(hold_seconds=1.0, max_skip_seconds=10.0, **kwargs)
+    gate.update(static_frame(), 0.0)
+    gate.update(static_frame(), 5.0)
+    return gate
+
+def test_update_detects_motion():
+    gate = settled_gate()
+    assert not gate.update(static_frame(), 5.1)
+    assert gate.update(moving_frame(), 5.2)
+    assert gate.get_stats()["regions"] == 1
+    assert gate.is_open(5.5)
+
+def test_update_reports_region_boxes_in_frame_pixels():
+    gate = settled_gate()
+    assert gate.update(moving_frame(), 5.1)
+    assert len(gate.regions) == 1
+    x, y, w, h = gate.regions[0]
+    # The changed block is x 100-220, y 60-180; blur and dilation widen it slightly
+    assert 85 <= x <= 100 and 45 <= y <= 60
+    assert 120 <= w <= 150 and 120 <= h <= 150
+
+def test_update_reports_each_changed_area():
+    gate = settled_gate()
+    frame = static_frame()
+    frame[10:50, 10:50] = 250
+    frame[150:230, 220:310] = 250
+    assert gate.update(frame, 5.1)
+    boxes = sorted(gate.regions)
+    assert len(boxes) == 2
+    assert boxes[0][0] < 20 and boxes[1][0] > 200
+    assert gate.get_stats()["regions"] == 2
+
+    gate = settled_gate()
+    assert not gate.update(static_frame(), 5.1)
+    assert gate.regions == []
+
+def test_static_scene_defers_due_check():
+    gate = settled_gate()
+    gate.update(static_frame(), 5.1)
+    assert not gate.check("face", True, 5.1)
+    assert gate.pending["face"]
+    assert gate.get_stats()["stages"]["face"]["skipped"] == 1
+
+def test_deferred_check_runs_when_motion_resumes():
+    gate = settled_gate()
+    assert not gate.check("face", True, 5.1)
+    gate.update(moving_frame(), 5.2)
+    assert gate.check("face", False, 5.2)
+
+def test_pending_survives_busy_worker_until_marked_run():
+    gate = settled_gate()
+    assert not gate.check("face", True, 5.1)
+    gate.update(moving_frame(), 5.2)
+
+    # Worker still busy: nothing runs and the deferred check is kept
+    assert not gate.check("face", False, 5.2, ready=False)
+    assert gate.pending["face"]
+
+    # Worker free but submission failed: still pending on the next frame
+    assert gate.check("face", False, 5.3)
+    assert gate.check("face", False, 5.4)
+
+    gate.mark_run("face", 5.4)
+    assert not gate.pending["face"]
+    assert not gate.check("face", False, 5.5)
+    assert gate.get_stats()["stages"]["face"]["run"] == 1
+
+def test_max_skip_forces_a_run_in_a_static_scene():
+    gate = settled_gate()
+    gate.mark_run("weapon", 5.0)
+    assert not gate.check("weapon", True, 8.0)
+    assert gate.check("weapon", True, 15.0)
+
+def test_not_due_and_not_pending_never_runs():
+    gate = settled_gate()
+    gate.update(moving_frame(), 5.1)
+    assert not gate.check("weapon", False, 5.1)
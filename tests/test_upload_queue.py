@@ -0,0 +1,105 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("azure.storage.blob")
+pytest.importorskip("azure.data.tables")
+
+import fake_azure
+import upload_queue
+from upload_queue import UploadQueue, make_block_ids
+
+BLOCK_SIZE = 1024
+
+@pytest.fixture(autouse=True)
+def fresh_fakes(monkeypatch):
+    monkeypatch.setattr(fake_azure.FakeBlobServiceClient, "blobs", {})
+    monkeypatch.setattr(fake_azure.FakeBlobServiceClient, "staged", {})
+    monkeypatch.setattr(fake_azure.FakeBlobServiceClient, "stats", fake_azure.FakeCallStats())
+    monkeypatch.setattr(fake_azure.FakeTableClient, "entities", {})
+    monkeypatch.setattr(upload_queue, "BlobServiceClient", fake_azure.FakeBlobServiceClient)
+    monkeypatch.setattr(upload_queue, "TableClient", fake_azure.FakeTableClient)
+
+def make_queue(queue_dir):
+    queue = UploadQueue(queue_dir=str(queue_dir), block_size=BLOCK_SIZE, max_concurrency=1, max_kbps=0)
+    queue.executor = ThreadPoolExecutor(max_workers=1)
+    return queue
+
+def enqueue_clip(queue, tmp_path, size):
+    clip = tmp_path / "incident_20260101_120000_seg000.webm"
+    clip.write_bytes(os.urandom(size))
+    queue.enqueue(str(clip), clip.name, {"PartitionKey": "incidents", "RowKey": clip.name})
+    return next(iter(queue.jobs.values()))
+
+def staged_calls():
+    return fake_azure.FakeBlobServiceClient.stats.get_stats()["calls"].get("blob.stage_block", 0)
+
+def test_block_ids_are_deterministic_and_equal_length():
+    ids = make_block_ids(12)
+    assert ids == make_block_ids(12)
+    assert len(set(ids)) == 12
+    assert len({len(i) for i in ids}) == 1
+
+def test_upload_commits_all_blocks_and_registers_entity(tmp_path):
+    queue = make_queue(tmp_path / "queue")
+    job = enqueue_clip(queue, tmp_path, 5 * BLOCK_SIZE + 10)
+    queue._upload(job)
+
+    assert staged_calls() == 6
+    assert fake_azure.FakeBlobServiceClient.blobs[("incidents", job.data["blob_name"])] == job.data["size"]
+    entity, = fake_azure.FakeTableClient.entities.values()
+    assert entity["VideoUrl"].endswith(job.data["blob_name"])
+    assert entity["Timestamp"].tzinfo is not None
+
+def test_crash_during_first_attempt_resumes_staged_blocks(tmp_path, monkeypatch):
+    queue_dir = tmp_path / "queue"
+    queue = make_queue(queue_dir)
+    job = enqueue_clip(queue, tmp_path, 5 * BLOCK_SIZE)
+
+    original_stage = fake_azure.FakeBlobClient.stage_block
+    lock = threading.Lock()
+    calls = {"n": 0}
+
+    def flaky_stage(self, block_id, data, length=None, **kwargs):
+        with lock:
+            calls["n"] += 1
+            if calls["n"] > 3:
+                raise ConnectionError("connection reset")
+        return original_stage(self, block_id, data, length, **kwargs)
+
+    monkeypatch.setattr(fake_azure.FakeBlobClient, "stage_block", flaky_stage)
+    with pytest.raises(ConnectionError):
+        queue._upload(job)
+    queue.executor.shutdown(wait=True)
+    # The process dies here: no retry bookkeeping, attempts is still 0 on disk
+    with open(job.path, "r", encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["attempts"] == 0
+    assert saved["block_ids"] == make_block_ids(5)
+
+    monkeypatch.setattr(fake_azure.FakeBlobClient, "stage_block", original_stage)
+    restarted = make_queue(queue_dir)
+    resumed_job, = restarted._load_jobs()
+    before = staged_calls()
+    restarted._upload(resumed_job)
+
+    assert staged_calls() - before == 2
+    assert fake_azure.FakeBlobServiceClient.blobs[("incidents", resumed_job.data["blob_name"])] == 5 * BLOCK_SIZE
+
+def test_resume_keeps_the_original_block_size(tmp_path):
+    queue_dir = tmp_path / "queue"
+    queue = make_queue(queue_dir)
+    job = enqueue_clip(queue, tmp_path, 4 * BLOCK_SIZE)
+    job.data["block_size"] = BLOCK_SIZE
+    job.data["block_ids"] = make_block_ids(4)
+    job.save()
+
+    restarted = UploadQueue(queue_dir=str(queue_dir), block_size=3 * BLOCK_SIZE, max_concurrency=1, max_kbps=0)
+    restarted.executor = ThreadPoolExecutor(max_workers=1)
+    resumed_job, = restarted._load_jobs()
+    restarted._upload(resumed_job)
+    assert fake_azure.FakeBlobServiceClient.blobs[("incidents", resumed_job.data["blob_name"])] == 4 * BLOCK_SIZE
+    assert staged_calls() == 4